@@ -0,0 +1,100 @@
+"""HttpSaaSAdapter のスループットベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 各方式の req/s(標準出力)。
+制約:
+    - 送信先はローカルの StubServer のみとし、外部 SaaS へは接続しない
+    - 比較対象として「毎回新規接続」方式も計測する
+
+Note:
+    - 方式: 新規接続 / 接続プール / 接続プール+バッチ / 429 混在時 / 送信側流量制御
+    - 実行例: python bench/bench_adapters.py --requests 2000 --threads 8 --latency-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.bridge.adapters import HttpSaaSAdapter, TokenBucket  # noqa: E402
+from services.bridge.stub_server import StubServer  # noqa: E402
+
+
+class LineBenchAdapter(HttpSaaSAdapter):
+    """計測用の LINE 配信 Adapter。"""
+
+    routes = {"send_line_message": "/line/messages"}
+    batch_routes = {"send_line_message": "/line/messages/batch"}
+
+
+def _fresh_connection_call(url: str, payload: dict) -> None:
+    """接続を毎回張り直して1件送信する。"""
+    host, port = url.removeprefix("http://").split(":")
+    conn = http.client.HTTPConnection(host, int(port), timeout=10)
+    conn.request("POST", "/line/messages", body=json.dumps(payload), headers={"Connection": "close"})
+    conn.getresponse().read()
+    conn.close()
+
+
+def _report(label: str, count: int, started: float, stub: StubServer) -> None:
+    """所要時間と req/s を表示し、統計をリセットする。"""
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<20}: {count / elapsed:9.0f} items/s "
+        f"requests={stub.stats['requests']} connections={stub.stats['connections']} "
+        f"throttled={stub.stats['throttled']}"
+    )
+    for key in stub.stats:
+        stub.stats[key] = 0
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    payloads = [{"customer_id": i} for i in range(args.requests)]
+    with StubServer(latency=args.latency_ms / 1000) as stub:
+        with ThreadPoolExecutor(args.threads) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda p: _fresh_connection_call(stub.url, p), payloads))
+            _report("fresh connection", args.requests, started, stub)
+
+            adapter = LineBenchAdapter(stub.url, rate_per_sec=1e9, max_connections=args.threads)
+            started = time.perf_counter()
+            list(pool.map(lambda p: adapter.execute("send_line_message", p), payloads))
+            _report("pooled", args.requests, started, stub)
+
+            started = time.perf_counter()
+            adapter.max_batch_size = args.batch_size
+            adapter.execute_batch("send_line_message", payloads)
+            _report("pooled + batch", args.requests, started, stub)
+
+            stub.rate_limit_per_sec = args.requests // 4
+            started = time.perf_counter()
+            results = list(pool.map(lambda p: adapter.execute("send_line_message", p), payloads))
+            ok = sum(result.ok for result in results)
+            _report(f"pooled + 429 (ok={ok})", args.requests, started, stub)
+
+            # 送信側のトークンバケットをリモート上限に合わせ、429 を事前に回避する。
+            adapter.rate_limiter = TokenBucket(stub.rate_limit_per_sec * 0.9, args.threads)
+            count = args.requests // 4
+            started = time.perf_counter()
+            results = list(pool.map(lambda p: adapter.execute("send_line_message", p), payloads[:count]))
+            ok = sum(result.ok for result in results)
+            _report(f"token bucket (ok={ok})", count, started, stub)
+            adapter.close()
+
+
+if __name__ == "__main__":
+    main()
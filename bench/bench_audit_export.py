@@ -0,0 +1,85 @@
+"""監査ログの gzip NDJSON エクスポートのベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 出力速度・圧縮後サイズ・追加メモリ(標準出力)。
+制約:
+    - 監査ログは Orchestrator の成功 record と同じ形の合成データとする
+    - 出力先は実ファイルとし、比較対象としてディスクへの生書き込み速度も計測する
+
+Note:
+    - 追加メモリは最大 RSS の増分で計測する（合成データ自体の保持分は含まない）
+    - 実行例: python bench/bench_audit_export.py --records 1000000 --output /tmp/audit.ndjson.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import sys
+import resource
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.inference.audit_export import export_ndjson  # noqa: E402
+from services.inference.audit_store import AuditStore  # noqa: E402
+
+
+def _store(count: int) -> AuditStore:
+    """合成監査ログを保持する AuditStore を作る。"""
+    store = AuditStore()
+    for index in range(count):
+        # deepcopy のコストを避けるため内部リストへ直接追加する。
+        store._records.append(
+            {
+                "trace_id": f"{index:032x}",
+                "input_text": "最近来店が減っている。値引きには反応しないが、限定感には反応する。",
+                "state": ["来店頻度低下", "価格感度低", "限定感志向"],
+                "intent": "再来店動機付け",
+                "next_actions": ["限定LINE配信案", "会員限定イベント", "期間限定特典"],
+                "status": "success" if index % 10 else "failed",
+                "timestamp": f"2026-10-19T{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}+00:00",
+                "latency_ms": {"reader": 0.05, "payload": 0.03, "validator": 0.02, "generator": 0.01},
+            }
+        )
+    return store
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--output", default="/tmp/audit-export.ndjson.gz")
+    parser.add_argument("--compresslevel", type=int, default=1)
+    args = parser.parse_args()
+
+    store = _store(args.records)
+    output = Path(args.output)
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with open(output, "wb") as stream:
+        result = export_ndjson(store, stream, compresslevel=args.compresslevel)
+        stream.flush()
+        os.fsync(stream.fileno())
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb
+
+    print(f"export            : {result.records / elapsed:10.0f} rec/s ({elapsed:.2f} s)")
+    print(f"compressed size   : {result.bytes_written / 1e6:10.1f} MB ({result.bytes_written / elapsed / 1e6:.1f} MB/s)")
+    print(f"peak extra memory : {peak_kb / 1e3:10.1f} MB")
+
+    # 同じサイズの生書き込みでディスク速度を測る。
+    block = os.urandom(1 << 20)
+    started = time.perf_counter()
+    with open(output, "wb") as stream:
+        for _ in range(max(1, result.bytes_written >> 20)):
+            stream.write(block)
+        stream.flush()
+        os.fsync(stream.fileno())
+    print(f"raw disk write    : {result.bytes_written / (time.perf_counter() - started) / 1e6:10.1f} MB/s")
+    output.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""監査ログ集計の問い合わせ時間（差分集計 vs 全件走査）と保存時の加算コストのベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 件数別の保存スループット・問い合わせ時間(標準出力)。
+制約:
+    - 監査ログは1秒間隔・4 intent・失敗率 10% の合成データとする
+    - 全件走査は AuditStore.records() から同じ集計値を Counter で求める
+
+Note:
+    - 実行例: python bench/bench_audit_rollup.py --sizes 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.inference.audit_rollup import AuditRollup, RetentionPolicy  # noqa: E402
+from services.inference.audit_store import AuditStore  # noqa: E402
+
+INTENTS = ("再来店動機付け", "離反防止", "単価向上", "新規獲得")
+STATES = ("来店頻度低下", "価格感度低", "限定感志向", "新商品関心", "口コミ影響")
+
+
+def _records(count: int, rng: random.Random) -> list[dict]:
+    """合成の監査ログを作る。"""
+    base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    records = []
+    for i in range(count):
+        failed = rng.random() < 0.1
+        record = {
+            "timestamp": (base + timedelta(seconds=i)).isoformat(),
+            "status": "failed" if failed else "success",
+            "intent": rng.choice(INTENTS),
+            "state": rng.sample(STATES, 3),
+        }
+        if failed:
+            record["issues"] = [rng.choice(["state不足", "confidence範囲外", "重複state"])]
+        else:
+            record["output_state"] = record["state"]
+        records.append(record)
+    return records
+
+
+def _scan(store: AuditStore, intent: str) -> tuple[int, int, list]:
+    """全件走査で intent の件数・失敗数・上位指摘を求める。"""
+    total = failed = 0
+    issues: Counter = Counter()
+    for record in store.records(copy=False):
+        if record["intent"] != intent:
+            continue
+        total += 1
+        if record["status"] != "success":
+            failed += 1
+            issues.update(record.get("issues", []))
+    return total, failed, issues.most_common(10)
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print("records   plain save/s  rollup save/s   scan ms  rollup total ms  rollup 24h ms")
+    for size in args.sizes:
+        records = _records(size, rng)
+
+        plain = AuditStore()
+        started = time.perf_counter()
+        for record in records:
+            plain.save(record)
+        plain_rate = size / (time.perf_counter() - started)
+
+        store = AuditStore()
+        rollup = AuditRollup(
+            RetentionPolicy(raw_seconds=None, minute_seconds=None, hour_seconds=None), state_labels=STATES
+        )
+        rollup.attach(store)
+        started = time.perf_counter()
+        for record in records:
+            store.save(record)
+        rollup_rate = size / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(args.queries):
+            expected = _scan(store, INTENTS[0])
+        scan_ms = (time.perf_counter() - started) * 1000 / args.queries
+
+        started = time.perf_counter()
+        for _ in range(args.queries):
+            stats = rollup.stats(intent=INTENTS[0])
+        total_ms = (time.perf_counter() - started) * 1000 / args.queries
+        assert (stats.total, stats.failed, list(stats.top_issues)) == expected
+
+        end = datetime.fromisoformat(records[-1]["timestamp"]).timestamp()
+        started = time.perf_counter()
+        for _ in range(args.queries):
+            rollup.stats("hour", since=end - 24 * 3600, until=end + 1, intent=INTENTS[0])
+        window_ms = (time.perf_counter() - started) * 1000 / args.queries
+
+        print(
+            f"{size:<9d}{plain_rate:14.0f}{rollup_rate:15.0f}"
+            f"{scan_ms:10.2f}{total_ms:17.3f}{window_ms:15.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""/convert 応答の JSON と MessagePack のサイズ・速度比較ベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 形式ごとの応答サイズとエンコード/デコード時間(標準出力)。
+制約:
+    - 応答は既定 Orchestrator の実出力を使う
+    - JSON は標準ライブラリ（C 拡張）、MessagePack は本リポジトリの実装で計測する
+
+Note:
+    - 実行例: python bench/bench_codec.py --iterations 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.api.codec import InternTable, MessagePackCodec  # noqa: E402
+from services.inference.contract_artifacts import load_contract  # noqa: E402
+from services.inference.orchestrator import Orchestrator  # noqa: E402
+
+
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _encode_json(payload: Any) -> bytes:
+    """比較用に応答を空白なしの JSON へエンコードする。"""
+    return _JSON_ENCODER.encode(payload).encode("utf-8")
+
+
+def _per_call_us(func: Callable[[], Any], iterations: int) -> float:
+    """1回あたりの所要マイクロ秒を返す。"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    output = Orchestrator().run("最近来店が減っている。値引きには反応しないが、限定感には反応する。")
+    contract = load_contract()
+    plain = MessagePackCodec()
+    interned = MessagePackCodec(InternTable.from_contract(contract.schema, contract.vocabulary))
+
+    formats = [
+        ("json", lambda: _encode_json(output), json.loads),
+        ("msgpack", lambda: plain.packb(output), plain.unpackb),
+        ("msgpack+intern", lambda: interned.packb(output), interned.unpackb),
+    ]
+    json_size = len(_encode_json(output))
+    print(f"{'format':<15} {'bytes':>6} {'ratio':>6} {'encode us':>10} {'decode us':>10}")
+    for name, encode, decode in formats:
+        data = encode()
+        encode_us = _per_call_us(encode, args.iterations)
+        decode_us = _per_call_us(lambda: decode(data), args.iterations)
+        print(f"{name:<15} {len(data):6d} {len(data) / json_size:6.2f} {encode_us:10.2f} {decode_us:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
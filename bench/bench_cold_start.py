@@ -0,0 +1,123 @@
+"""API のコールドスタート（import 時間・初回 /health 応答）を計測するベンチマークを提供する。
+
+入出力: コマンドライン引数 -> import プロファイル上位と初回応答時間(標準出力)。
+制約:
+    - 計測は毎回新しい Python プロセスで行い、import キャッシュの影響を受けない
+    - 初回 /health は ASGI アプリを直接呼び出し、HTTP サーバの起動時間は含めない
+
+Note:
+    - import プロファイルは python -X importtime の累積時間で集計する
+    - --target-ms を超えた場合は終了コード 1 を返し、CI の判定に使える
+    - 実行例: python bench/bench_cold_start.py --runs 5 --target-ms 1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+
+# 子プロセスで実行するコード: 起動直後から /health 応答完了までを計測する。
+FIRST_HEALTH_CODE = """
+import time
+started = time.perf_counter()
+import asyncio
+from services.api.main import app
+imported = time.perf_counter()
+
+async def call():
+    messages = []
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "path": "/health",
+             "raw_path": b"/health", "query_string": b"", "headers": [], "scheme": "http",
+             "server": ("bench", 80), "client": ("bench", 1), "root_path": ""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(call())
+done = time.perf_counter()
+print(f"{(imported - started) * 1000:.3f} {(done - started) * 1000:.3f} {status}")
+"""
+
+
+def _env(mode: str) -> dict[str, str]:
+    """子プロセス用の環境変数を返す。"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(SRC)
+    env["SAA_STARTUP_MODE"] = mode
+    return env
+
+
+def _import_profile(mode: str, top: int) -> list[tuple[float, str]]:
+    """python -X importtime の結果から累積時間の上位モジュールを返す。"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import services.api.main"],
+        env=_env(mode),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows: list[tuple[float, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative_us) / 1000, name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def _first_health(mode: str) -> tuple[float, float, int]:
+    """新規プロセスで import 時間と初回 /health 応答時間を計測する。"""
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_HEALTH_CODE],
+        env=_env(mode),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported_ms, health_ms, status = proc.stdout.split()
+    return float(imported_ms), float(health_ms), int(status)
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    print("import profile (cumulative ms, lazy mode)")
+    for cumulative_ms, name in _import_profile("lazy", args.top):
+        print(f"  {cumulative_ms:9.1f}  {name}")
+
+    exceeded = False
+    for mode in ("lazy", "eager"):
+        samples = [_first_health(mode) for _ in range(args.runs)]
+        import_ms = statistics.median(sample[0] for sample in samples)
+        health_ms = statistics.median(sample[1] for sample in samples)
+        verdict = "OK" if health_ms <= args.target_ms else "OVER"
+        exceeded |= mode == "lazy" and health_ms > args.target_ms
+        print(
+            f"{mode:<5} import={import_ms:8.1f} ms first /health={health_ms:8.1f} ms "
+            f"(target {args.target_ms:.0f} ms: {verdict})"
+        )
+
+    sys.exit(1 if exceeded else 0)
+
+
+if __name__ == "__main__":
+    main()
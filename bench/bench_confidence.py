@@ -0,0 +1,116 @@
+"""ConfidenceScorer のバッチサイズ別スループットと校正結果のベンチマークを提供する。
+
+入出力: コマンドライン引数 -> バッチサイズ別スループット・信頼度曲線(標準出力)。
+制約:
+    - 入力は契約語彙のラベル・別名と語彙外の文を混ぜた合成データとする
+    - 単件 score() の繰り返しとバッチ score_batch() を同じ入力で比較する
+
+Note:
+    - 実行例: python bench/bench_confidence.py --sizes 1 10 100 1000 10000
+    - 校正結果は合成の正誤ラベルに対する事前重みと fit() 後の重みの比較
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.inference.confidence import (  # noqa: E402
+    DEFAULT_MODEL,
+    ConfidenceModel,
+    ConfidenceScorer,
+    ScoringInput,
+    format_report,
+    reliability_curve,
+)
+from services.inference.contract_artifacts import load_contract  # noqa: E402
+from services.inference.state_canonicalizer import StateCanonicalizer  # noqa: E402
+
+
+def _inputs(vocabulary: dict, count: int, rng: random.Random) -> list[ScoringInput]:
+    """語彙内外の表現を混ぜた合成入力を作る。"""
+    surfaces = [
+        (entry["label"], text)
+        for entry in vocabulary["states"]
+        for text in [entry["label"], *entry.get("aliases", [])]
+    ]
+    labels = [entry["label"] for entry in vocabulary["states"]]
+    items = []
+    for i in range(count):
+        extracted, states = [], []
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.7:
+                label, text = rng.choice(surfaces)
+                extracted.append(text)
+                states.append(label)
+            else:
+                text = f"語彙外の表現{rng.randint(0, 999)}"
+                extracted.append(text)
+                states.append(text)
+        states += [label for label in labels if label not in states][: max(0, 3 - len(states))]
+        preference = frozenset(rng.sample(labels, 2)) if i % 2 else None
+        items.append(ScoringInput(extracted=extracted, states=states, preference_states=preference))
+    return items
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--labeled", type=int, default=20_000)
+    args = parser.parse_args()
+
+    contract = load_contract()
+    scorer = ConfidenceScorer(canonicalizer=StateCanonicalizer.from_vocabulary(contract.vocabulary))
+    rng = random.Random(0)
+
+    print("size     single/s      batch/s   features/s    predict/s")
+    for size in args.sizes:
+        items = _inputs(contract.vocabulary, size, rng)
+        scorer.score_batch(items)
+        single = batch = feature = predict = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for item in items:
+                scorer.score(item)
+            single = min(single, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            scorer.score_batch(items)
+            batch = min(batch, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            features = scorer.features_batch(items)
+            feature = min(feature, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            scorer.model.predict(features)
+            predict = min(predict, time.perf_counter() - started)
+        print(
+            f"{size:<6d}{size / single:12.0f}{size / batch:13.0f}"
+            f"{size / feature:13.0f}{size / predict:13.0f}"
+        )
+
+    items = _inputs(contract.vocabulary, args.labeled, rng)
+    features = scorer.features_batch(items)
+    truth = ConfidenceModel(weights=(2.5, 3.0, 0.8, 1.2), bias=-3.5)
+    outcomes = (np.random.default_rng(0).uniform(size=len(items)) < truth.predict(features)).astype(float)
+    split = len(items) // 2
+    fitted = ConfidenceModel.fit(features[:split], outcomes[:split])
+
+    print(f"\nprior weights (held-out {len(items) - split} items)")
+    print(format_report(reliability_curve(DEFAULT_MODEL.predict(features[split:]), outcomes[split:])))
+    print(f"\nfitted weights {[round(w, 2) for w in fitted.weights]} bias {fitted.bias:.2f}")
+    print(format_report(reliability_curve(fitted.predict(features[split:]), outcomes[split:])))
+
+
+if __name__ == "__main__":
+    main()
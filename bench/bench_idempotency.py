@@ -0,0 +1,77 @@
+"""Idempotency-Key 再送時の応答時間（保存済み参照 vs パイプライン再実行）のベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 保持件数別の予約・参照レイテンシ(標準出力)。
+制約:
+    - 保存先は一時ディレクトリの SQLite ファイル（WAL）とする
+    - 再実行側は既定構成の Orchestrator.run() とする
+
+Note:
+    - 実行例: python bench/bench_idempotency.py --sizes 1000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.api.idempotency import IdempotencyStore, fingerprint  # noqa: E402
+from services.inference.orchestrator import Orchestrator  # noqa: E402
+
+PRESET_INPUT = "最近来店が減っている。値引きには反応しないが、限定感には反応する。"
+
+
+def _percentiles(samples: list[float]) -> str:
+    """p50/p99 をマイクロ秒で整形する。"""
+    ordered = sorted(samples)
+    return f"{statistics.median(ordered) * 1e6:9.1f}{ordered[int(len(ordered) * 0.99)] * 1e6:9.1f}"
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    orchestrator = Orchestrator()
+    output = orchestrator.run(PRESET_INPUT)
+    body = fingerprint({"text": PRESET_INPUT})
+    samples = []
+    for _ in range(args.lookups // 10):
+        started = time.perf_counter()
+        orchestrator.run(PRESET_INPUT)
+        samples.append(time.perf_counter() - started)
+    print("                      p50 us   p99 us")
+    print(f"pipeline re-run     {_percentiles(samples)}")
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            store = IdempotencyStore(Path(tmp) / f"bench-{size}.sqlite3", purge_every=10**9)
+            reserve = []
+            for index in range(size):
+                started = time.perf_counter()
+                store.begin(f":key-{index}", body, "bench")
+                store.complete(f":key-{index}", output, "bench")
+                reserve.append(time.perf_counter() - started)
+
+            lookups = []
+            for _ in range(args.lookups):
+                key = f":key-{rng.randrange(size)}"
+                started = time.perf_counter()
+                store.begin(key, body, "bench")
+                lookups.append(time.perf_counter() - started)
+            print(f"store {size:>7d} first  {_percentiles(reserve)}")
+            print(f"store {size:>7d} replay {_percentiles(lookups)}")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""監査ログ再実行ハーネスのスループットベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 逐次・スレッド並列・プロセス並列の再実行速度(標準出力)。
+制約:
+    - 監査ログは既定 Orchestrator で生成した本番相当の record とする
+    - 各方式で同じ record 列を再実行し、差分がないことも確認する
+
+Note:
+    - Orchestrator は純 Python の CPU 処理が中心のため、並列化の効果はプロセス並列で現れる
+    - 実行例: python bench/bench_replay.py --records 20000 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.inference.audit_store import AuditStore  # noqa: E402
+from services.inference.orchestrator import Orchestrator  # noqa: E402
+from services.inference.replay import ReplayHarness  # noqa: E402
+
+INPUTS = [
+    "最近来店が減っている。値引きには反応しないが、限定感には反応する。",
+    "購入頻度が落ちている。新商品には関心がある。",
+    "問い合わせが増えている。解約を検討している。",
+]
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    store = AuditStore()
+    orchestrator = Orchestrator(audit_store=store)
+    started = time.perf_counter()
+    for index in range(args.records):
+        orchestrator.run(INPUTS[index % len(INPUTS)])
+    production = args.records / (time.perf_counter() - started)
+    records = list(store.records())
+    print(f"production (serial run) : {production:10.0f} rec/s")
+
+    for label, workers, processes in (
+        ("replay serial", 1, False),
+        (f"replay threads x{args.workers}", args.workers, False),
+        (f"replay processes x{args.workers}", args.workers, True),
+    ):
+        report = ReplayHarness(max_workers=workers, processes=processes).replay(records)
+        print(
+            f"{label:<24}: {report.throughput:10.0f} rec/s "
+            f"({report.throughput / production:.1f}x, drifted={report.drifted})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""RollbackExecutor の 10k ステップ故障注入ベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 各シナリオの所要時間(標準出力)。
+制約:
+    - 外部API は呼ばず、補償ハンドラは固定遅延のスタブとする
+    - ジャーナルは一時ディレクトリに作成し、実行後に削除する
+
+Note:
+    - シナリオ: 正常 Rollback / 補償途中クラッシュ→recover / 一部補償失敗
+    - 実行例: python bench/bench_rollback.py --steps 10000 --workers 16
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.bridge.rollback import (  # noqa: E402
+    AppliedStep,
+    RollbackExecutor,
+    RollbackJournal,
+)
+
+PRIMITIVES = ["segment_customers", "reserve_offer", "send_line_message"]
+
+
+class SimulatedCrash(Exception):
+    """補償途中のプロセス停止を模した例外。"""
+
+
+def _build_steps(count: int, fan_in: int, seed: int) -> list[AppliedStep]:
+    """直前の数ステップへ依存するランダムな DAG を生成する。"""
+    rng = random.Random(seed)
+    steps: list[AppliedStep] = []
+    for index in range(count):
+        deps: tuple[str, ...] = ()
+        if index:
+            width = rng.randint(0, fan_in)
+            deps = tuple(
+                sorted({f"s{rng.randrange(max(0, index - 64), index)}" for _ in range(width)})
+            )
+        steps.append(
+            AppliedStep(
+                step_id=f"s{index}",
+                primitive=PRIMITIVES[index % len(PRIMITIVES)],
+                input={"customer_id": index},
+                depends_on=deps,
+            )
+        )
+    return steps
+
+
+def _handlers(delay: float, fail_ids: set[str]) -> dict:
+    """遅延・故障注入付きの補償ハンドラを返す。"""
+
+    def handler(step: AppliedStep) -> None:
+        if step.step_id in fail_ids:
+            raise SimulatedCrash(step.step_id)
+        if delay:
+            time.sleep(delay)
+
+    return {"cancel_offer": handler, "cancel_line_message": handler, "release_segment": handler}
+
+
+def _apply(executor: RollbackExecutor, tx_id: str, steps: list[AppliedStep]) -> float:
+    """全ステップをジャーナルへ記録し所要秒数を返す。"""
+    started = time.perf_counter()
+    for step in steps:
+        executor.record_applied(tx_id, step)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--fan-in", type=int, default=2)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    parser.add_argument("--sync-every", type=int, default=64)
+    parser.add_argument("--fault-rate", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    steps = _build_steps(args.steps, args.fan_in, args.seed)
+    delay = args.delay_ms / 1000
+    rng = random.Random(args.seed)
+    faults = {step.step_id for step in steps if rng.random() < args.fault_rate}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # シナリオ1: 故障なしの Rollback。
+        journal = RollbackJournal(Path(tmp) / "clean.wal", sync_every=args.sync_every)
+        executor = RollbackExecutor(journal, _handlers(delay, set()), max_workers=args.workers)
+        apply_sec = _apply(executor, "tx", steps)
+        started = time.perf_counter()
+        result = executor.rollback("tx")
+        clean_sec = time.perf_counter() - started
+        journal.close()
+        print(f"journal apply     : {apply_sec * 1000:9.1f} ms ({args.steps} steps)")
+        print(f"rollback (clean)  : {clean_sec * 1000:9.1f} ms ok={result.ok}")
+
+        # シナリオ2: 補償途中で停止し、再起動後に recover する。
+        path = Path(tmp) / "crash.wal"
+        journal = RollbackJournal(path, sync_every=args.sync_every)
+        executor = RollbackExecutor(journal, _handlers(delay, faults), max_workers=args.workers)
+        _apply(executor, "tx", steps)
+        started = time.perf_counter()
+        partial = executor.rollback("tx")
+        crash_sec = time.perf_counter() - started
+        journal.close()
+
+        started = time.perf_counter()
+        restarted = RollbackExecutor(
+            RollbackJournal(path, sync_every=args.sync_every),
+            _handlers(delay, set()),
+            max_workers=args.workers,
+        )
+        reopen_sec = time.perf_counter() - started
+        started = time.perf_counter()
+        recovered = restarted.recover()
+        recover_sec = time.perf_counter() - started
+        restarted.journal.close()
+        print(
+            f"rollback (faulty) : {crash_sec * 1000:9.1f} ms "
+            f"compensated={len(partial.compensated)} failed={len(partial.failed)} "
+            f"blocked={len(partial.blocked)}"
+        )
+        print(f"journal reopen    : {reopen_sec * 1000:9.1f} ms")
+        print(
+            f"recover           : {recover_sec * 1000:9.1f} ms "
+            f"ok={all(item.ok for item in recovered)} "
+            f"compensated={sum(len(item.compensated) for item in recovered)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""SegmentEngine の 10M 顧客セグメント評価ベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 起動・評価の所要時間(標準出力)。
+制約:
+    - 顧客属性は乱数で生成し、一時ディレクトリへ .npy として書き出す
+    - 行ごとの Python ループは先頭 --loop-sample 件のみ計測し全件へ外挿する
+
+Note:
+    - open は memory map のみで、列本体の読み込みを伴わないことを確認する
+    - 実行例: python bench/bench_segment_engine.py --customers 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.bridge.segment_engine import CustomerColumns, SegmentEngine  # noqa: E402
+
+VISIT_DECLINE = {
+    "all": [
+        {"column": "days_since_last_visit", "op": ">=", "value": 30},
+        {"column": "visit_count", "op": "<=", "value": 3},
+        {"not": {"column": "coupon_used", "op": "==", "value": 1}},
+    ]
+}
+
+
+def _synthetic(customers: int) -> CustomerColumns:
+    """乱数の顧客属性列を生成する。"""
+    rng = np.random.default_rng(0)
+    return CustomerColumns(
+        {
+            "days_since_last_visit": rng.integers(0, 365, customers, dtype=np.int16),
+            "visit_count": rng.poisson(4, customers).astype(np.int32),
+            "coupon_used": (rng.random(customers) < 0.3).astype(np.int8),
+        },
+        version="bench",
+    )
+
+
+def _ms(started: float) -> float:
+    """開始時刻からの経過ミリ秒を返す。"""
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=10_000_000)
+    parser.add_argument("--loop-sample", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        _synthetic(args.customers).write(Path(tmp) / "customers")
+        print(f"generate + write  : {_ms(started):9.1f} ms ({args.customers} customers)")
+
+        started = time.perf_counter()
+        columns = CustomerColumns.open(Path(tmp) / "customers")
+        print(f"open (mmap)       : {_ms(started):9.1f} ms")
+
+        engine = SegmentEngine(columns)
+        started = time.perf_counter()
+        segment = engine.segment_customers(VISIT_DECLINE)
+        print(f"segment (cold)    : {_ms(started):9.1f} ms count={segment.count}")
+
+        started = time.perf_counter()
+        engine.segment_customers(VISIT_DECLINE)
+        print(f"segment (cached)  : {_ms(started):9.3f} ms")
+
+        coupon = engine.segment_customers({"column": "coupon_used", "op": "==", "value": 1})
+        started = time.perf_counter()
+        combined = segment | coupon
+        print(f"bitmap union      : {_ms(started):9.1f} ms count={combined.count}")
+
+        sample = min(args.loop_sample, args.customers)
+        days = columns.columns["days_since_last_visit"][:sample].tolist()
+        visits = columns.columns["visit_count"][:sample].tolist()
+        coupons = columns.columns["coupon_used"][:sample].tolist()
+        started = time.perf_counter()
+        [
+            i
+            for i in range(sample)
+            if days[i] >= 30 and visits[i] <= 3 and coupons[i] != 1
+        ]
+        loop_ms = _ms(started) * args.customers / sample
+        print(f"row loop (extrap.): {loop_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
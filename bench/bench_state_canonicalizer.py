@@ -0,0 +1,92 @@
+"""StateCanonicalizer の 100k 語彙照合ベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 索引構築時間と照合レイテンシ(標準出力)。
+制約:
+    - 語彙は実語彙の語片を組み合わせた合成文字列で生成する
+    - クエリは語彙の一部を編集（接頭辞追加・1文字置換）した近似表記とする
+
+Note:
+    - 比較対象として全件 Jaccard 比較の所要時間を少数クエリで計測する
+    - 実行例: python bench/bench_state_canonicalizer.py --vocabulary 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.inference.state_canonicalizer import StateCanonicalizer, _jaccard  # noqa: E402
+
+SUBJECTS = ["来店", "購買", "問い合わせ", "解約", "新商品", "限定品", "クーポン", "会員", "イベント", "LINE"]
+VERBS = ["が減っている", "が増えている", "に反応する", "に反応しない", "を検討している", "に関心がある"]
+PREFIXES = ["最近", "直近", "ここ数か月", "以前より", "急に"]
+
+
+def _vocabulary(size: int, rng: random.Random) -> list[str]:
+    """重複のない合成語彙を生成する。"""
+    labels: set[str] = set()
+    while len(labels) < size:
+        labels.add(
+            f"{rng.choice(PREFIXES)}{rng.choice(SUBJECTS)}{rng.choice(VERBS)}"
+            f"{rng.randrange(10**6):06d}"
+        )
+    return sorted(labels)
+
+
+def _perturb(label: str, rng: random.Random) -> str:
+    """語彙を近似表記へ編集する。"""
+    chars = list(label)
+    chars[rng.randrange(len(chars))] = "・"
+    return rng.choice(["", "とても"]) + "".join(chars)
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vocabulary", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = _vocabulary(args.vocabulary, rng)
+
+    started = time.perf_counter()
+    canonicalizer = StateCanonicalizer(vocabulary, threshold=args.threshold)
+    print(f"build index       : {(time.perf_counter() - started):9.2f} s ({len(canonicalizer)} entries)")
+
+    targets = [rng.choice(vocabulary) for _ in range(args.queries)]
+    queries = [_perturb(target, rng) for target in targets]
+    latencies: list[float] = []
+    hits = 0
+    for query, target in zip(queries, targets):
+        started = time.perf_counter()
+        match = canonicalizer.lookup(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += match is not None and match.label == target
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"lookup (LSH)      : p50={statistics.median(latencies):.3f} ms p99={p99:.3f} ms "
+        f"recall={hits / len(queries):.3f}"
+    )
+
+    # 全件比較は遅いため少数クエリのみ計測する。
+    sample = queries[:5]
+    started = time.perf_counter()
+    for query in sample:
+        grams = canonicalizer._ngrams(query)
+        max(_jaccard(grams, other) for other in canonicalizer._grams)
+    brute_ms = (time.perf_counter() - started) * 1000 / len(sample)
+    print(f"lookup (brute)    : {brute_ms:9.1f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""テナント別 Orchestrator プールの構築時間とヒット時レイテンシのベンチマークを提供する。
+
+入出力: コマンドライン引数 -> 構築時間・参照レイテンシ・ヒット率(標準出力)。
+制約:
+    - テナント設定は共通語彙を使い、intent・補助 state のみを変えた合成設定とする
+    - 参照は少数の人気テナントに偏る Zipf 分布で発生させる
+
+Note:
+    - 実行例: python bench/bench_tenant_pool.py --tenants 500 --capacity 128
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.api.tenants import TenantConfig, TenantPool  # noqa: E402
+from services.inference.contract_artifacts import load_contract  # noqa: E402
+from services.inference.orchestrator import Orchestrator  # noqa: E402
+from services.inference.state_canonicalizer import StateCanonicalizer  # noqa: E402
+from services.inference.validator import Validator  # noqa: E402
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=128)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    contract = load_contract()
+    labels = [entry["label"] for entry in contract.vocabulary["states"]]
+
+    def source(tenant_id: str) -> TenantConfig:
+        index = int(tenant_id.removeprefix("t"))
+        fallback = [labels[(index + offset) % len(labels)] for offset in range(3)]
+        return TenantConfig.from_dict(
+            tenant_id, {"intent": f"intent-{index}", "fallback_states": fallback}, contract.vocabulary
+        )
+
+    def factory(config: TenantConfig) -> Orchestrator:
+        return Orchestrator(
+            validator=Validator(schema_check=contract.validate),
+            canonicalizer=StateCanonicalizer.from_vocabulary(config.vocabulary),
+            template=config.template,
+            tenant_id=config.tenant_id,
+        )
+
+    pool = TenantPool(source, factory, capacity=args.capacity)
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(args.tenants)]
+    tenants = rng.choices([f"t{i}" for i in range(args.tenants)], weights=weights, k=args.requests)
+
+    latencies: list[float] = []
+    for tenant_id in tenants:
+        started = time.perf_counter()
+        pool.get(tenant_id).run("最近来店が減っている。値引きには反応しない。")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    metrics = pool.metrics().to_dict()
+    latencies.sort()
+    print(f"requests          : {args.requests} over {args.tenants} tenants (capacity {args.capacity})")
+    print(f"hit rate          : {metrics['hit_rate']:9.3f} (evictions {metrics['evictions']})")
+    print(f"build             : avg {metrics['build_ms_avg']:.2f} ms, max {metrics['build_ms_max']:.2f} ms")
+    print(
+        f"request latency   : p50 {statistics.median(latencies):.3f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
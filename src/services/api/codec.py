@@ -0,0 +1,397 @@
+"""/convert 応答の JSON / MessagePack エンコードと Accept ヘッダによる形式選択を提供する。
+
+入出力: 応答 dict + Accept ヘッダ -> (本文 bytes, media type) / MessagePack bytes -> dict。
+制約:
+    - MessagePack は仕様のうち本 API で使う型（nil/bool/int/float64/str/bin/array/map）のみを扱う
+    - 語彙IDへの置換（intern）は専用 media type を要求された場合のみ行い、通常の MessagePack は汎用ライブラリで読める
+    - intern 表は state_intent.schema.json のキーと state 語彙から決定的に構築し、version で同一性を確認する
+
+Note:
+    - intern された文字列は ext 型 INTERN_EXT_TYPE（値は表の添字、1 または 2 バイトの符号なし整数）で表す
+    - 表にない文字列は通常の str として送るため、語彙外の state も欠落しない
+    - 表の内容は GET /contracts/intern-table で取得し、応答ヘッダ X-Intern-Version と照合する
+    - 文字列の符号化キャッシュは STR_CACHE_MAX_CHARS 文字以下の文字列を str_cache_size 件まで保持する
+      （入力文・trace_id のような長い一度きりの文字列でメモリを使わない）
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import struct
+from typing import Any, Iterable
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+INTERNED_MEDIA_TYPE = "application/vnd.saa.interned+msgpack"
+SUPPORTED_MEDIA_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, INTERNED_MEDIA_TYPE)
+
+INTERN_EXT_TYPE = 1
+STR_CACHE_MAX_CHARS = 64
+
+_PACK_DOUBLE = struct.Struct(">Bd").pack
+
+
+class CodecError(Exception):
+    """エンコード・デコードの失敗を表す例外。"""
+
+
+@dataclass(frozen=True)
+class InternTable:
+    """文字列と語彙IDの対応表を表すデータ。
+
+    Note:
+        - strings の添字が ID となる（先頭から順に 0, 1, ...）
+    """
+
+    strings: tuple[str, ...]
+    version: str
+
+    @classmethod
+    def build(cls, strings: Iterable[str]) -> InternTable:
+        """重複を除いた文字列列から表を構築する。
+
+        Args:
+            strings: 登録する文字列（出現順に ID を割り当てる）
+
+        Returns:
+            InternTable: 構築済みの表
+
+        Raises:
+            CodecError: 登録数が 65536 を超える場合
+        """
+        unique = tuple(dict.fromkeys(strings))
+        if len(unique) > 0x10000:
+            raise CodecError("intern table must not exceed 65536 entries")
+        digest = hashlib.sha256("\n".join(unique).encode("utf-8")).hexdigest()[:12]
+        return cls(strings=unique, version=digest)
+
+    @classmethod
+    def from_contract(cls, schema: dict[str, Any], vocabulary: dict[str, Any]) -> InternTable:
+        """スキーマのプロパティ名と語彙（state・intent・next_actions・action）から構築する。
+
+        Args:
+            schema: state_intent スキーマ
+            vocabulary: state_vocabulary.json 形式の語彙辞書
+
+        Returns:
+            InternTable: 構築済みの表
+        """
+        strings: list[str] = []
+        _collect_property_names(schema, strings)
+        strings += [str(entry["label"]) for entry in vocabulary.get("states") or []]
+        strings += [str(intent) for intent in vocabulary.get("intents") or []]
+        strings += [str(action) for action in vocabulary.get("next_actions") or []]
+        for binding in vocabulary.get("actions") or []:
+            strings += [str(binding["action"]), str(binding["api"])]
+        return cls.build(strings)
+
+    def ids(self) -> dict[str, int]:
+        """文字列から ID への辞書を返す。"""
+        return {text: index for index, text in enumerate(self.strings)}
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON 化可能な辞書を返す。"""
+        return {"version": self.version, "strings": list(self.strings)}
+
+
+class MessagePackCodec:
+    """MessagePack のエンコーダ・デコーダ（intern 表は任意）。"""
+
+    def __init__(self, intern: InternTable | None = None, str_cache_size: int = 4096) -> None:
+        """コーデックを初期化する。
+
+        Args:
+            intern: 語彙IDへの置換に使う表（None で置換しない）
+            str_cache_size: 符号化結果をキャッシュする文字列数の上限（0 で無効）
+        """
+        self.intern = intern
+        self.str_cache_size = str_cache_size
+        self._ids = intern.ids() if intern is not None else {}
+        # 文字列ごとの符号化結果をキャッシュし、語彙の再符号化を省く。
+        self._str_cache: dict[str, bytes] = {}
+
+    def packb(self, obj: Any) -> bytes:
+        """値を MessagePack へエンコードする。
+
+        Args:
+            obj: エンコード対象
+
+        Returns:
+            bytes: MessagePack バイト列
+
+        Raises:
+            CodecError: 未対応の型を含む場合
+        """
+        out = bytearray()
+        self._pack(obj, out)
+        return bytes(out)
+
+    def unpackb(self, data: bytes) -> Any:
+        """MessagePack をデコードする。
+
+        Args:
+            data: MessagePack バイト列
+
+        Returns:
+            Any: デコード結果
+
+        Raises:
+            CodecError: 不正・未対応のバイト列の場合
+        """
+        data = bytes(data)
+        try:
+            value, offset = self._unpack(data, 0)
+        except (IndexError, struct.error, UnicodeDecodeError) as exc:
+            raise CodecError("truncated or malformed msgpack data") from exc
+        if offset != len(data):
+            raise CodecError("trailing bytes after msgpack value")
+        return value
+
+    def _pack(self, obj: Any, out: bytearray) -> None:
+        """値1つを out へ追記する。"""
+        if isinstance(obj, str):
+            cached = self._str_cache.get(obj)
+            if cached is None:
+                cached = self._pack_str(obj)
+                if 0 < self.str_cache_size and len(obj) <= STR_CACHE_MAX_CHARS:
+                    # 上限に達したら作り直し、一度きりの文字列が枠を占有し続けないようにする。
+                    if len(self._str_cache) >= self.str_cache_size:
+                        self._str_cache.clear()
+                    self._str_cache[obj] = cached
+            out += cached
+        elif obj is None:
+            out.append(0xC0)
+        elif obj is True:
+            out.append(0xC3)
+        elif obj is False:
+            out.append(0xC2)
+        elif isinstance(obj, int):
+            _pack_int(obj, out)
+        elif isinstance(obj, float):
+            out += _PACK_DOUBLE(0xCB, obj)
+        elif isinstance(obj, dict):
+            _pack_length(len(obj), 0x80, 0xDE, out)
+            for key, value in obj.items():
+                self._pack(key, out)
+                self._pack(value, out)
+        elif isinstance(obj, (list, tuple)):
+            _pack_length(len(obj), 0x90, 0xDC, out)
+            for item in obj:
+                self._pack(item, out)
+        elif isinstance(obj, (bytes, bytearray)):
+            size = len(obj)
+            if size < 0x100:
+                out += bytes((0xC4, size))
+            elif size < 0x10000:
+                out += b"\xc5" + size.to_bytes(2, "big")
+            else:
+                out += b"\xc6" + size.to_bytes(4, "big")
+            out += obj
+        else:
+            raise CodecError(f"unsupported type: {type(obj).__name__}")
+
+    def _pack_str(self, text: str) -> bytes:
+        """文字列を intern ID または str として符号化する。"""
+        index = self._ids.get(text)
+        if index is not None:
+            if index < 0x100:
+                return bytes((0xD4, INTERN_EXT_TYPE, index))
+            return bytes((0xD5, INTERN_EXT_TYPE)) + index.to_bytes(2, "big")
+        raw = text.encode("utf-8")
+        size = len(raw)
+        if size < 32:
+            return bytes((0xA0 | size,)) + raw
+        if size < 0x100:
+            return bytes((0xD9, size)) + raw
+        if size < 0x10000:
+            return b"\xda" + size.to_bytes(2, "big") + raw
+        return b"\xdb" + size.to_bytes(4, "big") + raw
+
+    def _unpack(self, data: bytes, offset: int) -> tuple[Any, int]:
+        """offset から値1つを読み、値と次の位置を返す。"""
+        code = data[offset]
+        offset += 1
+        # state-intent 応答で頻出する型（fixstr・intern・fixarray・fixmap）から判定する。
+        if 0xA0 <= code <= 0xBF:
+            end = offset + (code & 0x1F)
+            if end > len(data):
+                raise CodecError("truncated msgpack data")
+            return data[offset:end].decode("utf-8"), end
+        if code == 0xD4:
+            return self._resolve(data[offset], data[offset + 1]), offset + 2
+        if 0x90 <= code <= 0x9F:
+            return self._unpack_array(data, offset, code & 0x0F)
+        if 0x80 <= code <= 0x8F:
+            return self._unpack_map(data, offset, code & 0x0F)
+        if code <= 0x7F:
+            return code, offset
+        if code >= 0xE0:
+            return code - 0x100, offset
+        if code == 0xC0:
+            return None, offset
+        if code == 0xC2:
+            return False, offset
+        if code == 0xC3:
+            return True, offset
+        if code in _FIXED_FORMATS:
+            fmt = _FIXED_FORMATS[code]
+            return fmt.unpack_from(data, offset)[0], offset + fmt.size
+        if code in _LENGTH_WIDTH:
+            width = _LENGTH_WIDTH[code]
+            size = int.from_bytes(data[offset : offset + width], "big")
+            start = offset + width
+            end = start + size
+            if end > len(data):
+                raise CodecError("truncated msgpack data")
+            chunk = data[start:end]
+            return (chunk.decode("utf-8") if code >= 0xD9 else chunk), end
+        if code in (0xDC, 0xDD):
+            width = 2 if code == 0xDC else 4
+            size = int.from_bytes(data[offset : offset + width], "big")
+            return self._unpack_array(data, offset + width, size)
+        if code in (0xDE, 0xDF):
+            width = 2 if code == 0xDE else 4
+            size = int.from_bytes(data[offset : offset + width], "big")
+            return self._unpack_map(data, offset + width, size)
+        if code == 0xD5:
+            return self._resolve(data[offset], int.from_bytes(data[offset + 1 : offset + 3], "big")), offset + 3
+        raise CodecError(f"unsupported msgpack type byte: 0x{code:02x}")
+
+    def _unpack_array(self, data: bytes, offset: int, size: int) -> tuple[list[Any], int]:
+        """配列要素を size 個読む。"""
+        items = []
+        for _ in range(size):
+            item, offset = self._unpack(data, offset)
+            items.append(item)
+        return items, offset
+
+    def _unpack_map(self, data: bytes, offset: int, size: int) -> tuple[dict[Any, Any], int]:
+        """マップ要素を size 組読む。"""
+        result = {}
+        for _ in range(size):
+            key, offset = self._unpack(data, offset)
+            value, offset = self._unpack(data, offset)
+            result[key] = value
+        return result, offset
+
+    def _resolve(self, ext_type: int, index: int) -> str:
+        """intern ID を文字列へ戻す。"""
+        if ext_type != INTERN_EXT_TYPE:
+            raise CodecError(f"unsupported ext type: {ext_type}")
+        if self.intern is None or index >= len(self.intern.strings):
+            raise CodecError(f"unknown intern id: {index}")
+        return self.intern.strings[index]
+
+
+def negotiate(accept: str | None, supported: Iterable[str] = SUPPORTED_MEDIA_TYPES) -> str | None:
+    """Accept ヘッダから応答の media type を選ぶ。
+
+    Args:
+        accept: Accept ヘッダ値（None・空文字は JSON）
+        supported: 対応する media type（先頭ほど同順位時に優先する）
+
+    Returns:
+        str | None: 選択した media type（対応形式がない場合は None）
+
+    Note:
+        - 各対応形式の q 値は、一致する media range のうち最も具体的なもの
+          （完全一致 > type/* > */*）から取る
+        - q=0 の形式は受け付けないものとして除き、残りから q 値の高いものを選ぶ
+    """
+    candidates = list(supported)
+    if not accept or not accept.strip():
+        return candidates[0]
+
+    ranges: dict[str, float] = {}
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type:
+            ranges[media_type] = max(ranges.get(media_type, 0.0), _quality(params))
+
+    best: tuple[float, int] | None = None
+    chosen: str | None = None
+    for rank, candidate in enumerate(candidates):
+        for media_range in (candidate, candidate.split("/", 1)[0] + "/*", "*/*"):
+            if media_range in ranges:
+                quality = ranges[media_range]
+                break
+        else:
+            continue
+        if quality <= 0:
+            continue
+        key = (quality, -rank)
+        if best is None or key > best:
+            best, chosen = key, candidate
+    return chosen
+
+
+def _quality(params: str) -> float:
+    """media range のパラメータから q 値を返す（不正値は 0）。"""
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    """整数を最小幅で符号化する。"""
+    if 0 <= value <= 0x7F:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xFF)
+    elif value >= 0:
+        for code, width in ((0xCC, 1), (0xCD, 2), (0xCE, 4), (0xCF, 8)):
+            if value < 1 << (8 * width):
+                out.append(code)
+                out += value.to_bytes(width, "big")
+                return
+        raise CodecError("integer out of msgpack range")
+    else:
+        for code, width in ((0xD0, 1), (0xD1, 2), (0xD2, 4), (0xD3, 8)):
+            if value >= -(1 << (8 * width - 1)):
+                out.append(code)
+                out += value.to_bytes(width, "big", signed=True)
+                return
+        raise CodecError("integer out of msgpack range")
+
+
+def _pack_length(size: int, fix_base: int, code16: int, out: bytearray) -> None:
+    """配列・マップの要素数ヘッダを符号化する。"""
+    if size < 16:
+        out.append(fix_base | size)
+    elif size < 0x10000:
+        out.append(code16)
+        out += size.to_bytes(2, "big")
+    else:
+        out.append(code16 + 1)
+        out += size.to_bytes(4, "big")
+
+
+def _collect_property_names(schema: dict[str, Any], names: list[str]) -> None:
+    """スキーマ中のプロパティ名を出現順に集める。"""
+    for name, child in (schema.get("properties") or {}).items():
+        names.append(name)
+        _collect_property_names(child, names)
+    if isinstance(schema.get("items"), dict):
+        _collect_property_names(schema["items"], names)
+
+
+_FIXED_FORMATS = {
+    0xCA: struct.Struct(">f"),
+    0xCB: struct.Struct(">d"),
+    0xCC: struct.Struct(">B"),
+    0xCD: struct.Struct(">H"),
+    0xCE: struct.Struct(">I"),
+    0xCF: struct.Struct(">Q"),
+    0xD0: struct.Struct(">b"),
+    0xD1: struct.Struct(">h"),
+    0xD2: struct.Struct(">i"),
+    0xD3: struct.Struct(">q"),
+}
+_LENGTH_WIDTH = {0xD9: 1, 0xDA: 2, 0xDB: 4, 0xC4: 1, 0xC5: 2, 0xC6: 4}
@@ -0,0 +1,209 @@
+"""Idempotency-Key ごとに最初の変換結果を保持する IdempotencyStore を提供する。
+
+入出力: (キー, 本文の指紋) -> 保存済み応答(dict) / 未処理の予約 / 衝突(例外)。
+制約:
+    - 保存先は SQLite ファイルとし、同じパスを開いた複数ワーカー間で共有する
+    - 応答は保存から ttl_seconds 経過で失効し、同じキーを新規扱いにする
+    - 同じキーで本文が異なる場合、または先行リクエストが処理中の場合は IdempotencyConflict を送出する
+
+Note:
+    - 処理中の予約は lease_seconds で失効し、処理中に落ちたワーカーのキーを再利用可能にする
+    - 予約には呼び出し側の owner トークンを記録し、complete()/release() は自分の予約にのみ作用する
+      （lease 失効後に再送が取り直した予約を、先行リクエストが上書き・削除しない）
+    - 保存するのは成功時の Generator 出力のみで、失敗時は release() で予約を取り消す
+    - 参照はキーの主キー索引で1回引くのみとし、失効行の削除は purge_every 回に1回まとめて行う
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    response TEXT,
+    expires_at REAL NOT NULL,
+    owner TEXT
+) WITHOUT ROWID
+"""
+
+
+class IdempotencyError(Exception):
+    """Idempotency-Key が不正な場合に送出する例外。"""
+
+
+class IdempotencyConflict(IdempotencyError):
+    """同じキーの本文不一致・処理中を表す例外。"""
+
+
+def fingerprint(body: dict[str, Any]) -> str:
+    """リクエスト本文の指紋を返す。
+
+    Args:
+        body: リクエスト本文
+
+    Returns:
+        str: キー順に依存しない SHA-256 の16進表現
+    """
+    canonical = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Idempotency-Key と応答を SQLite に TTL 付きで保持するクラス。"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_seconds: float = 24 * 3600,
+        lease_seconds: float = 60.0,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """IdempotencyStore を初期化し、テーブルがなければ作成する。
+
+        Args:
+            path: SQLite ファイルのパス（":memory:" はプロセス内のみ）
+            ttl_seconds: 応答を保持する秒数
+            lease_seconds: 処理中の予約を保持する秒数
+            purge_every: 失効行をまとめて削除する予約回数の間隔
+            clock: 現在時刻（UNIX 秒）を返す関数
+        """
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.purge_every = purge_every
+        self.clock = clock
+        self._reservations = 0
+        self._lock = threading.Lock()
+        # 複数ワーカーの同時書き込みを待ち合わせるため、ロック待ちの上限を長めに取る。
+        self._conn = sqlite3.connect(
+            self.path, timeout=10.0, isolation_level=None, check_same_thread=False
+        )
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        # owner 列の追加前に作られたファイルも同じパスのまま使えるようにする。
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(idempotency)")}
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE idempotency ADD COLUMN owner TEXT")
+
+    def begin(self, key: str, body_fingerprint: str, owner: str) -> dict[str, Any] | None:
+        """キーを予約し、処理済みなら保存済みの応答を返す。
+
+        Args:
+            key: Idempotency-Key（テナント等で名前空間を付けたもの）
+            body_fingerprint: fingerprint() で求めた本文の指紋
+            owner: 予約の所有者を表すリクエストごとに一意なトークン（complete()/release() に渡す）
+
+        Returns:
+            dict[str, Any] | None: 保存済みの応答（None の場合は予約済みのため処理して complete() する）
+
+        Raises:
+            IdempotencyError: キーが空・長すぎる場合
+            IdempotencyConflict: 本文が異なる・先行リクエストが処理中の場合
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyError(f"idempotency key must be 1-{MAX_KEY_LENGTH} characters")
+
+        now = self.clock()
+        due = False
+        with self._lock:
+            # 予約の判定と書き込みを1トランザクションで行い、ワーカー間の二重予約を防ぐ。
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, response, expires_at FROM idempotency WHERE key = ?", (key,)
+                ).fetchone()
+                reserved = row is None or row[2] <= now
+                if reserved:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO idempotency (key, fingerprint, response, expires_at, owner)"
+                        " VALUES (?, ?, NULL, ?, ?)",
+                        (key, body_fingerprint, now + self.lease_seconds, owner),
+                    )
+                    self._reservations += 1
+                    due = self._reservations % self.purge_every == 0
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if reserved:
+            if due:
+                self.purge(now)
+            return None
+        stored_fingerprint, response, _ = row
+        if stored_fingerprint != body_fingerprint:
+            raise IdempotencyConflict("idempotency key reused with a different request body")
+        if response is None:
+            raise IdempotencyConflict("a request with this idempotency key is in progress")
+        return json.loads(response)
+
+    def complete(self, key: str, response: dict[str, Any], owner: str) -> bool:
+        """予約済みのキーへ応答を保存する。
+
+        Args:
+            key: begin() で予約したキー
+            response: 保存する応答（JSON 化可能であること）
+            owner: begin() に渡した owner トークン
+
+        Returns:
+            bool: 保存した場合 True（lease 失効後に別リクエストが予約を取り直していた場合 False）
+        """
+        payload = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE idempotency SET response = ?, expires_at = ?"
+                " WHERE key = ? AND owner = ? AND response IS NULL",
+                (payload, self.clock() + self.ttl_seconds, key, owner),
+            )
+        return cursor.rowcount > 0
+
+    def release(self, key: str, owner: str) -> None:
+        """処理に失敗した予約を取り消し、同じキーで再実行できるようにする。
+
+        Args:
+            key: begin() で予約したキー
+            owner: begin() に渡した owner トークン（他のリクエストの予約は取り消さない）
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM idempotency WHERE key = ? AND owner = ? AND response IS NULL", (key, owner)
+            )
+
+    def purge(self, now: float | None = None) -> int:
+        """失効した予約・応答を削除する。
+
+        Args:
+            now: 基準時刻の UNIX 秒（未指定時は clock()）
+
+        Returns:
+            int: 削除した件数
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        """保持中（失効済みで未削除のものを含む）の件数を返す。"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM idempotency").fetchone()[0]
+
+    def close(self) -> None:
+        """接続を閉じる。"""
+        with self._lock:
+            self._conn.close()
@@ -8,17 +8,230 @@
 Note:
     - /convert は Orchestrator を経由して Reader->Validator->Generator を実行する
     - 失敗時レスポンスは業務詳細を漏らさない最小情報に留める
+    - SAA_STARTUP_MODE=lazy（既定）では Orchestrator と契約を初回 /convert 時に構築する
+    - SAA_STARTUP_MODE=eager では import 時に構築し、初回リクエストの遅延をなくす
+    - SAA_STATE_SIMILARITY で state 語彙照合の類似度閾値を変更できる（既定 0.75）
+    - SAA_PROFILE_SAMPLE_RATE / SAA_PROFILE_TOKEN で /convert のプロファイル取得を有効化する（既定は無効）
+    - 取得したプロファイルは GET /debug/profiles/{trace_id} で collapsed stacks として取得する
+    - /convert は Accept に応じて JSON / MessagePack / 語彙ID付き MessagePack で応答する
+    - GET /audit/export は SAA_AUDIT_EXPORT_TOKEN 設定時のみ公開し、監査ログを gzip NDJSON で返す
+      （cursor が保持期間切れで破棄済みの位置を指す場合は 410 を返す）
+    - X-Tenant-ID 付きの /convert は SAA_TENANTS_DIR のテナント設定で構築した Orchestrator で処理する
+    - テナント別 Orchestrator は SAA_TENANT_POOL_SIZE（既定 128）件まで LRU で保持し、監査ログは共有する
+    - SAA_CONFIDENCE_MODEL で校正済みの confidence モデル（JSON）を読み込む（未設定時は事前重み）
+    - POST /convert/batch は SAA_BATCH_MAX_ITEMS（既定 1000）件までをまとめて変換し、入力順に結果を返す
+    - GET /audit/stats は保存時に差分更新した分・時間集計から成功率・Validator 指摘・state 分布を返す
+      （/audit/export と同じ SAA_AUDIT_EXPORT_TOKEN で保護する）
+    - GET /tenants/metrics も SAA_AUDIT_EXPORT_TOKEN で保護する
+    - 監査ログは SAA_AUDIT_RAW_RETENTION 秒（既定 24 時間）を過ぎると集計のみ残して破棄する
+    - Idempotency-Key 付きの /convert は最初の変換結果を SAA_IDEMPOTENCY_DB（SQLite）に
+      SAA_IDEMPOTENCY_TTL 秒（既定 24 時間）保持し、再送には再実行せず同じ結果を返す
+    - SAA_IDEMPOTENCY_DB 未設定時は一時ディレクトリに保存し、初回利用時に警告ログを出す
 """
 
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import functools
+import hmac
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import uuid
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
+from services.api.codec import (
+    INTERNED_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    SUPPORTED_MEDIA_TYPES,
+    InternTable,
+    MessagePackCodec,
+    negotiate,
+)
+from services.api.idempotency import (
+    IDEMPOTENCY_HEADER,
+    REPLAYED_HEADER,
+    IdempotencyConflict,
+    IdempotencyError,
+    IdempotencyStore,
+    fingerprint,
+)
+from services.api.profiling import ProfiledError, RequestProfiler
+from services.api.tenants import DirectoryTenantSource, TenantConfig, TenantError, TenantPool
+from services.inference.audit_export import (
+    AuditCursorExpiredError,
+    AuditExportError,
+    ExportFilter,
+    iter_ndjson_gzip,
+    plan_page,
+)
+from services.inference.audit_rollup import AuditRollup, RollupError, parse_time, retention_from_env
+from services.inference.confidence import DEFAULT_MODEL, ConfidenceModel
+from services.inference.contract_artifacts import load_contract
+from services.inference.factory import build_orchestrator
 from services.inference.orchestrator import MaxRetryError, Orchestrator
 
 app = FastAPI(title="subjective-agent-architecture", version="0.1.0")
-orchestrator = Orchestrator()
+
+logger = logging.getLogger(__name__)
+
+_orchestrator: Orchestrator | None = None
+_orchestrator_lock = threading.Lock()
+
+profiler = RequestProfiler(
+    sample_rate=float(os.environ.get("SAA_PROFILE_SAMPLE_RATE") or 0),
+    token=os.environ.get("SAA_PROFILE_TOKEN"),
+    capacity=int(os.environ.get("SAA_PROFILE_CAPACITY") or 64),
+)
+
+audit_export_token = os.environ.get("SAA_AUDIT_EXPORT_TOKEN") or None
+
+batch_max_items = int(os.environ.get("SAA_BATCH_MAX_ITEMS") or 1000)
+
+TENANT_HEADER = "x-tenant-id"
+
+audit_rollup = AuditRollup(retention_from_env(dict(os.environ)))
+
+
+@functools.cache
+def get_confidence_model() -> ConfidenceModel:
+    """SAA_CONFIDENCE_MODEL の校正済みモデルを返す（未設定時は事前重み）。
+
+    Returns:
+        ConfidenceModel: Orchestrator で共有するモデル
+    """
+    path = os.environ.get("SAA_CONFIDENCE_MODEL")
+    return ConfidenceModel.load(path) if path else DEFAULT_MODEL
+
+
+def _build_orchestrator() -> Orchestrator:
+    """事前コンパイル済み契約で検証・state 正規化する Orchestrator を構築する。
+
+    Returns:
+        Orchestrator: API で共有する Orchestrator
+    """
+    orchestrator = build_orchestrator(model=get_confidence_model())
+    audit_rollup.add_state_labels(
+        orchestrator.canonicalizer.labels | set(orchestrator.template.fallback_states)
+    )
+    audit_rollup.attach(orchestrator.audit_store)
+    return orchestrator
+
+
+def get_orchestrator() -> Orchestrator:
+    """共有 Orchestrator を返し、未構築なら構築する。
+
+    Returns:
+        Orchestrator: API で共有する Orchestrator
+    """
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = _build_orchestrator()
+    return _orchestrator
+
+
+@functools.cache
+def get_interned_codec() -> MessagePackCodec:
+    """契約のキーと語彙から intern 表付きコーデックを構築して返す。
+
+    Returns:
+        MessagePackCodec: 語彙IDへ置換するコーデック
+    """
+    contract = load_contract()
+    return MessagePackCodec(InternTable.from_contract(contract.schema, contract.vocabulary))
+
+
+_plain_codec = MessagePackCodec()
+
+
+@functools.cache
+def get_idempotency_store() -> IdempotencyStore:
+    """ワーカー間で共有する Idempotency-Key の保存先を返す。
+
+    Returns:
+        IdempotencyStore: SAA_IDEMPOTENCY_DB（未設定時は一時ディレクトリ）の SQLite ストア
+
+    Note:
+        - 一時ディレクトリはコンテナ・ホスト間で共有されず再起動で消えうるため、未設定時は警告を出す
+    """
+    path = os.environ.get("SAA_IDEMPOTENCY_DB")
+    if not path:
+        path = Path(tempfile.gettempdir()) / "saa-idempotency.sqlite3"
+        logger.warning(
+            "SAA_IDEMPOTENCY_DB is not set; idempotency keys are stored in %s and are not shared "
+            "across hosts or guaranteed to survive restarts",
+            path,
+        )
+    return IdempotencyStore(path, ttl_seconds=float(os.environ.get("SAA_IDEMPOTENCY_TTL") or 24 * 3600))
+
+
+def _build_tenant_orchestrator(config: TenantConfig) -> Orchestrator:
+    """テナント設定から Orchestrator を構築する（監査ログは共有 Orchestrator と共用する）。
+
+    Args:
+        config: テナント設定
+
+    Returns:
+        Orchestrator: テナント専用の Orchestrator
+    """
+    orchestrator = build_orchestrator(
+        vocabulary=config.vocabulary,
+        similarity=config.similarity,
+        model=get_confidence_model(),
+        template=config.template,
+        tenant_id=config.tenant_id,
+        audit_store=get_orchestrator().audit_store,
+    )
+    audit_rollup.add_state_labels(orchestrator.canonicalizer.labels | set(config.template.fallback_states))
+    return orchestrator
+
+
+@functools.cache
+def get_tenant_pool() -> TenantPool:
+    """テナント別 Orchestrator のプールを返す。
+
+    Returns:
+        TenantPool: API で共有するプール
+    """
+    return TenantPool(
+        source=DirectoryTenantSource(
+            os.environ.get("SAA_TENANTS_DIR"), base_vocabulary=load_contract().vocabulary
+        ),
+        factory=_build_tenant_orchestrator,
+        capacity=int(os.environ.get("SAA_TENANT_POOL_SIZE") or 128),
+    )
+
+
+def resolve_orchestrator(request: Request) -> Orchestrator:
+    """X-Tenant-ID に応じた Orchestrator を返す。
+
+    Args:
+        request: 処理対象のリクエスト
+
+    Returns:
+        Orchestrator: テナント指定時はテナント専用、未指定時は共有 Orchestrator
+
+    Raises:
+        HTTPException: 未知・不正なテナントの場合は 404
+    """
+    tenant_id = request.headers.get(TENANT_HEADER)
+    if not tenant_id:
+        return get_orchestrator()
+    try:
+        return get_tenant_pool().get(tenant_id)
+    except TenantError as exc:
+        raise HTTPException(status_code=404, detail="unknown tenant") from exc
+
+
+if os.environ.get("SAA_STARTUP_MODE", "lazy").strip().lower() == "eager":
+    get_orchestrator()
+    get_interned_codec()
 
 
 class ConvertRequest(BaseModel):
@@ -31,6 +244,16 @@ class ConvertRequest(BaseModel):
     text: str | None = None
 
 
+class ConvertBatchRequest(BaseModel):
+    """/convert/batch のリクエストボディ。
+
+    Args:
+        texts: 変換対象の自然文の一覧
+    """
+
+    texts: list[str] = []
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     """ヘルスチェック結果を返す。
@@ -41,24 +264,356 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/convert")
-def convert(req: ConvertRequest) -> dict[str, object]:
+@app.post("/convert", response_model=None)
+def convert(req: ConvertRequest, request: Request, response: Response) -> dict[str, object] | Response:
     """自然文を state-intent JSON へ変換する。
 
     Args:
         req: text を含む入力モデル
+        request: プロファイル要否・応答形式・Idempotency-Key の判定に使うリクエスト
+        response: X-Profile-Id / Idempotent-Replayed を付与するレスポンス
 
     Returns:
-        dict[str, object]: schema 準拠の変換結果
+        dict[str, object] | Response: schema 準拠の変換結果（Accept に応じて MessagePack）
 
     Raises:
-        HTTPException: 入力不正または変換失敗時
+        HTTPException: 入力不正・対応形式なし・変換失敗時、Idempotency-Key の衝突時は 409
     """
     text = (req.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail="text must not be empty")
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=406, detail="supported media types: " + ", ".join(SUPPORTED_MEDIA_TYPES)
+        )
+
+    orchestrator = resolve_orchestrator(request)
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return render(_run_convert(orchestrator, text, request, response), media_type, response)
+
+    # 同じキーの再送はテナントごとに区別し、本文の指紋が一致する場合のみ保存済み結果を返す。
+    store = get_idempotency_store()
+    scoped_key = f"{request.headers.get(TENANT_HEADER) or ''}:{key}"
+    owner = uuid.uuid4().hex
+    try:
+        stored = store.begin(scoped_key, fingerprint(req.model_dump()), owner)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except IdempotencyError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if stored is not None:
+        response.headers[REPLAYED_HEADER] = "true"
+        return render(stored, media_type, response)
+
+    try:
+        output = _run_convert(orchestrator, text, request, response)
+    except BaseException:
+        store.release(scoped_key, owner)
+        raise
+    if not store.complete(scoped_key, output, owner):
+        logger.warning("idempotency lease for key %r expired before completion; response not stored", key)
+    return render(output, media_type, response)
+
+
+def _run_convert(
+    orchestrator: Orchestrator, text: str, request: Request, response: Response
+) -> dict[str, object]:
+    """Orchestrator で変換し、対象リクエストならプロファイルを取得する。
+
+    Args:
+        orchestrator: 変換に使う Orchestrator
+        text: 空白除去済みの入力
+        request: プロファイル要否の判定に使うリクエスト
+        response: X-Profile-Id を付与するレスポンス
+
+    Returns:
+        dict[str, object]: 変換結果
+
+    Raises:
+        HTTPException: 変換失敗時は 500
+    """
+    if not profiler.should_profile(request.headers):
+        try:
+            return orchestrator.run(text)
+        except MaxRetryError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    try:
+        output, tracer, duration_ms = profiler.profile(lambda: orchestrator.run(text))
+    except ProfiledError as exc:
+        profile_id = str(uuid.uuid4())
+        profiler.store(profile_id, exc.tracer, exc.duration_ms)
+        if isinstance(exc.original, MaxRetryError):
+            raise HTTPException(
+                status_code=500,
+                detail=str(exc.original),
+                headers={"X-Profile-Id": profile_id},
+            ) from exc.original
+        raise exc.original from None
+
+    profile_id = str(output.get("trace_id") or uuid.uuid4())
+    profiler.store(profile_id, tracer, duration_ms)
+    response.headers["X-Profile-Id"] = profile_id
+    return output
 
+
+@app.post("/convert/batch", response_model=None)
+def convert_batch(
+    req: ConvertBatchRequest, request: Request, response: Response
+) -> dict[str, object] | Response:
+    """複数の自然文をまとめて state-intent JSON へ変換する。
+
+    Args:
+        req: texts を含む入力モデル
+        request: テナント・応答形式の判定に使うリクエスト
+        response: 応答ヘッダの引き継ぎ元
+
+    Returns:
+        dict[str, object] | Response: {"results": [...]}（入力順。失敗した入力は {"error": ...}）
+
+    Raises:
+        HTTPException: 入力不正・件数超過・対応形式なしの場合
+
+    Note:
+        - confidence はバッチ全体を1回で算出する（Orchestrator.run_batch）
+        - 失敗理由は /convert と同じく Validator NG の要約のみを返す
+    """
+    texts = [text.strip() for text in req.texts]
+    if not texts or not all(texts):
+        raise HTTPException(status_code=400, detail="texts must be a non-empty list of non-empty strings")
+    if len(texts) > batch_max_items:
+        raise HTTPException(status_code=413, detail=f"texts must not exceed {batch_max_items} items")
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=406, detail="supported media types: " + ", ".join(SUPPORTED_MEDIA_TYPES)
+        )
+
+    results: list[object] = []
+    for result in resolve_orchestrator(request).run_batch(texts):
+        if isinstance(result, MaxRetryError):
+            results.append({"error": str(result)})
+        elif isinstance(result, Exception):
+            results.append({"error": "conversion failed"})
+        else:
+            results.append(result)
+    return render({"results": results}, media_type, response)
+
+
+def render(payload: dict[str, object], media_type: str, response: Response) -> dict[str, object] | Response:
+    """変換結果を negotiate() で選んだ形式の応答にする。
+
+    Args:
+        payload: 変換結果
+        media_type: 応答の media type
+        response: エンドポイントへ注入されたレスポンス（付与済みヘッダを引き継ぐ）
+
+    Returns:
+        dict[str, object] | Response: JSON の場合は dict、MessagePack の場合は Response
+    """
+    if media_type == JSON_MEDIA_TYPE:
+        return payload
+    headers = dict(response.headers)
+    headers.pop("content-length", None)
+    if media_type == INTERNED_MEDIA_TYPE:
+        codec = get_interned_codec()
+        headers["X-Intern-Version"] = codec.intern.version
+    else:
+        codec = _plain_codec
+    return Response(content=codec.packb(payload), media_type=media_type, headers=headers)
+
+
+@app.get("/contracts/intern-table")
+def intern_table() -> dict[str, object]:
+    """MessagePack 応答の語彙ID表を返す。
+
+    Returns:
+        dict[str, object]: version と ID 順の文字列一覧
+    """
+    return get_interned_codec().intern.to_dict()
+
+
+def _require_profile_access(request: Request) -> None:
+    """プロファイル参照に特権ヘッダを要求する。
+
+    Args:
+        request: 参照リクエスト
+
+    Raises:
+        HTTPException: トークン未設定時は 404、ヘッダ不一致時は 403
+    """
+    if profiler.token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.is_privileged(request.headers):
+        raise HTTPException(status_code=403, detail="forbidden")
+
+
+@app.get("/debug/profiles")
+def list_profiles(request: Request) -> list[dict[str, object]]:
+    """保持中のプロファイル一覧を新しい順に返す。
+
+    Args:
+        request: 特権ヘッダを含むリクエスト
+
+    Returns:
+        list[dict[str, object]]: trace_id/created_at/duration_ms の一覧
+    """
+    _require_profile_access(request)
+    return profiler.summaries()
+
+
+@app.get("/debug/profiles/{trace_id}", response_class=PlainTextResponse)
+def download_profile(trace_id: str, request: Request) -> PlainTextResponse:
+    """trace_id のプロファイルを collapsed stacks 形式で返す。
+
+    Args:
+        trace_id: /convert 応答の X-Profile-Id
+        request: 特権ヘッダを含むリクエスト
+
+    Returns:
+        PlainTextResponse: flamegraph.pl / speedscope で読み込めるテキスト
+
+    Raises:
+        HTTPException: 未保持の trace_id の場合は 404
+    """
+    _require_profile_access(request)
+    profile = profiler.get(trace_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return PlainTextResponse(profile.collapsed())
+
+
+@app.get("/audit/export")
+def export_audit(
+    request: Request,
+    since: str | None = None,
+    until: str | None = None,
+    status: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> StreamingResponse:
+    """監査ログを gzip NDJSON としてストリーミング出力する。
+
+    Args:
+        request: X-Audit-Token（と絞り込み用の X-Tenant-ID）を含むリクエスト
+        since: 開始日時（ISO 8601、以上）
+        until: 終了日時（ISO 8601、未満）
+        status: カンマ区切りの status 一覧
+        cursor: 前回応答の X-Next-Cursor
+        limit: 1回で出力する最大件数
+
+    Returns:
+        StreamingResponse: gzip NDJSON 本文と X-Next-Cursor / X-Has-More ヘッダ
+
+    Raises:
+        HTTPException: トークン未設定時は 404、不一致時は 403、条件不正時は 400、
+            cursor の位置が破棄済みの場合は 410
+    """
+    _require_audit_token(request)
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+    store = get_orchestrator().audit_store
     try:
-        return orchestrator.run(text)
-    except MaxRetryError as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+        export_filter = ExportFilter.from_params(
+            since, until, status, tenant=request.headers.get(TENANT_HEADER)
+        )
+        page = plan_page(store, cursor, export_filter, limit)
+    except AuditCursorExpiredError as exc:
+        raise HTTPException(status_code=410, detail=str(exc)) from exc
+    except AuditExportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return StreamingResponse(
+        iter_ndjson_gzip(store, page, export_filter),
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": 'attachment; filename="audit-export.ndjson.gz"',
+            "X-Next-Cursor": page.next_cursor,
+            "X-Has-More": "1" if page.more else "0",
+        },
+    )
+
+
+@app.get("/audit/stats")
+def audit_stats(
+    request: Request,
+    granularity: str = "hour",
+    since: str | None = None,
+    until: str | None = None,
+    intent: str | None = None,
+    top: int = 10,
+) -> dict[str, object]:
+    """監査ログの集計（成功率・Validator 指摘・state 分布・intent 別系列）を返す。
+
+    Args:
+        request: X-Audit-Token（と絞り込み用の X-Tenant-ID）を含むリクエスト
+        granularity: 系列の粒度（"minute" / "hour"）
+        since: 開始日時（ISO 8601、以上。バケット境界へ切り下げる）
+        until: 終了日時（ISO 8601、未満）
+        intent: 絞り込む intent
+        top: 返す Validator 指摘・state の最大件数
+
+    Returns:
+        dict[str, object]: summary（合算値）と series（バケット・intent 別の件数）
+
+    Raises:
+        HTTPException: トークン未設定時は 404、不一致時は 403、条件不正時は 400
+
+    Note:
+        - 監査ログを走査せず、保存時に更新済みの集計から返す
+        - since/until 未指定時の summary は起動以降の累計、series は保持中の全バケットとなる
+        - state 分布は語彙ラベル・補助 state のみを返し、入力本文の断片は "(other)" にまとめる
+    """
+    _require_audit_token(request)
+    get_orchestrator()
+    if top < 1:
+        raise HTTPException(status_code=400, detail="top must be positive")
+    tenant_id = request.headers.get(TENANT_HEADER)
+    try:
+        start, end = parse_time(since), parse_time(until)
+        summary = audit_rollup.stats(granularity, start, end, intent, tenant_id, top)
+        series = audit_rollup.series(granularity, start, end, intent, tenant_id)
+    except RollupError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {
+        "granularity": granularity,
+        "summary": summary.to_dict(),
+        "series": series,
+        "compacted": audit_rollup.compacted,
+    }
+
+
+def _require_audit_token(request: Request) -> None:
+    """監査ログ系エンドポイントの X-Audit-Token を検証する。
+
+    Args:
+        request: 検証対象のリクエスト
+
+    Raises:
+        HTTPException: SAA_AUDIT_EXPORT_TOKEN 未設定時は 404、不一致時は 403
+    """
+    if audit_export_token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("x-audit-token")
+    if supplied is None or not hmac.compare_digest(supplied, audit_export_token):
+        raise HTTPException(status_code=403, detail="forbidden")
+
+
+@app.get("/tenants/metrics")
+def tenant_metrics(request: Request) -> dict[str, object]:
+    """テナントプールの利用状況を返す。
+
+    Args:
+        request: X-Audit-Token を含むリクエスト
+
+    Returns:
+        dict[str, object]: 保持数・ヒット率・構築時間などの統計
+
+    Raises:
+        HTTPException: トークン未設定時は 404、不一致時は 403
+    """
+    _require_audit_token(request)
+    return get_tenant_pool().metrics().to_dict()
@@ -0,0 +1,235 @@
+"""/convert リクエスト単位のオンデマンドプロファイラを提供する。
+
+入出力: 処理関数 -> 戻り値 + RequestProfile / trace_id -> collapsed stacks(str)。
+制約:
+    - 無効時（sample_rate=0 かつ特権ヘッダなし）はトレーサを設定せず、処理を素通しする
+    - プロファイルは容量上限付きのリングにのみ保持し、古いものから破棄する
+    - 特権ヘッダのトークンが未設定の場合、ヘッダによる有効化とダウンロードは行わない
+
+Note:
+    - sys.setprofile はスレッド単位で作用するため、同時実行中の他リクエストを計測しない
+    - 出力は flamegraph.pl / speedscope 互換の collapsed stacks（値は自己時間マイクロ秒）
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hmac
+import random
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any, Callable, Mapping, TypeVar
+
+PROFILE_HEADER = "x-profile"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RequestProfile:
+    """1リクエスト分のプロファイルを表すデータ。"""
+
+    trace_id: str
+    created_at: str
+    duration_ms: float
+    stacks: dict[str, int]
+
+    def collapsed(self) -> str:
+        """collapsed stacks 形式の文字列を返す。
+
+        Returns:
+            str: "frame;frame;frame 値" を1行ずつ並べた文字列
+        """
+        lines = [f"{stack} {value}" for stack, value in sorted(self.stacks.items()) if value > 0]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+class _StackTracer:
+    """sys.setprofile で呼び出しスタックごとの自己時間を集計するトレーサ。"""
+
+    def __init__(self) -> None:
+        """空の集計で初期化する。"""
+        # (フレーム名, 開始時刻, 子呼び出しの合計時間)
+        self._stack: list[list[Any]] = []
+        self.totals: dict[str, float] = {}
+
+    def __call__(self, frame: FrameType, event: str, arg: Any) -> None:
+        """プロファイルイベントを処理する。"""
+        now = time.perf_counter()
+        if event == "call":
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            self._stack.append([f"{module}:{code.co_qualname}", now, 0.0])
+        elif event == "c_call":
+            module = getattr(arg, "__module__", None) or "builtins"
+            self._stack.append([f"{module}:{getattr(arg, '__qualname__', repr(arg))}", now, 0.0])
+        elif event in ("return", "c_return", "c_exception"):
+            # 計測開始前に入った関数からの return は対応する call がないため無視する。
+            if not self._stack:
+                return
+            key = ";".join(entry[0] for entry in self._stack)
+            _, started, children = self._stack.pop()
+            elapsed = now - started
+            self.totals[key] = self.totals.get(key, 0.0) + (elapsed - children)
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+
+class RequestProfiler:
+    """サンプリング率または特権ヘッダでリクエストを計測するクラス。"""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        token: str | None = None,
+        capacity: int = 64,
+    ) -> None:
+        """RequestProfiler を初期化する。
+
+        Args:
+            sample_rate: 無条件に計測する割合（0.0〜1.0）
+            token: 特権ヘッダ X-Profile の照合トークン（None でヘッダ無効）
+            capacity: 保持するプロファイルの最大件数
+
+        Raises:
+            ValueError: sample_rate が範囲外の場合
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.token = token or None
+        self.capacity = capacity
+        self._profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """計測が発生しうる設定か返す。"""
+        return self.sample_rate > 0 or self.token is not None
+
+    def is_privileged(self, headers: Mapping[str, str]) -> bool:
+        """特権ヘッダが正しいトークンを持つか判定する。
+
+        Args:
+            headers: リクエストヘッダ
+
+        Returns:
+            bool: トークンが一致する場合 True
+        """
+        if self.token is None:
+            return False
+        supplied = headers.get(PROFILE_HEADER)
+        return supplied is not None and hmac.compare_digest(supplied, self.token)
+
+    def should_profile(self, headers: Mapping[str, str]) -> bool:
+        """このリクエストを計測するか判定する。
+
+        Args:
+            headers: リクエストヘッダ
+
+        Returns:
+            bool: 計測する場合 True
+        """
+        if not self.enabled:
+            return False
+        if self.is_privileged(headers):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profile(self, func: Callable[[], T]) -> tuple[T, _StackTracer, float]:
+        """現在のスレッドで func を計測付きで実行する。
+
+        Args:
+            func: 計測対象の処理
+
+        Returns:
+            tuple: (func の戻り値, 集計済みトレーサ, 所要ミリ秒)
+
+        Raises:
+            ProfiledError: func が例外を送出した場合（集計結果を保持する）
+        """
+        tracer = _StackTracer()
+        started = time.perf_counter()
+        previous = sys.getprofile()
+        sys.setprofile(tracer)
+        try:
+            result = func()
+        except Exception as exc:
+            sys.setprofile(previous)
+            raise ProfiledError(exc, tracer, (time.perf_counter() - started) * 1000) from exc
+        sys.setprofile(previous)
+        return result, tracer, (time.perf_counter() - started) * 1000
+
+    def store(self, trace_id: str, tracer: _StackTracer, duration_ms: float) -> RequestProfile:
+        """集計結果をリングへ保存する。
+
+        Args:
+            trace_id: 紐付ける trace_id
+            tracer: profile() が返したトレーサ
+            duration_ms: 所要ミリ秒
+
+        Returns:
+            RequestProfile: 保存したプロファイル
+        """
+        profile = RequestProfile(
+            trace_id=trace_id,
+            created_at=datetime.now(timezone.utc).isoformat(),
+            duration_ms=duration_ms,
+            stacks={key: int(value * 1_000_000) for key, value in tracer.totals.items()},
+        )
+        with self._lock:
+            self._profiles[trace_id] = profile
+            self._profiles.move_to_end(trace_id)
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def get(self, trace_id: str) -> RequestProfile | None:
+        """trace_id のプロファイルを返す。
+
+        Args:
+            trace_id: 対象の trace_id
+
+        Returns:
+            RequestProfile | None: 未保持の場合は None
+        """
+        with self._lock:
+            return self._profiles.get(trace_id)
+
+    def summaries(self) -> list[dict[str, Any]]:
+        """保持中のプロファイル概要を新しい順に返す。
+
+        Returns:
+            list[dict[str, Any]]: trace_id/created_at/duration_ms の一覧
+        """
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [
+            {"trace_id": p.trace_id, "created_at": p.created_at, "duration_ms": p.duration_ms}
+            for p in reversed(profiles)
+        ]
+
+
+class ProfiledError(Exception):
+    """計測中の処理が失敗したことを表す例外。
+
+    Note:
+        - 元の例外を original に、失敗までの集計を tracer に保持する
+    """
+
+    def __init__(self, original: Exception, tracer: _StackTracer, duration_ms: float) -> None:
+        """元の例外と集計結果を保持する。
+
+        Args:
+            original: 処理が送出した例外
+            tracer: 失敗までの集計
+            duration_ms: 失敗までの所要ミリ秒
+        """
+        super().__init__(str(original))
+        self.original = original
+        self.tracer = tracer
+        self.duration_ms = duration_ms
@@ -0,0 +1,366 @@
+"""テナント別設定から Orchestrator を遅延構築し、LRU で保持する TenantPool を提供する。
+
+入出力: tenant_id(str) -> Orchestrator / <tenants_dir>/<tenant_id>.json -> TenantConfig。
+制約:
+    - テナントIDは英数字・"_"・"-" の64文字以内に限り、設定ファイルのパスへそのまま使う
+    - 保持数が capacity を超えた場合は最も長く参照されていないテナントを破棄する
+    - 同一テナントの同時初回アクセスでは構築を1回に抑え、他テナントの参照は待たせない
+
+Note:
+    - テナント設定は語彙（vocabulary / vocabulary_path）・補助 state・intent・next_actions・action_bindings を持つ
+    - 省略した項目は共通語彙・PayloadTemplate の既定値を使う
+    - vocabulary_path はテナント設定ディレクトリからの相対パスとし、ディレクトリ外は拒否する
+    - 設定ファイルのない未知テナントは unknown_ttl_seconds の間だけ記憶し、同じIDで毎回ディスクを読まない
+    - 破棄された Orchestrator の監査ログは共有 AuditStore に残る（構築関数で共有する）
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+import json
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Any, Callable
+
+from services.inference.orchestrator import Orchestrator, PayloadTemplate
+from services.inference.state_canonicalizer import DEFAULT_THRESHOLD
+
+TENANT_ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+
+
+class TenantError(Exception):
+    """未知・不正なテナントや設定の読み込み失敗を表す例外。"""
+
+
+@dataclass(frozen=True)
+class TenantConfig:
+    """テナント1件分の設定を表すデータ。"""
+
+    tenant_id: str
+    vocabulary: dict[str, Any]
+    template: PayloadTemplate
+    similarity: float = DEFAULT_THRESHOLD
+
+    @classmethod
+    def from_dict(
+        cls, tenant_id: str, data: dict[str, Any], base_vocabulary: dict[str, Any]
+    ) -> TenantConfig:
+        """設定辞書から TenantConfig を組み立てる。
+
+        Args:
+            tenant_id: テナントID
+            data: テナント設定辞書
+            base_vocabulary: vocabulary 省略時に使う共通語彙
+
+        Returns:
+            TenantConfig: 検証済みの設定
+
+        Raises:
+            TenantError: 項目の型・件数が不正な場合
+        """
+        defaults = PayloadTemplate()
+        fallback_states = _strings(data, "fallback_states", defaults.fallback_states, tenant_id)
+        next_actions = _strings(data, "next_actions", defaults.next_actions, tenant_id)
+        if len(set(fallback_states)) < 3:
+            raise TenantError(f"{tenant_id}: fallback_states must contain at least 3 unique items")
+        if len(next_actions) < 3:
+            raise TenantError(f"{tenant_id}: next_actions must contain at least 3 items")
+
+        bindings = data.get("action_bindings", defaults.action_bindings)
+        if not isinstance(bindings, (list, tuple)) or not bindings or not all(
+            isinstance(b, dict) and isinstance(b.get("action"), str) and isinstance(b.get("api"), str)
+            for b in bindings
+        ):
+            raise TenantError(f"{tenant_id}: action_bindings must be a non-empty list of {{action, api}}")
+
+        intent = data.get("intent", defaults.intent)
+        rollback_plan = data.get("rollback_plan", defaults.rollback_plan)
+        if not isinstance(intent, str) or not isinstance(rollback_plan, str):
+            raise TenantError(f"{tenant_id}: intent and rollback_plan must be strings")
+
+        vocabulary = data.get("vocabulary", base_vocabulary)
+        if not isinstance(vocabulary, dict):
+            raise TenantError(f"{tenant_id}: vocabulary must be an object")
+        states = vocabulary.get("states") or []
+        if not isinstance(states, list) or not all(_is_vocabulary_entry(entry) for entry in states):
+            raise TenantError(
+                f"{tenant_id}: vocabulary states must be label strings or {{label, aliases}} objects"
+            )
+
+        similarity = data.get("similarity", DEFAULT_THRESHOLD)
+        if (
+            isinstance(similarity, bool)
+            or not isinstance(similarity, (int, float))
+            or not 0 < similarity <= 1
+        ):
+            raise TenantError(f"{tenant_id}: similarity must be a number in (0, 1]")
+
+        return cls(
+            tenant_id=tenant_id,
+            vocabulary=vocabulary,
+            template=PayloadTemplate(
+                intent=intent,
+                next_actions=next_actions,
+                rollback_plan=rollback_plan,
+                action_bindings=tuple(
+                    {"action": b["action"], "api": b["api"], "dry_run": True} for b in bindings
+                ),
+                fallback_states=fallback_states,
+            ),
+            similarity=float(similarity),
+        )
+
+
+class DirectoryTenantSource:
+    """<root>/<tenant_id>.json からテナント設定を読み込むクラス。"""
+
+    def __init__(
+        self,
+        root: str | Path | None,
+        base_vocabulary: dict[str, Any],
+        unknown_ttl_seconds: float = 30.0,
+        unknown_capacity: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """DirectoryTenantSource を初期化する。
+
+        Args:
+            root: テナント設定ディレクトリ（None の場合はすべて未知テナント）
+            base_vocabulary: vocabulary 省略時に使う共通語彙
+            unknown_ttl_seconds: 未知テナントを記憶する秒数（追加したテナントはこの秒数以内に反映される）
+            unknown_capacity: 記憶する未知テナント数の上限（超えた場合は古いものから忘れる）
+            clock: 経過時間の計測に使う関数
+        """
+        self.root = Path(root) if root else None
+        self.base_vocabulary = base_vocabulary
+        self.unknown_ttl_seconds = unknown_ttl_seconds
+        self.unknown_capacity = unknown_capacity
+        self.clock = clock
+        self._unknown: OrderedDict[str, float] = OrderedDict()
+        self._unknown_lock = threading.Lock()
+
+    def __call__(self, tenant_id: str) -> TenantConfig:
+        """テナント設定を読み込む。
+
+        Args:
+            tenant_id: 検証済みのテナントID
+
+        Returns:
+            TenantConfig: テナント設定
+
+        Raises:
+            TenantError: 設定ファイルがない・不正な場合
+        """
+        if self.root is None or self._is_known_unknown(tenant_id):
+            raise TenantError(f"unknown tenant: {tenant_id}")
+        path = self.root / f"{tenant_id}.json"
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError as exc:
+            self._remember_unknown(tenant_id)
+            raise TenantError(f"unknown tenant: {tenant_id}") from exc
+        except json.JSONDecodeError as exc:
+            raise TenantError(f"{tenant_id}: invalid tenant config") from exc
+        if not isinstance(data, dict):
+            raise TenantError(f"{tenant_id}: tenant config must be an object")
+
+        if "vocabulary_path" in data:
+            root = self.root.resolve()
+            vocabulary_path = (root / str(data.pop("vocabulary_path"))).resolve()
+            if not vocabulary_path.is_relative_to(root):
+                raise TenantError(f"{tenant_id}: vocabulary_path must stay inside the tenants directory")
+            try:
+                data["vocabulary"] = json.loads(vocabulary_path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as exc:
+                raise TenantError(f"{tenant_id}: cannot read {vocabulary_path.name}") from exc
+        return TenantConfig.from_dict(tenant_id, data, self.base_vocabulary)
+
+    def _is_known_unknown(self, tenant_id: str) -> bool:
+        """記憶期間内の未知テナントか判定する。"""
+        with self._unknown_lock:
+            expires_at = self._unknown.get(tenant_id)
+            if expires_at is None:
+                return False
+            if expires_at <= self.clock():
+                del self._unknown[tenant_id]
+                return False
+            return True
+
+    def _remember_unknown(self, tenant_id: str) -> None:
+        """未知テナントを記憶する（上限を超えた分は古いものから忘れる）。"""
+        if self.unknown_ttl_seconds <= 0 or self.unknown_capacity < 1:
+            return
+        with self._unknown_lock:
+            self._unknown[tenant_id] = self.clock() + self.unknown_ttl_seconds
+            self._unknown.move_to_end(tenant_id)
+            while len(self._unknown) > self.unknown_capacity:
+                self._unknown.popitem(last=False)
+
+
+@dataclass(frozen=True)
+class PoolMetrics:
+    """TenantPool の利用状況を表すデータ。"""
+
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+    builds: int
+    build_failures: int
+    build_ms_total: float
+    build_ms_max: float
+
+    @property
+    def hit_rate(self) -> float:
+        """参照に対する保持中ヒットの割合を返す。"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON 化可能な辞書を返す。"""
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        data["build_ms_avg"] = self.build_ms_total / self.builds if self.builds else 0.0
+        return data
+
+
+class TenantPool:
+    """テナント別 Orchestrator を LRU で保持するクラス。"""
+
+    def __init__(
+        self,
+        source: Callable[[str], TenantConfig],
+        factory: Callable[[TenantConfig], Orchestrator],
+        capacity: int = 128,
+    ) -> None:
+        """TenantPool を初期化する。
+
+        Args:
+            source: テナントIDから設定を返す関数
+            factory: 設定から Orchestrator を構築する関数
+            capacity: 保持するテナント数の上限
+
+        Raises:
+            ValueError: capacity が 1 未満の場合
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.source = source
+        self.factory = factory
+        self.capacity = capacity
+        self._entries: OrderedDict[str, Orchestrator] = OrderedDict()
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "builds": 0, "build_failures": 0}
+        self._build_ms_total = 0.0
+        self._build_ms_max = 0.0
+
+    def __len__(self) -> int:
+        """保持中のテナント数を返す。"""
+        return len(self._entries)
+
+    def __contains__(self, tenant_id: object) -> bool:
+        """テナントが保持中か返す。"""
+        return tenant_id in self._entries
+
+    def get(self, tenant_id: str) -> Orchestrator:
+        """テナントの Orchestrator を返し、未保持なら構築する。
+
+        Args:
+            tenant_id: テナントID
+
+        Returns:
+            Orchestrator: テナント専用の Orchestrator
+
+        Raises:
+            TenantError: テナントIDが不正・設定が読み込めない場合
+        """
+        if not TENANT_ID_PATTERN.fullmatch(tenant_id):
+            raise TenantError(f"invalid tenant id: {tenant_id!r}")
+
+        with self._lock:
+            orchestrator = self._entries.get(tenant_id)
+            if orchestrator is not None:
+                self._entries.move_to_end(tenant_id)
+                self._counters["hits"] += 1
+                return orchestrator
+            self._counters["misses"] += 1
+            build_lock = self._build_locks.setdefault(tenant_id, threading.Lock())
+
+        # 構築はテナント単位のロックで行い、他テナントの参照をブロックしない。
+        with build_lock:
+            with self._lock:
+                orchestrator = self._entries.get(tenant_id)
+                if orchestrator is not None:
+                    self._entries.move_to_end(tenant_id)
+                    return orchestrator
+
+            started = time.perf_counter()
+            try:
+                orchestrator = self.factory(self.source(tenant_id))
+            except Exception:
+                with self._lock:
+                    self._counters["build_failures"] += 1
+                    self._build_locks.pop(tenant_id, None)
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with self._lock:
+                self._entries[tenant_id] = orchestrator
+                self._build_locks.pop(tenant_id, None)
+                self._counters["builds"] += 1
+                self._build_ms_total += elapsed_ms
+                self._build_ms_max = max(self._build_ms_max, elapsed_ms)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+                    self._counters["evictions"] += 1
+        return orchestrator
+
+    def evict(self, tenant_id: str) -> bool:
+        """テナントを破棄する（設定変更の反映用）。
+
+        Args:
+            tenant_id: テナントID
+
+        Returns:
+            bool: 保持していた場合 True
+        """
+        with self._lock:
+            return self._entries.pop(tenant_id, None) is not None
+
+    def metrics(self) -> PoolMetrics:
+        """利用状況を返す。
+
+        Returns:
+            PoolMetrics: 現時点の統計
+        """
+        with self._lock:
+            return PoolMetrics(
+                size=len(self._entries),
+                capacity=self.capacity,
+                build_ms_total=self._build_ms_total,
+                build_ms_max=self._build_ms_max,
+                **self._counters,
+            )
+
+
+def _is_vocabulary_entry(entry: Any) -> bool:
+    """語彙 states の1件が StateCanonicalizer の受け付ける形式か判定する。"""
+    if isinstance(entry, str):
+        return bool(entry)
+    if not isinstance(entry, dict) or not isinstance(entry.get("label"), str) or not entry["label"]:
+        return False
+    aliases = entry.get("aliases") or []
+    return isinstance(aliases, list) and all(isinstance(alias, str) for alias in aliases)
+
+
+def _strings(data: dict[str, Any], key: str, default: tuple[str, ...], tenant_id: str) -> tuple[str, ...]:
+    """文字列配列の設定値を取り出す。"""
+    value = data.get(key, default)
+    if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) and item for item in value):
+        raise TenantError(f"{tenant_id}: {key} must be a list of non-empty strings")
+    return tuple(value)
@@ -0,0 +1,660 @@
+"""SaaS Adapter の共通基盤（接続プール・流量制御・遮断・バッチ）を提供する。
+
+入出力: (primitive, input) -> ExecutionResult / execution_id -> RollbackOutcome, AuditEntry。
+制約:
+    - HTTP 接続は Adapter ごとの ConnectionPool で keep-alive 再利用する
+    - 送信前に TokenBucket で流量を制御し、リモートの 429 は Retry-After を尊重して再試行する
+    - 5xx・接続失敗が続いた場合は CircuitBreaker で遮断し、リモートへ送信しない
+    - 送信済みか不明な失敗（5xx・応答待ちの切断/タイムアウト）は冪等なメソッドのみ再試行する
+
+Note:
+    - Roadmap Phase 4 の SaaSAdapter(validate/execute/rollback/audit) を HttpSaaSAdapter で実装する
+    - LINE/CRM/POS 等の個別 Adapter は routes/batch_routes を定義して継承する
+    - 外部ライブラリに依存せず標準ライブラリの http.client のみを使う
+    - POST には実行IDを Idempotency-Key として付与し、リモートが重複排除に対応する
+      （一括実行では要素ごとの実行IDを本文の idempotency_keys で送る）
+      Adapter（supports_idempotency_key=True）に限り POST も再試行する
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+import http.client
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable
+from urllib.parse import urlsplit
+import uuid
+
+from services.inference.validator import ValidationResult
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class AdapterError(Exception):
+    """Adapter 呼び出しの失敗を表す例外。"""
+
+
+class RateLimitedError(AdapterError):
+    """リモートの流量制限（429）が再試行上限を超えた場合の例外。"""
+
+
+class CircuitOpenError(AdapterError):
+    """CircuitBreaker が遮断中のため送信しなかった場合の例外。"""
+
+
+class RequestNotSentError(ConnectionError):
+    """接続・送信段階で失敗し、リクエストがリモートへ届いていない場合の例外。"""
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    """HTTP レスポンスを表すデータ。"""
+
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        """本文を JSON として解釈する。
+
+        Returns:
+            Any: 解釈結果（本文が空の場合は None）
+        """
+        return json.loads(self.body) if self.body else None
+
+
+@dataclass(frozen=True)
+class ExecutionResult:
+    """Primitive 実行1件の結果を表すデータ。"""
+
+    execution_id: str
+    primitive: str
+    ok: bool
+    response: Any = None
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class RollbackOutcome:
+    """補償実行1件の結果を表すデータ。"""
+
+    execution_id: str
+    ok: bool
+    error: str | None = None
+    skipped: bool = False
+
+
+@dataclass(frozen=True)
+class AuditEntry:
+    """Adapter 実行の監査情報を表すデータ。"""
+
+    execution_id: str
+    primitive: str
+    input: dict[str, Any]
+    ok: bool
+    executed_at: str
+    rolled_back: bool = False
+    error: str | None = None
+
+
+class TokenBucket:
+    """トークンバケット方式の流量制御を行うクラス。"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """TokenBucket を初期化する。
+
+        Args:
+            rate: 1秒あたりの補充トークン数
+            capacity: バースト上限（未指定時は rate）
+            clock: 単調増加時刻を返す関数
+            sleep: 待機関数
+
+        Raises:
+            ValueError: rate が正でない場合
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """トークン取得を試み、不足時は必要な待機秒数を返す。
+
+        Args:
+            tokens: 消費トークン数
+
+        Returns:
+            float: 取得できた場合 0.0、不足時は待機すべき秒数
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """トークンを取得できるまで待機する。
+
+        Args:
+            tokens: 消費トークン数
+        """
+        while True:
+            wait_seconds = self.try_acquire(tokens)
+            if wait_seconds <= 0:
+                return
+            self._sleep(wait_seconds)
+
+
+class CircuitBreaker:
+    """連続失敗時にリモート呼び出しを遮断するクラス。"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """CircuitBreaker を初期化する。
+
+        Args:
+            failure_threshold: 遮断に移行する連続失敗回数
+            reset_timeout: 遮断から試行再開(half_open)までの秒数
+            clock: 単調増加時刻を返す関数
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """closed/open/half_open のいずれかを返す。"""
+        with self._lock:
+            return self._state_locked()
+
+    def allow(self) -> bool:
+        """呼び出しを許可するか判定する。
+
+        Returns:
+            bool: 許可する場合 True
+
+        Note:
+            - half_open では試行を1件のみ許可する
+        """
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """成功を記録し、遮断を解除する。"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """失敗を記録し、閾値到達時は遮断する。"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+    def _state_locked(self) -> str:
+        """ロック取得済みの前提で状態を返す。"""
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+
+class ConnectionPool:
+    """同一ホストへの keep-alive 接続を再利用する接続プール。"""
+
+    def __init__(self, base_url: str, max_size: int = 10, timeout: float = 10.0) -> None:
+        """ConnectionPool を初期化する。
+
+        Args:
+            base_url: 接続先のベースURL（http/https）
+            max_size: 同時接続数の上限
+            timeout: ソケットタイムアウト秒数
+
+        Raises:
+            ValueError: 未対応のスキームの場合
+        """
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported scheme: {parts.scheme}")
+
+        self.scheme = parts.scheme
+        self.host = parts.hostname or ""
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.created_connections = 0
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> HttpResponse:
+        """プール内の接続で HTTP リクエストを送信する。
+
+        Args:
+            method: HTTP メソッド
+            path: ベースURLからの相対パス
+            body: リクエスト本文
+            headers: 追加ヘッダ
+
+        Returns:
+            HttpResponse: レスポンス
+
+        Raises:
+            OSError: 接続・送受信に失敗した場合
+            http.client.HTTPException: HTTP プロトコルエラーの場合
+
+        Note:
+            - 再利用した接続がサーバ側で切断済みだった場合、新規接続で1回だけ再送する
+            - 再送は送信前の失敗か冪等なメソッドに限る（応答待ちでの切断は処理済みの可能性がある）
+        """
+        with self._slots:
+            conn, reused = self._checkout()
+            try:
+                return self._send(conn, method, path, body, headers)
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                if not reused or not (
+                    isinstance(exc, RequestNotSentError) or method in IDEMPOTENT_METHODS
+                ):
+                    raise
+            conn = self._new_connection()
+            try:
+                return self._send(conn, method, path, body, headers)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+
+    def close(self) -> None:
+        """待機中の接続をすべて閉じる。"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        body: bytes | None,
+        headers: dict[str, str] | None,
+    ) -> HttpResponse:
+        """1接続で送受信し、keep-alive 可能なら接続をプールへ戻す。
+
+        Raises:
+            RequestNotSentError: 接続・送信段階で失敗した場合（リモートは処理していない）
+        """
+        try:
+            conn.request(method, self.base_path + path, body=body, headers=headers or {})
+        except (OSError, http.client.HTTPException) as exc:
+            raise RequestNotSentError(f"request not sent: {exc}") from exc
+        raw = conn.getresponse()
+        data = raw.read()
+        response = HttpResponse(
+            status=raw.status,
+            headers={key.lower(): value for key, value in raw.getheaders()},
+            body=data,
+        )
+        if raw.will_close:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        return response
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        """待機中の接続を取り出し、なければ新規作成する。"""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        """新しい接続を作成する。"""
+        with self._lock:
+            self.created_connections += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+
+class HttpSaaSAdapter:
+    """JSON over HTTP の SaaS API を呼び出す Adapter 基底クラス。
+
+    Note:
+        - routes: Primitive名 -> 単件実行パス
+        - batch_routes: Primitive名 -> 一括実行パス（リモートがバッチ対応の場合のみ）
+        - rollback_route: 補償実行パス（{execution_id} を埋め込む）
+        - supports_idempotency_key: リモートが Idempotency-Key で重複排除する場合 True
+    """
+
+    routes: dict[str, str] = {}
+    batch_routes: dict[str, str] = {}
+    rollback_route: str = "/rollback/{execution_id}"
+    supports_idempotency_key: bool = False
+
+    def __init__(
+        self,
+        base_url: str,
+        rate_per_sec: float = 10.0,
+        burst: float | None = None,
+        max_connections: int = 10,
+        max_batch_size: int = 100,
+        max_retries: int = 3,
+        retry_backoff: float = 0.2,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        timeout: float = 10.0,
+        sleep: Callable[[float], None] = time.sleep,
+        audit_capacity: int = 10_000,
+    ) -> None:
+        """Adapter を初期化する。
+
+        Args:
+            base_url: SaaS API のベースURL
+            rate_per_sec: 送信レート上限（リクエスト/秒）
+            burst: バースト上限（未指定時は rate_per_sec）
+            max_connections: 同時接続数の上限
+            max_batch_size: 一括実行1回あたりの最大件数
+            max_retries: 429/5xx/接続失敗時の再試行回数（5xx・応答待ちの失敗は再試行可能な呼び出しのみ）
+            retry_backoff: 再試行の初期待機秒数（指数的に増加）
+            failure_threshold: 遮断に移行する連続失敗回数
+            reset_timeout: 遮断から試行再開までの秒数
+            timeout: ソケットタイムアウト秒数
+            sleep: 待機関数
+            audit_capacity: 保持する監査情報の件数上限（古いものから破棄する）
+        """
+        self.pool = ConnectionPool(base_url, max_size=max_connections, timeout=timeout)
+        self.rate_limiter = TokenBucket(rate_per_sec, burst, sleep=sleep)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._sleep = sleep
+        self.audit_capacity = audit_capacity
+        self._audit: OrderedDict[str, AuditEntry] = OrderedDict()
+        self._audit_lock = threading.Lock()
+
+    def validate(self, primitive: str, payload: dict[str, Any]) -> ValidationResult:
+        """実行前に入力を検証する。
+
+        Args:
+            primitive: Primitive 名
+            payload: 実行入力
+
+        Returns:
+            ValidationResult: 検証結果
+
+        Note:
+            - 個別 Adapter は必要に応じて拡張し、super() の結果に issues を追加する
+        """
+        issues: list[str] = []
+        if primitive not in self.routes:
+            issues.append(f"unsupported primitive: {primitive}")
+        if not isinstance(payload, dict):
+            issues.append("input must be an object")
+        return ValidationResult(ok=not issues, issues=issues)
+
+    def execute(self, primitive: str, payload: dict[str, Any]) -> ExecutionResult:
+        """Primitive を1件実行する。
+
+        Args:
+            primitive: Primitive 名
+            payload: 実行入力
+
+        Returns:
+            ExecutionResult: 実行結果
+
+        Raises:
+            AdapterError: 検証失敗時
+        """
+        validation = self.validate(primitive, payload)
+        if not validation.ok:
+            raise AdapterError("validation failed: " + ", ".join(validation.issues))
+
+        execution_id = str(uuid.uuid4())
+        try:
+            response = self._call("POST", self.routes[primitive], payload, idempotency_key=execution_id)
+            result = ExecutionResult(execution_id, primitive, ok=True, response=response.json())
+        except AdapterError as exc:
+            result = ExecutionResult(execution_id, primitive, ok=False, error=str(exc))
+        except ValueError:
+            result = ExecutionResult(execution_id, primitive, ok=False, error="invalid response body")
+        self._record(result, payload)
+        return result
+
+    def execute_batch(self, primitive: str, payloads: list[dict[str, Any]]) -> list[ExecutionResult]:
+        """Primitive を複数件実行する。
+
+        Args:
+            primitive: Primitive 名
+            payloads: 実行入力一覧
+
+        Returns:
+            list[ExecutionResult]: 入力順の実行結果
+
+        Note:
+            - batch_routes 定義がある場合は max_batch_size ごとに1リクエストへまとめる
+            - 一括実行のレスポンスは {"results": [...]} を入力順で返す前提とする
+            - 要素ごとの実行IDを {"items": [...], "idempotency_keys": [...]} で送り、
+              リモートが rollback() の実行IDを識別できるようにする
+        """
+        route = self.batch_routes.get(primitive)
+        if route is None:
+            return [self.execute(primitive, payload) for payload in payloads]
+
+        for payload in payloads:
+            validation = self.validate(primitive, payload)
+            if not validation.ok:
+                raise AdapterError("validation failed: " + ", ".join(validation.issues))
+
+        results: list[ExecutionResult] = []
+        for start in range(0, len(payloads), self.max_batch_size):
+            chunk = payloads[start : start + self.max_batch_size]
+            ids = [str(uuid.uuid4()) for _ in chunk]
+            try:
+                body = self._call(
+                    "POST",
+                    route,
+                    {"items": chunk, "idempotency_keys": ids},
+                    idempotency_key=f"batch-{uuid.uuid4()}",
+                ).json()
+                responses = body.get("results") if isinstance(body, dict) else None
+                if not isinstance(responses, list):
+                    raise AdapterError("invalid batch response body")
+                if len(responses) != len(chunk):
+                    raise AdapterError("batch response size mismatch")
+                chunk_results = [
+                    ExecutionResult(execution_id, primitive, ok=True, response=item)
+                    for execution_id, item in zip(ids, responses)
+                ]
+            except ValueError:
+                chunk_results = [
+                    ExecutionResult(execution_id, primitive, ok=False, error="invalid response body")
+                    for execution_id in ids
+                ]
+            except AdapterError as exc:
+                chunk_results = [
+                    ExecutionResult(execution_id, primitive, ok=False, error=str(exc))
+                    for execution_id in ids
+                ]
+            for result, payload in zip(chunk_results, chunk):
+                self._record(result, payload)
+            results.extend(chunk_results)
+        return results
+
+    def rollback(self, execution_id: str) -> RollbackOutcome:
+        """実行済み操作を補償する。
+
+        Args:
+            execution_id: execute() が返した実行ID
+
+        Returns:
+            RollbackOutcome: 補償結果
+
+        Note:
+            - 失敗した実行（ok=False）は補償せず skipped=True を返す
+        """
+        entry = self.audit(execution_id)
+        if entry is None:
+            return RollbackOutcome(execution_id, ok=False, error="unknown execution_id")
+        if entry.rolled_back:
+            return RollbackOutcome(execution_id, ok=True)
+        if not entry.ok:
+            return RollbackOutcome(execution_id, ok=True, skipped=True)
+
+        path = self.rollback_route.format(execution_id=execution_id)
+        try:
+            self._call(
+                "POST",
+                path,
+                {"primitive": entry.primitive, "input": entry.input},
+                idempotency_key=f"rollback-{execution_id}",
+            )
+        except AdapterError as exc:
+            return RollbackOutcome(execution_id, ok=False, error=str(exc))
+
+        with self._audit_lock:
+            self._audit[execution_id] = replace(entry, rolled_back=True)
+        return RollbackOutcome(execution_id, ok=True)
+
+    def audit(self, execution_id: str) -> AuditEntry | None:
+        """実行の監査情報を返す。
+
+        Args:
+            execution_id: 実行ID
+
+        Returns:
+            AuditEntry | None: 未知の実行IDの場合は None
+        """
+        with self._audit_lock:
+            return self._audit.get(execution_id)
+
+    def close(self) -> None:
+        """接続プールを閉じる。"""
+        self.pool.close()
+
+    def _call(
+        self, method: str, path: str, payload: Any, idempotency_key: str | None = None
+    ) -> HttpResponse:
+        """流量制御・遮断・再試行を適用して API を呼び出す。
+
+        Note:
+            - 429 と送信前の失敗はリモート未処理のため常に再試行する
+            - 5xx・応答待ちの失敗は、冪等なメソッドか Idempotency-Key で重複排除される場合のみ再試行する
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
+        retry_unsafe = method in IDEMPOTENT_METHODS or (
+            idempotency_key is not None and self.supports_idempotency_key
+        )
+        last_error = "no attempt"
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"circuit open: {self.pool.host}")
+            self.rate_limiter.acquire()
+
+            try:
+                response = self.pool.request(method, path, body, headers)
+            except (OSError, http.client.HTTPException) as exc:
+                self.breaker.record_failure()
+                last_error = f"connection error: {exc}"
+                if not (retry_unsafe or isinstance(exc, RequestNotSentError)):
+                    break
+                self._backoff(attempt, None)
+                continue
+
+            if response.status == 429:
+                # 流量制限は障害ではないため遮断判定には数えない。
+                self.breaker.record_success()
+                last_error = "rate limited"
+                self._backoff(attempt, response.headers.get("retry-after"))
+                continue
+            if response.status >= 500:
+                self.breaker.record_failure()
+                last_error = f"server error: {response.status}"
+                if not retry_unsafe:
+                    break
+                self._backoff(attempt, None)
+                continue
+
+            self.breaker.record_success()
+            if response.status >= 400:
+                raise AdapterError(f"request rejected: {response.status}")
+            return response
+
+        if last_error == "rate limited":
+            raise RateLimitedError(f"rate limited after {self.max_retries} retries")
+        raise AdapterError(last_error)
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> None:
+        """再試行前に待機する。"""
+        if attempt >= self.max_retries:
+            return
+        try:
+            delay = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            delay = None
+        self._sleep(delay if delay is not None else self.retry_backoff * (2**attempt))
+
+    def _record(self, result: ExecutionResult, payload: dict[str, Any]) -> None:
+        """実行結果を監査情報として保持する。"""
+        entry = AuditEntry(
+            execution_id=result.execution_id,
+            primitive=result.primitive,
+            input=dict(payload),
+            ok=result.ok,
+            executed_at=datetime.now(timezone.utc).isoformat(),
+            error=result.error,
+        )
+        with self._audit_lock:
+            self._audit[result.execution_id] = entry
+            while len(self._audit) > self.audit_capacity:
+                self._audit.popitem(last=False)
@@ -0,0 +1,211 @@
+"""配信頻度上限を判定するスライディングウィンドウ型カウンタを提供する。
+
+入出力: (customer_ids, limit) -> 許可マスク(np.ndarray[bool]) / save(path), load(path)。
+制約:
+    - 顧客ごとのメモリは buckets × dtype バイトに固定する（タイムスタンプ列を持たない）
+    - 顧客IDは 0 以上 capacity 未満の整数とし、範囲外は常に拒否する
+    - limit は dtype の最大値以下とする
+
+Note:
+    - ウィンドウを buckets 個の固定幅バケットに分割し、列 = 時刻バケット番号 % buckets で循環させる
+    - 時刻が新しいバケットへ進んだ時点で、期限切れ列を全顧客分まとめてゼロクリアする
+    - 永続化は一時ファイルへ書き出してから置換し、書きかけファイルを残さない
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Iterable
+
+import numpy as np
+
+
+class FrequencyCapError(Exception):
+    """頻度上限ストアの設定・永続化の不正を表す例外。"""
+
+
+class FrequencyCapStore:
+    """固定幅配列でバケット化した頻度カウンタを保持するクラス。"""
+
+    def __init__(
+        self,
+        capacity: int,
+        window_seconds: float = 7 * 24 * 3600,
+        buckets: int = 7,
+        dtype: str = "uint8",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """空のカウンタで初期化する。
+
+        Args:
+            capacity: 顧客ID数の上限
+            window_seconds: スライディングウィンドウ幅（秒）
+            buckets: ウィンドウの分割数（判定粒度 = window_seconds / buckets）
+            dtype: バケットごとのカウンタ型
+            clock: 現在時刻(UNIX秒)を返す関数
+
+        Raises:
+            FrequencyCapError: 引数が不正な場合
+        """
+        if capacity < 0 or buckets < 1 or window_seconds <= 0:
+            raise FrequencyCapError("capacity/buckets/window_seconds are invalid")
+
+        self.capacity = capacity
+        self.window_seconds = float(window_seconds)
+        self.buckets = buckets
+        self.bucket_seconds = self.window_seconds / buckets
+        self.clock = clock
+        self._counts = np.zeros((capacity, buckets), dtype=np.dtype(dtype))
+        self._current_bucket = self._bucket_of(clock())
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_per_customer(self) -> int:
+        """顧客1件あたりのカウンタ領域サイズを返す。"""
+        return self.buckets * self._counts.dtype.itemsize
+
+    def counts(self, customer_ids: Iterable[int] | np.ndarray, now: float | None = None) -> np.ndarray:
+        """ウィンドウ内の送信回数を返す。
+
+        Args:
+            customer_ids: 顧客ID一覧
+            now: 判定時刻（未指定時は clock()）
+
+        Returns:
+            np.ndarray: 顧客ごとの送信回数（範囲外IDは 0）
+        """
+        ids = np.asarray(customer_ids, dtype=np.int64).ravel()
+        with self._lock:
+            self._advance(self.clock() if now is None else now)
+            in_range = (ids >= 0) & (ids < self.capacity)
+            totals = np.zeros(ids.shape, dtype=np.int64)
+            totals[in_range] = self._counts[ids[in_range]].sum(axis=1, dtype=np.int64)
+        return totals
+
+    def check_and_increment(
+        self,
+        customer_ids: Iterable[int] | np.ndarray,
+        limit: int,
+        now: float | None = None,
+    ) -> np.ndarray:
+        """上限未満の顧客のみ許可し、許可分のカウンタを1件ずつ加算する。
+
+        Args:
+            customer_ids: 送信予定の顧客ID一覧
+            limit: ウィンドウ内の最大送信回数
+            now: 判定時刻（未指定時は clock()）
+
+        Returns:
+            np.ndarray: 入力順に対応する許可マスク
+
+        Raises:
+            FrequencyCapError: limit が dtype で表現できない場合
+
+        Note:
+            - 同一バッチ内の重複IDは出現順に1回ずつ数える
+            - 判定と加算は1ロック内で行い、並行呼び出しでも上限を超えない
+        """
+        if limit < 0 or limit > np.iinfo(self._counts.dtype).max:
+            raise FrequencyCapError(f"limit out of range for {self._counts.dtype}: {limit}")
+
+        ids = np.asarray(customer_ids, dtype=np.int64).ravel()
+        in_range = (ids >= 0) & (ids < self.capacity)
+        rank = _occurrence_rank(ids)
+
+        with self._lock:
+            column = self._advance(self.clock() if now is None else now)
+            totals = np.zeros(ids.shape, dtype=np.int64)
+            totals[in_range] = self._counts[ids[in_range]].sum(axis=1, dtype=np.int64)
+            allowed = in_range & (totals + rank < limit)
+            np.add.at(self._counts[:, column], ids[allowed], 1)
+        return allowed
+
+    def save(self, path: str | Path) -> None:
+        """カウンタを .npz 形式でローカルディスクへ保存する。
+
+        Args:
+            path: 保存先パス
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with self._lock:
+            with tmp.open("wb") as fp:
+                np.savez(
+                    fp,
+                    counts=self._counts,
+                    meta=np.array(
+                        [self.window_seconds, float(self.buckets), float(self._current_bucket)]
+                    ),
+                )
+                fp.flush()
+                os.fsync(fp.fileno())
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path: str | Path, clock: Callable[[], float] = time.time) -> FrequencyCapStore:
+        """save() で保存したカウンタを復元する。
+
+        Args:
+            path: 保存済みファイルのパス
+            clock: 現在時刻(UNIX秒)を返す関数
+
+        Returns:
+            FrequencyCapStore: 復元したストア
+
+        Raises:
+            FrequencyCapError: ファイル形式が不正な場合
+        """
+        with np.load(Path(path)) as data:
+            if "counts" not in data or "meta" not in data:
+                raise FrequencyCapError(f"invalid frequency cap file: {path}")
+            counts = data["counts"]
+            window_seconds, buckets, current_bucket = data["meta"].tolist()
+
+        store = cls(
+            capacity=counts.shape[0],
+            window_seconds=window_seconds,
+            buckets=int(buckets),
+            dtype=counts.dtype.name,
+            clock=clock,
+        )
+        store._counts = counts
+        store._current_bucket = int(current_bucket)
+        # 停止中に経過した期間のバケットを失効させる。
+        store._advance(clock())
+        return store
+
+    def _bucket_of(self, now: float) -> int:
+        """時刻を絶対バケット番号へ変換する。"""
+        return int(now // self.bucket_seconds)
+
+    def _advance(self, now: float) -> int:
+        """現在バケットまで進め、期限切れ列をクリアして現在列を返す。"""
+        bucket = self._bucket_of(now)
+        if bucket > self._current_bucket:
+            expired = min(bucket - self._current_bucket, self.buckets)
+            for offset in range(1, expired + 1):
+                self._counts[:, (self._current_bucket + offset) % self.buckets] = 0
+            self._current_bucket = bucket
+        return self._current_bucket % self.buckets
+
+
+def _occurrence_rank(ids: np.ndarray) -> np.ndarray:
+    """各IDが同一配列内で何回目の出現かを 0 始まりで返す。"""
+    if ids.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    positions = np.arange(ids.size)
+    is_first = np.empty(ids.size, dtype=bool)
+    is_first[0] = True
+    is_first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+    group_start = np.maximum.accumulate(np.where(is_first, positions, 0))
+
+    rank = np.empty(ids.size, dtype=np.int64)
+    rank[order] = positions - group_start
+    return rank
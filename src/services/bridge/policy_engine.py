@@ -0,0 +1,268 @@
+"""Apply 前段で同意・除外条件を判定する Policy Engine を提供する。
+
+入出力: ポリシー定義(dict) -> CompiledPolicy / (primitive, customer_ids) -> PolicyDecision。
+制約:
+    - 判定時に DB を参照しない（定義はすべてメモリ上のビットマップへコンパイルする）
+    - 顧客IDは 0 以上 capacity 未満の整数とし、範囲外は同意なしとして扱う
+    - ルール未定義の Primitive は全件拒否する（安全側に倒す）
+
+Note:
+    - セグメント判定はビットマップへのベクトル化インデックスで行い、顧客ごとのループを持たない
+    - reload() は新スナップショットを別途コンパイルしてから参照を差し替えるため、判定を止めない
+    - 判定中の呼び出しは開始時点のスナップショットを使い続ける
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import threading
+from typing import Any, Iterable
+
+import numpy as np
+
+
+class PolicyError(Exception):
+    """ポリシー定義の不正を表す例外。"""
+
+
+@dataclass(frozen=True)
+class PolicyDecision:
+    """セグメント単位の判定結果を表すデータ。
+
+    Note:
+        - 各配列は入力 customer_ids と同じ順序・長さで対応する
+    """
+
+    version: str
+    customer_ids: np.ndarray
+    allowed: np.ndarray
+    no_consent: np.ndarray
+    suppressed: np.ndarray
+
+    @property
+    def allowed_ids(self) -> np.ndarray:
+        """実行可能な顧客ID配列を返す。"""
+        return self.customer_ids[self.allowed]
+
+    @property
+    def blocked_ids(self) -> np.ndarray:
+        """拒否された顧客ID配列を返す。"""
+        return self.customer_ids[~self.allowed]
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    """Primitive 1件分のコンパイル済みビットマップ。"""
+
+    consent: np.ndarray
+    suppressed: np.ndarray
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """コンパイル済みのポリシースナップショット。"""
+
+    version: str
+    capacity: int
+    rules: dict[str, _CompiledRule]
+
+
+def compile_policy(definition: dict[str, Any]) -> CompiledPolicy:
+    """ポリシー定義をビットマップ索引へコンパイルする。
+
+    Args:
+        definition: version/capacity/consent/suppression/rules を持つ辞書
+
+    Returns:
+        CompiledPolicy: 判定用スナップショット
+
+    Raises:
+        PolicyError: 定義が不正な場合
+
+    Note:
+        - consent: 同意種別 -> 同意済み顧客ID一覧
+        - suppression: 除外リスト名 -> 対象顧客ID一覧
+        - rules: Primitive名 -> {"consent": 同意種別|None, "exclude": [除外リスト名]}
+    """
+    if not isinstance(definition, dict):
+        raise PolicyError("policy definition must be an object")
+
+    capacity = definition.get("capacity")
+    if not isinstance(capacity, int) or capacity < 0:
+        raise PolicyError("capacity must be a non-negative integer")
+
+    consent = {
+        name: _to_bitmap(ids, capacity, f"consent.{name}")
+        for name, ids in _section(definition, "consent").items()
+    }
+    suppression = {
+        name: _to_bitmap(ids, capacity, f"suppression.{name}")
+        for name, ids in _section(definition, "suppression").items()
+    }
+
+    rules: dict[str, _CompiledRule] = {}
+    for primitive, rule in _section(definition, "rules").items():
+        if not isinstance(rule, dict):
+            raise PolicyError(f"rule for {primitive} must be an object")
+        consent_name = rule.get("consent")
+        exclude = rule.get("exclude") or []
+        if consent_name is not None and not isinstance(consent_name, str):
+            raise PolicyError(f"consent for {primitive} must be a string or null")
+        if not isinstance(exclude, list) or not all(isinstance(name, str) for name in exclude):
+            raise PolicyError(f"exclude for {primitive} must be a list of strings")
+
+        if consent_name is None:
+            consent_mask = np.ones(capacity + 1, dtype=bool)
+            consent_mask[capacity] = False
+        elif consent_name in consent:
+            consent_mask = consent[consent_name]
+        else:
+            raise PolicyError(f"unknown consent for {primitive}: {consent_name}")
+
+        suppressed_mask = np.zeros(capacity + 1, dtype=bool)
+        for list_name in exclude:
+            if list_name not in suppression:
+                raise PolicyError(f"unknown suppression for {primitive}: {list_name}")
+            suppressed_mask |= suppression[list_name]
+
+        rules[primitive] = _CompiledRule(consent=consent_mask, suppressed=suppressed_mask)
+
+    return CompiledPolicy(
+        version=str(definition.get("version", "")),
+        capacity=capacity,
+        rules=rules,
+    )
+
+
+def load_policy(path: str | Path) -> CompiledPolicy:
+    """JSON ファイルからポリシーを読み込みコンパイルする。
+
+    Args:
+        path: ポリシー定義 JSON のパス
+
+    Returns:
+        CompiledPolicy: 判定用スナップショット
+    """
+    return compile_policy(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+class PolicyEngine:
+    """コンパイル済みポリシーで同意・除外判定を行うクラス。"""
+
+    def __init__(self, policy: CompiledPolicy) -> None:
+        """初期スナップショットで初期化する。
+
+        Args:
+            policy: コンパイル済みポリシー
+        """
+        self._policy = policy
+        self._reload_lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """現在のスナップショットのバージョンを返す。"""
+        return self._policy.version
+
+    def evaluate(self, primitive: str, customer_ids: Iterable[int] | np.ndarray) -> PolicyDecision:
+        """セグメント全体を一括判定する。
+
+        Args:
+            primitive: 実行予定の Primitive 名
+            customer_ids: 判定対象の顧客ID一覧
+
+        Returns:
+            PolicyDecision: 顧客ごとの判定結果
+        """
+        # 判定中に reload されても一貫した結果になるよう参照を固定する。
+        policy = self._policy
+        ids = np.asarray(customer_ids, dtype=np.int64).ravel()
+        rule = policy.rules.get(primitive)
+
+        if rule is None:
+            denied = np.zeros(ids.shape, dtype=bool)
+            return PolicyDecision(
+                version=policy.version,
+                customer_ids=ids,
+                allowed=denied,
+                no_consent=~denied,
+                suppressed=denied,
+            )
+
+        # 範囲外IDは末尾の番兵スロット（同意なし・除外なし）へ寄せる。
+        in_range = (ids >= 0) & (ids < policy.capacity)
+        slots = np.where(in_range, ids, policy.capacity)
+        consented = rule.consent[slots]
+        suppressed = rule.suppressed[slots]
+
+        return PolicyDecision(
+            version=policy.version,
+            customer_ids=ids,
+            allowed=consented & ~suppressed,
+            no_consent=~consented,
+            suppressed=suppressed,
+        )
+
+    def check(self, primitive: str, customer_id: int) -> bool:
+        """顧客1件を判定する。
+
+        Args:
+            primitive: 実行予定の Primitive 名
+            customer_id: 顧客ID
+
+        Returns:
+            bool: 実行可能な場合 True
+        """
+        policy = self._policy
+        rule = policy.rules.get(primitive)
+        if rule is None or not (0 <= customer_id < policy.capacity):
+            return False
+        return bool(rule.consent[customer_id] and not rule.suppressed[customer_id])
+
+    def reload(self, policy: CompiledPolicy) -> None:
+        """スナップショットを差し替える。
+
+        Args:
+            policy: 新しいコンパイル済みポリシー
+
+        Note:
+            - 参照の差し替えのみを行うため、判定中のリクエストは停止しない
+        """
+        with self._reload_lock:
+            self._policy = policy
+
+    def reload_from(self, path: str | Path) -> None:
+        """JSON ファイルを読み込み、コンパイル後にスナップショットを差し替える。
+
+        Args:
+            path: ポリシー定義 JSON のパス
+        """
+        self.reload(load_policy(path))
+
+
+def _section(definition: dict[str, Any], key: str) -> dict[str, Any]:
+    """定義の辞書型の項目を取り出す（省略時は空）。"""
+    section = definition.get(key) or {}
+    if not isinstance(section, dict):
+        raise PolicyError(f"{key} must be an object")
+    return section
+
+
+def _to_bitmap(ids: Iterable[int], capacity: int, label: str) -> np.ndarray:
+    """顧客ID一覧を bool ビットマップへ変換する（末尾に範囲外用の番兵を持つ）。"""
+    if isinstance(ids, np.ndarray):
+        if ids.dtype.kind not in "iu":
+            raise PolicyError(f"{label} must be a list of integer customer_ids")
+        array = ids.astype(np.int64, copy=False)
+    else:
+        values = list(ids) if isinstance(ids, Iterable) and not isinstance(ids, (str, bytes, dict)) else None
+        if values is None or not all(isinstance(i, int) and not isinstance(i, bool) for i in values):
+            raise PolicyError(f"{label} must be a list of integer customer_ids")
+        array = np.asarray(values, dtype=np.int64)
+    if array.size and (array.min() < 0 or array.max() >= capacity):
+        raise PolicyError(f"{label} contains customer_id out of range")
+
+    bitmap = np.zeros(capacity + 1, dtype=bool)
+    bitmap[array] = True
+    return bitmap
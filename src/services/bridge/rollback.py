@@ -0,0 +1,498 @@
+"""Business Primitive の補償アクションを実行する Rollback 基盤を提供する。
+
+入出力: 適用済みステップ(AppliedStep) の記録 / tx_id -> RollbackResult。
+制約:
+    - 適用済みステップは必ず先行ジャーナル(WAL)へ追記してから補償対象とする
+    - 補償は依存関係の逆順で実行し、依存のないステップ同士は並列実行する
+    - 補償アクションは冪等である前提とし、再起動後の再実行を許容する
+    - depends_on は同一トランザクションで記録済みのステップのみを指せる（循環依存を作れない）
+
+Note:
+    - ジャーナルは JSON Lines 形式で、fsync は sync_every 件ごとにまとめて行う
+    - 末尾の書きかけ行（クラッシュ時の torn write）は読み込み時に破棄し、ファイルからも切り詰める
+    - recover() は再起動時に未完了の Rollback をジャーナルから再開する
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Callable
+
+# Roadmap S2 の Primitive -> Compensating Action 対応表。
+COMPENSATING_ACTIONS: dict[str, str] = {
+    "reserve_offer": "cancel_offer",
+    "send_line_message": "cancel_line_message",
+    "segment_customers": "release_segment",
+}
+
+CompensationHandler = Callable[["AppliedStep"], None]
+
+
+class RollbackError(Exception):
+    """Rollback 処理の失敗を表す例外。"""
+
+
+@dataclass(frozen=True)
+class AppliedStep:
+    """適用済みの Primitive 実行1件を表すデータ。
+
+    Note:
+        - depends_on は同一トランザクション内で先に適用されたステップIDを指す
+        - 依存先より先に依存元（後続ステップ）を補償する
+    """
+
+    step_id: str
+    primitive: str
+    input: dict[str, Any] = field(default_factory=dict)
+    output: dict[str, Any] = field(default_factory=dict)
+    depends_on: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        """ジャーナル保存用の辞書へ変換する。
+
+        Returns:
+            dict[str, Any]: JSON 直列化可能な辞書
+        """
+        return {
+            "step_id": self.step_id,
+            "primitive": self.primitive,
+            "input": self.input,
+            "output": self.output,
+            "depends_on": list(self.depends_on),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> AppliedStep:
+        """ジャーナルの辞書から復元する。
+
+        Args:
+            data: to_dict() 形式の辞書
+
+        Returns:
+            AppliedStep: 復元したステップ
+        """
+        return cls(
+            step_id=str(data["step_id"]),
+            primitive=str(data["primitive"]),
+            input=dict(data.get("input") or {}),
+            output=dict(data.get("output") or {}),
+            depends_on=tuple(data.get("depends_on") or ()),
+        )
+
+
+@dataclass(frozen=True)
+class RollbackResult:
+    """1トランザクション分の Rollback 結果を表すデータ。"""
+
+    tx_id: str
+    ok: bool
+    compensated: list[str]
+    failed: list[str]
+    blocked: list[str]
+
+
+@dataclass
+class _TxState:
+    """ジャーナルから再構築したトランザクション状態。"""
+
+    status: str = "applying"
+    steps: dict[str, AppliedStep] = field(default_factory=dict)
+    compensated: set[str] = field(default_factory=set)
+
+
+class RollbackJournal:
+    """適用済みステップと補償進捗を記録する先行書き込みジャーナル。"""
+
+    def __init__(self, path: str | Path, sync_every: int = 64) -> None:
+        """ジャーナルファイルを開き、既存内容から状態を再構築する。
+
+        Args:
+            path: ジャーナルファイルのパス
+            sync_every: fsync をまとめる追記件数（1 で毎回 fsync）
+
+        Raises:
+            ValueError: sync_every が1未満の場合
+        """
+        if sync_every < 1:
+            raise ValueError("sync_every must be >= 1")
+
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._transactions: dict[str, _TxState] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def record_applied(self, tx_id: str, step: AppliedStep) -> None:
+        """適用済みステップを追記する。
+
+        Args:
+            tx_id: トランザクションID
+            step: 適用済みステップ
+
+        Raises:
+            RollbackError: 完了済みトランザクションへ追記しようとした場合
+        """
+        state = self._transactions.get(tx_id)
+        if state is not None and state.status in ("committed", "rolled_back"):
+            raise RollbackError(f"transaction already closed: {tx_id}")
+        self._append({"op": "apply", "tx": tx_id, "step": step.to_dict()})
+
+    def record_commit(self, tx_id: str) -> None:
+        """トランザクションの正常完了を記録する。
+
+        Args:
+            tx_id: トランザクションID
+        """
+        self._append({"op": "commit", "tx": tx_id}, force_sync=True)
+
+    def record_rollback_begin(self, tx_id: str) -> None:
+        """Rollback 開始を記録し、それまでの追記を永続化する。
+
+        Args:
+            tx_id: トランザクションID
+        """
+        self._append({"op": "rollback_begin", "tx": tx_id}, force_sync=True)
+
+    def record_compensated(self, tx_id: str, step_id: str) -> None:
+        """1ステップの補償完了を記録する。
+
+        Args:
+            tx_id: トランザクションID
+            step_id: 補償済みステップID
+        """
+        self._append({"op": "compensated", "tx": tx_id, "step_id": step_id})
+
+    def record_rollback_end(self, tx_id: str) -> None:
+        """Rollback 完了を記録する。
+
+        Args:
+            tx_id: トランザクションID
+        """
+        self._append({"op": "rollback_end", "tx": tx_id}, force_sync=True)
+
+    def sync(self) -> None:
+        """バッファ済みの追記を fsync で永続化する。"""
+        with self._lock:
+            self._sync_locked()
+
+    def close(self) -> None:
+        """未同期の追記を永続化してファイルを閉じる。"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync_locked()
+            self._file.close()
+
+    def status(self, tx_id: str) -> str | None:
+        """トランザクションの状態を返す。
+
+        Args:
+            tx_id: トランザクションID
+
+        Returns:
+            str | None: applying/rolling_back/rolled_back/committed。未記録は None
+        """
+        state = self._transactions.get(tx_id)
+        return state.status if state else None
+
+    def has_step(self, tx_id: str, step_id: str) -> bool:
+        """ステップが記録済みか返す。
+
+        Args:
+            tx_id: トランザクションID
+            step_id: ステップID
+
+        Returns:
+            bool: 記録済み（補償済みを含む）の場合 True
+        """
+        state = self._transactions.get(tx_id)
+        return state is not None and step_id in state.steps
+
+    def pending_steps(self, tx_id: str) -> list[AppliedStep]:
+        """未補償の適用済みステップを適用順で返す。
+
+        Args:
+            tx_id: トランザクションID
+
+        Returns:
+            list[AppliedStep]: 未補償ステップ一覧
+        """
+        state = self._transactions.get(tx_id)
+        if state is None:
+            return []
+        return [
+            step
+            for step_id, step in state.steps.items()
+            if step_id not in state.compensated
+        ]
+
+    def transactions_with_status(self, *statuses: str) -> list[str]:
+        """指定状態のトランザクションIDを記録順で返す。
+
+        Args:
+            statuses: 抽出対象の状態
+
+        Returns:
+            list[str]: トランザクションID一覧
+        """
+        return [
+            tx_id
+            for tx_id, state in self._transactions.items()
+            if state.status in statuses
+        ]
+
+    def _append(self, entry: dict[str, Any], force_sync: bool = False) -> None:
+        """エントリを追記し、メモリ上の状態にも反映する。"""
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._apply_entry(entry)
+            self._pending += 1
+            if force_sync or self._pending >= self.sync_every:
+                self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        """ロック取得済みの前提で flush + fsync を行う。"""
+        if self._pending == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def _replay(self) -> None:
+        """既存ジャーナルを読み込み、トランザクション状態を再構築する。
+
+        Note:
+            - 書きかけ・破損行以降は切り詰め、次の追記が破損行と同じ行に連結されないようにする
+        """
+        if not self.path.exists():
+            return
+
+        valid_end = 0
+        with self.path.open("rb") as fp:
+            for line in fp:
+                # 改行で終わらない末尾行はクラッシュ時の書きかけとして破棄する。
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._apply_entry(entry)
+                valid_end += len(line)
+
+        if self.path.stat().st_size > valid_end:
+            with self.path.open("r+b") as fp:
+                fp.truncate(valid_end)
+                fp.flush()
+                os.fsync(fp.fileno())
+
+    def _apply_entry(self, entry: dict[str, Any]) -> None:
+        """ジャーナルエントリ1件をメモリ上の状態へ反映する。"""
+        tx_id = entry["tx"]
+        state = self._transactions.setdefault(tx_id, _TxState())
+        op = entry["op"]
+
+        if op == "apply":
+            step = AppliedStep.from_dict(entry["step"])
+            state.steps[step.step_id] = step
+        elif op == "commit":
+            state.status = "committed"
+        elif op == "rollback_begin":
+            state.status = "rolling_back"
+        elif op == "compensated":
+            state.compensated.add(entry["step_id"])
+        elif op == "rollback_end":
+            state.status = "rolled_back"
+
+
+class RollbackExecutor:
+    """ジャーナルに基づき補償アクションを依存逆順・並列で実行する。"""
+
+    def __init__(
+        self,
+        journal: RollbackJournal,
+        handlers: dict[str, CompensationHandler],
+        compensating_actions: dict[str, str] | None = None,
+        max_workers: int = 8,
+    ) -> None:
+        """RollbackExecutor を初期化する。
+
+        Args:
+            journal: 先行書き込みジャーナル
+            handlers: 補償アクション名 -> 実行関数
+            compensating_actions: Primitive名 -> 補償アクション名（未指定時は既定表）
+            max_workers: 補償の最大並列数
+        """
+        self.journal = journal
+        self.handlers = dict(handlers)
+        self.compensating_actions = dict(compensating_actions or COMPENSATING_ACTIONS)
+        self.max_workers = max_workers
+
+    def record_applied(self, tx_id: str, step: AppliedStep) -> None:
+        """Primitive 適用成功をジャーナルへ記録する。
+
+        Args:
+            tx_id: トランザクションID
+            step: 適用済みステップ
+
+        Raises:
+            RollbackError: 補償アクションが未定義の Primitive、記録済みのステップID、
+                未記録のステップ（自身・後続を含む）への依存の場合
+        """
+        # 補償できない操作を記録前に弾き、Rollback 時の取りこぼしを防ぐ。
+        self._handler_for(step)
+        if self.journal.has_step(tx_id, step.step_id):
+            raise RollbackError(f"step already recorded: {step.step_id}")
+        # 依存先を記録済みステップに限ることで、自己依存・循環依存を記録させない。
+        unknown = [dep for dep in step.depends_on if not self.journal.has_step(tx_id, dep)]
+        if unknown:
+            raise RollbackError(f"step {step.step_id} depends on unrecorded steps: {unknown}")
+        self.journal.record_applied(tx_id, step)
+
+    def commit(self, tx_id: str) -> None:
+        """トランザクションを正常完了として閉じる。
+
+        Args:
+            tx_id: トランザクションID
+        """
+        self.journal.record_commit(tx_id)
+
+    def rollback(self, tx_id: str) -> RollbackResult:
+        """未補償ステップを依存逆順で補償する。
+
+        Args:
+            tx_id: トランザクションID
+
+        Returns:
+            RollbackResult: 補償結果
+
+        Raises:
+            RollbackError: 完了済み（commit 済み）トランザクションの場合
+
+        Note:
+            - 補償に失敗したステップの依存先は blocked として補償しない
+            - 循環依存（旧ジャーナル等）で補償順を決められないステップも blocked とする
+            - 失敗が残る場合は rolling_back のまま残し、recover() で再試行する
+        """
+        status = self.journal.status(tx_id)
+        if status == "committed":
+            raise RollbackError(f"transaction already committed: {tx_id}")
+        if status == "rolled_back":
+            return RollbackResult(tx_id=tx_id, ok=True, compensated=[], failed=[], blocked=[])
+
+        if status != "rolling_back":
+            self.journal.record_rollback_begin(tx_id)
+
+        steps = {step.step_id: step for step in self.journal.pending_steps(tx_id)}
+        compensated, failed, blocked = self._compensate(tx_id, steps)
+
+        ok = not failed and not blocked
+        if ok:
+            self.journal.record_rollback_end(tx_id)
+        else:
+            self.journal.sync()
+
+        return RollbackResult(
+            tx_id=tx_id,
+            ok=ok,
+            compensated=compensated,
+            failed=failed,
+            blocked=blocked,
+        )
+
+    def recover(self, include_applying: bool = True) -> list[RollbackResult]:
+        """再起動時に未完了トランザクションの Rollback を再開する。
+
+        Args:
+            include_applying: 適用途中で停止したトランザクションも Rollback するか
+
+        Returns:
+            list[RollbackResult]: 再開した Rollback の結果一覧
+
+        Note:
+            - 適用途中のトランザクションは再開できないため、既定で補償対象とする
+        """
+        statuses = ("rolling_back", "applying") if include_applying else ("rolling_back",)
+        return [self.rollback(tx_id) for tx_id in self.journal.transactions_with_status(*statuses)]
+
+    def _compensate(
+        self,
+        tx_id: str,
+        steps: dict[str, AppliedStep],
+    ) -> tuple[list[str], list[str], list[str]]:
+        """依存グラフを逆順に辿り、準備のできたステップから並列に補償する。"""
+        # remaining[s]: s に依存する未補償ステップ数。0 になったら s を補償できる。
+        remaining: dict[str, int] = {step_id: 0 for step_id in steps}
+        for step in steps.values():
+            for dep in step.depends_on:
+                if dep in remaining:
+                    remaining[dep] += 1
+
+        compensated: list[str] = []
+        failed: list[str] = []
+        blocked: set[str] = set()
+        ready = [step_id for step_id, count in remaining.items() if count == 0]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running: dict[Future[None], str] = {}
+            while ready or running:
+                for step_id in ready:
+                    running[pool.submit(self._run_handler, steps[step_id])] = step_id
+                ready = []
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    if future.exception() is not None:
+                        failed.append(step_id)
+                        blocked.update(self._ancestors(step_id, steps))
+                        continue
+
+                    self.journal.record_compensated(tx_id, step_id)
+                    compensated.append(step_id)
+                    for dep in steps[step_id].depends_on:
+                        if dep not in remaining or dep in blocked:
+                            continue
+                        remaining[dep] -= 1
+                        if remaining[dep] == 0:
+                            ready.append(dep)
+
+        # 循環依存で一度も準備完了にならなかったステップも未補償として報告する。
+        settled = set(compensated) | set(failed)
+        blocked.update(step_id for step_id in steps if step_id not in settled)
+        return compensated, failed, sorted(blocked)
+
+    def _run_handler(self, step: AppliedStep) -> None:
+        """ステップに対応する補償アクションを実行する。"""
+        self._handler_for(step)(step)
+
+    def _handler_for(self, step: AppliedStep) -> CompensationHandler:
+        """Primitive に対応する補償ハンドラを返す。"""
+        action = self.compensating_actions.get(step.primitive)
+        handler = self.handlers.get(action) if action else None
+        if handler is None:
+            raise RollbackError(f"no compensating action for primitive: {step.primitive}")
+        return handler
+
+    @staticmethod
+    def _ancestors(step_id: str, steps: dict[str, AppliedStep]) -> set[str]:
+        """step_id が（推移的に）依存する全ステップIDを返す。"""
+        result: set[str] = set()
+        stack = list(steps[step_id].depends_on)
+        while stack:
+            dep = stack.pop()
+            if dep in result or dep not in steps:
+                continue
+            result.add(dep)
+            stack.extend(steps[dep].depends_on)
+        return result
@@ -0,0 +1,331 @@
+"""segment_customers を列指向配列で評価する Segment Engine を提供する。
+
+入出力: 条件定義(dict) -> Segment(ビットマップ) / 列ディレクトリ -> CustomerColumns。
+制約:
+    - 顧客IDは行番号（0 始まりの連番）とし、PolicyEngine/FrequencyCapStore と共有する
+    - 列は1列1ファイルの .npy として保存し、読み込みは memory map で行う
+    - 条件は JSON 互換の辞書で受け取り、未知の列・演算子・列の型に合わない値はコンパイル時に拒否する
+
+Note:
+    - 条件は評価前に関数ツリーへコンパイルし、行ごとの Python ループを持たない
+    - 葉条件と複合条件の評価結果はビットマップとして LRU キャッシュする
+    - Segment 同士は &, |, ~ で結合でき、結合結果もビットマップのまま扱える
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import reduce
+import json
+from pathlib import Path
+import threading
+from typing import Any, Callable
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+
+_COMPARATORS: dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+# 列の dtype.kind -> 比較値として受け付ける Python 型（bool は数値列に使わない）。
+_VALUE_TYPES: dict[str, tuple[type, ...]] = {
+    "b": (bool,),
+    "i": (int, float),
+    "u": (int, float),
+    "f": (int, float),
+    "U": (str,),
+    "S": (str,),
+    "M": (str,),
+}
+
+
+class SegmentError(Exception):
+    """セグメント条件・列データの不正を表す例外。"""
+
+
+class CustomerColumns:
+    """顧客属性を列ごとの配列として保持するクラス。"""
+
+    def __init__(self, columns: dict[str, np.ndarray], version: str = "") -> None:
+        """列配列で初期化する。
+
+        Args:
+            columns: 列名 -> 1次元配列（全列同じ長さ）
+            version: 列データのバージョン（キャッシュキーに含める）
+
+        Raises:
+            SegmentError: 列が空または長さが揃っていない場合
+        """
+        if not columns:
+            raise SegmentError("columns must not be empty")
+        lengths = {len(array) for array in columns.values()}
+        if len(lengths) != 1:
+            raise SegmentError("all columns must have the same length")
+
+        self.columns = columns
+        self.version = version
+        self.size = lengths.pop()
+
+    @classmethod
+    def open(cls, directory: str | Path) -> CustomerColumns:
+        """列ディレクトリを memory map で開く。
+
+        Args:
+            directory: write() で作成したディレクトリ
+
+        Returns:
+            CustomerColumns: 読み取り専用の列データ
+
+        Note:
+            - ファイル本体は参照時にページ単位で読み込まれるため、起動時の読み込みは発生しない
+        """
+        root = Path(directory)
+        manifest = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+        columns = {
+            name: np.load(root / f"{name}.npy", mmap_mode="r")
+            for name in manifest["columns"]
+        }
+        return cls(columns, version=str(manifest.get("version", "")))
+
+    def write(self, directory: str | Path) -> None:
+        """列データを1列1ファイルの .npy として保存する。
+
+        Args:
+            directory: 保存先ディレクトリ
+        """
+        root = Path(directory)
+        root.mkdir(parents=True, exist_ok=True)
+        for name, array in self.columns.items():
+            np.save(root / f"{name}.npy", np.ascontiguousarray(array))
+        manifest = {"version": self.version, "size": self.size, "columns": list(self.columns)}
+        (root / MANIFEST_NAME).write_text(
+            json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+
+@dataclass(frozen=True)
+class Segment:
+    """条件に一致した顧客集合をビットマップで表すデータ。"""
+
+    mask: np.ndarray
+
+    def __and__(self, other: Segment) -> Segment:
+        """積集合を返す。"""
+        return Segment(self.mask & other.mask)
+
+    def __or__(self, other: Segment) -> Segment:
+        """和集合を返す。"""
+        return Segment(self.mask | other.mask)
+
+    def __invert__(self) -> Segment:
+        """補集合を返す。"""
+        return Segment(~self.mask)
+
+    @property
+    def count(self) -> int:
+        """該当顧客数を返す。"""
+        return int(np.count_nonzero(self.mask))
+
+    @property
+    def customer_ids(self) -> np.ndarray:
+        """該当顧客IDを昇順で返す。"""
+        return np.flatnonzero(self.mask)
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """コンパイル済み条件を表すデータ。
+
+    Note:
+        - key は条件の正規化表現で、キャッシュキーに用いる
+    """
+
+    key: str
+    children: tuple[CompiledCondition, ...]
+    combine: Callable[[list[np.ndarray]], np.ndarray] | None
+    leaf: Callable[[CustomerColumns], np.ndarray] | None
+
+
+def compile_conditions(conditions: dict[str, Any], columns: CustomerColumns) -> CompiledCondition:
+    """条件定義を評価用のツリーへコンパイルする。
+
+    Args:
+        conditions: {"all"|"any": [...]}, {"not": {...}}, {"column", "op", "value"} の入れ子
+        columns: 参照先の列データ（列名の検証に使う）
+
+    Returns:
+        CompiledCondition: コンパイル済み条件
+
+    Raises:
+        SegmentError: 未知の列・演算子、列の型に合わない値や構造不正の場合
+
+    Note:
+        - 演算子: ==, !=, <, <=, >, >=, in, between
+    """
+    if not isinstance(conditions, dict):
+        raise SegmentError("condition must be an object")
+
+    for group, operator in (("all", np.logical_and), ("any", np.logical_or)):
+        if group in conditions:
+            items = conditions[group]
+            if not isinstance(items, list) or not items:
+                raise SegmentError(f"'{group}' must be a non-empty list")
+            children = tuple(compile_conditions(item, columns) for item in items)
+            # 子の順序に依存せず同じキャッシュキーになるよう整列する。
+            keys = sorted(child.key for child in children)
+            return CompiledCondition(
+                key=f"{group}({','.join(keys)})",
+                children=children,
+                combine=lambda masks, operator=operator: reduce(operator, masks),
+                leaf=None,
+            )
+
+    if "not" in conditions:
+        child = compile_conditions(conditions["not"], columns)
+        return CompiledCondition(
+            key=f"not({child.key})",
+            children=(child,),
+            combine=lambda masks: ~masks[0],
+            leaf=None,
+        )
+
+    return _compile_leaf(conditions, columns)
+
+
+class SegmentEngine:
+    """列データに対してセグメント条件を評価するクラス。"""
+
+    def __init__(self, columns: CustomerColumns, cache_size: int = 256) -> None:
+        """SegmentEngine を初期化する。
+
+        Args:
+            columns: 評価対象の列データ
+            cache_size: ビットマップキャッシュの最大件数（0 で無効）
+        """
+        self.columns = columns
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def segment_customers(self, conditions: dict[str, Any]) -> Segment:
+        """条件に一致する顧客セグメントを返す。
+
+        Args:
+            conditions: compile_conditions() 形式の条件定義
+
+        Returns:
+            Segment: 該当顧客のビットマップ
+        """
+        return self.evaluate(compile_conditions(conditions, self.columns))
+
+    def evaluate(self, compiled: CompiledCondition) -> Segment:
+        """コンパイル済み条件を評価する。
+
+        Args:
+            compiled: compile_conditions() の戻り値
+
+        Returns:
+            Segment: 該当顧客のビットマップ
+        """
+        return Segment(self._evaluate(compiled))
+
+    def clear_cache(self) -> None:
+        """ビットマップキャッシュを破棄する。"""
+        with self._lock:
+            self._cache.clear()
+
+    def _evaluate(self, compiled: CompiledCondition) -> np.ndarray:
+        """キャッシュを参照しながら条件ツリーを評価する。"""
+        key = f"{self.columns.version}:{compiled.key}"
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        if compiled.leaf is not None:
+            mask = compiled.leaf(self.columns)
+        else:
+            mask = compiled.combine([self._evaluate(child) for child in compiled.children])
+
+        # キャッシュ上の配列が呼び出し側で書き換えられないよう読み取り専用にする。
+        mask.flags.writeable = False
+        self._cache_put(key, mask)
+        return mask
+
+    def _cache_get(self, key: str) -> np.ndarray | None:
+        """キャッシュからビットマップを取得する。"""
+        with self._lock:
+            mask = self._cache.get(key)
+            if mask is not None:
+                self._cache.move_to_end(key)
+            return mask
+
+    def _cache_put(self, key: str, mask: np.ndarray) -> None:
+        """ビットマップをキャッシュへ追加し、上限超過分を破棄する。"""
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = mask
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def _compile_leaf(condition: dict[str, Any], columns: CustomerColumns) -> CompiledCondition:
+    """列比較1件をコンパイルする。"""
+    name = condition.get("column")
+    op = condition.get("op")
+    value = condition.get("value")
+    if name not in columns.columns:
+        raise SegmentError(f"unknown column: {name}")
+    kind = columns.columns[name].dtype.kind
+
+    if op in _COMPARATORS:
+        _check_value(name, kind, value)
+        comparator = _COMPARATORS[op]
+
+        def leaf(data: CustomerColumns) -> np.ndarray:
+            return comparator(data.columns[name], value)
+
+    elif op == "in":
+        if not isinstance(value, list):
+            raise SegmentError("'in' requires a list value")
+        for item in value:
+            _check_value(name, kind, item)
+        candidates = np.asarray(value)
+
+        def leaf(data: CustomerColumns) -> np.ndarray:
+            return np.isin(data.columns[name], candidates)
+
+    elif op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise SegmentError("'between' requires [low, high]")
+        low, high = value
+        _check_value(name, kind, low)
+        _check_value(name, kind, high)
+
+        def leaf(data: CustomerColumns) -> np.ndarray:
+            column = data.columns[name]
+            return (column >= low) & (column <= high)
+
+    else:
+        raise SegmentError(f"unknown operator: {op}")
+
+    key = json.dumps([name, op, value], ensure_ascii=False, separators=(",", ":"))
+    return CompiledCondition(key=key, children=(), combine=None, leaf=leaf)
+
+
+def _check_value(name: str, kind: str, value: Any) -> None:
+    """比較値が列の型と比較できるか確認する。"""
+    accepted = _VALUE_TYPES.get(kind)
+    if accepted is None:
+        return
+    if not isinstance(value, accepted) or (kind != "b" and isinstance(value, bool)):
+        raise SegmentError(f"value {value!r} does not match the type of column {name}")
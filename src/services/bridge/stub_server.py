@@ -0,0 +1,227 @@
+"""SaaS API を模したローカルスタブ HTTP サーバを提供する。
+
+入出力: POST <任意パス>(JSON) -> JSON レスポンス / 起動引数 -> 常駐サーバ。
+制約:
+    - 標準ライブラリの http.server のみで動作させ、外部 SaaS へは接続しない
+    - HTTP/1.1 keep-alive を有効にし、接続再利用の効果を計測できるようにする
+
+Note:
+    - latency / outage / rate_limit_per_sec / force_429 を実行中に変更して障害を再現する
+    - {"items": [...]} を受け取った場合はバッチ要求として {"results": [...]} を返す
+    - 受信した Idempotency-Key（一括要求では本文の idempotency_keys も）を直近 key_history 件まで
+      idempotency_keys に記録し、再送で同じキーが届くか検証できるようにする
+    - テストとスループット計測で共用し、実行例: python -m services.bridge.stub_server --port 8090
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import socket
+import threading
+import time
+from typing import Any
+import uuid
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """スタブサーバのリクエストハンドラ。"""
+
+    protocol_version = "HTTP/1.1"
+    server: _StubHTTPServer
+
+    def setup(self) -> None:
+        """接続確立時に Nagle を無効化し、接続数を記録する。"""
+        super().setup()
+        # ヘッダと本文の分割送信で遅延 ACK 待ちが発生しないようにする。
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.stub.count("connections")
+
+    def do_POST(self) -> None:  # noqa: N802
+        """POST 要求を設定に応じて処理する。"""
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        stub.count("requests")
+        stub.record_key(self.headers.get("Idempotency-Key"))
+
+        if stub.latency:
+            time.sleep(stub.latency)
+        if stub.outage:
+            self._reply(503, {"error": "service unavailable"})
+            return
+        if not stub.admit():
+            stub.count("throttled")
+            self._reply(429, {"error": "too many requests"}, {"Retry-After": "0"})
+            return
+
+        try:
+            payload: Any = json.loads(raw) if raw else None
+        except json.JSONDecodeError:
+            self._reply(400, {"error": "invalid json"})
+            return
+
+        if isinstance(payload, dict) and isinstance(payload.get("items"), list):
+            keys = payload.get("idempotency_keys")
+            if isinstance(keys, list):
+                for key in keys:
+                    stub.record_key(key)
+            results = [{"id": str(uuid.uuid4()), "received": item} for item in payload["items"]]
+            self._reply(200, {"results": results})
+            return
+        self._reply(200, {"id": str(uuid.uuid4()), "path": self.path, "received": payload})
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """アクセスログを出力しない。"""
+
+    def _reply(self, status: int, body: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        """JSON レスポンスを返す。"""
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    """StubServer への参照を持つ HTTP サーバ。"""
+
+    daemon_threads = True
+    stub: StubServer
+
+
+class StubServer:
+    """遅延・429・停止を再現できるスタブサーバ。"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        rate_limit_per_sec: float | None = None,
+        key_history: int = 10_000,
+    ) -> None:
+        """StubServer を初期化する。
+
+        Args:
+            host: 待受ホスト
+            port: 待受ポート（0 で空きポート）
+            latency: 1リクエストあたりの遅延秒数
+            rate_limit_per_sec: 超過時に 429 を返す毎秒リクエスト数（None で無制限）
+            key_history: 記録する Idempotency-Key の件数上限（古いものから破棄する）
+        """
+        self.latency = latency
+        self.outage = False
+        self.rate_limit_per_sec = rate_limit_per_sec
+        self.force_429 = 0
+        self.stats: dict[str, int] = {"connections": 0, "requests": 0, "throttled": 0}
+        self.idempotency_keys: deque[str | None] = deque(maxlen=key_history)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._httpd = _StubHTTPServer((host, port), _StubHandler)
+        self._httpd.stub = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """サーバのベースURLを返す。"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> StubServer:
+        """バックグラウンドスレッドで待受を開始する。
+
+        Returns:
+            StubServer: 自身（with 文・チェーン呼び出し用）
+        """
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """現在のスレッドで待受を継続する（コマンドライン起動用）。"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        """待受を停止する。"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> StubServer:
+        """with 文で起動する。"""
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        """with 文の終了時に停止する。"""
+        self.stop()
+
+    def count(self, name: str) -> None:
+        """統計カウンタを加算する。
+
+        Args:
+            name: カウンタ名
+        """
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def record_key(self, key: str | None) -> None:
+        """受信した Idempotency-Key を記録する。
+
+        Args:
+            key: Idempotency-Key ヘッダの値（なければ None）
+        """
+        with self._lock:
+            self.idempotency_keys.append(key)
+
+    def admit(self) -> bool:
+        """流量制限の範囲内か判定する。
+
+        Returns:
+            bool: 受け付ける場合 True
+        """
+        with self._lock:
+            if self.force_429 > 0:
+                self.force_429 -= 1
+                return False
+            if self.rate_limit_per_sec is None:
+                return True
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count <= self.rate_limit_per_sec
+
+
+def main() -> None:
+    """コマンドラインからスタブサーバを起動する。"""
+    parser = argparse.ArgumentParser(description="SaaS API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, args.latency_ms / 1000, args.rate_limit)
+    print(f"stub server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
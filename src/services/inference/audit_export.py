@@ -0,0 +1,522 @@
+"""監査ログを外部監査ツール向けにストリーミング出力するエクスポータを提供する。
+
+入出力: AuditStore + 期間・status 条件 + cursor -> gzip NDJSON のバイト列 / HTTP エクスポート -> ファイル(CLI)。
+制約:
+    - 出力は chunk_records 件ごとに独立した gzip メンバーとし、連結した全体も1つの gzip ファイルとして読める
+    - 保持するのは1チャンク分の行のみとし、エクスポート件数に比例してメモリを使わない
+    - cursor は AuditStore の保存位置を表し、同じ条件で続きから再開できる
+    - cursor が compact() で破棄済みの位置を指す場合は欠落を黙って読み飛ばさず AuditCursorExpiredError とする
+    - Parquet は NDJSON と同じ項目（RECORD_FIELDS）を列として持つ
+
+Note:
+    - 列指向形式（Parquet）は pyarrow がインストールされている場合のみ出力できる
+    - 期間条件は ISO 8601 で指定し、タイムゾーン省略時は UTC とみなす
+    - 実行例: python -m services.inference.audit_export --url http://localhost:8080 --output audit.ndjson.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Any, BinaryIO, Iterable, Iterator
+from urllib.parse import urlencode
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import zlib
+
+from services.inference.audit_store import AuditStore
+
+# 監査ログ record の項目（Parquet の列順）。Orchestrator が保存する項目を漏れなく含める。
+RECORD_FIELDS = (
+    "trace_id",
+    "timestamp",
+    "status",
+    "tenant_id",
+    "input_text",
+    "state",
+    "output_state",
+    "intent",
+    "next_actions",
+    "confidence",
+    "issues",
+    "error",
+    "latency_ms",
+)
+
+_CURSOR_PREFIX = "v1:"
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+# 区切りの空白を省き、record ごとの encoder 生成も避ける。
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+class AuditExportError(Exception):
+    """エクスポート条件・cursor の不正や出力失敗を表す例外。"""
+
+
+class AuditCursorExpiredError(AuditExportError):
+    """cursor の位置が compact() で破棄済みで、続きを欠落なく出力できないことを表す例外。"""
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    """エクスポート対象を絞り込む条件を表すデータ。
+
+    Note:
+        - since は以上、until は未満で比較する
+    """
+
+    since: str | None = None
+    until: str | None = None
+    statuses: frozenset[str] | None = None
+    tenant_id: str | None = None
+
+    @classmethod
+    def from_params(
+        cls,
+        since: str | None = None,
+        until: str | None = None,
+        status: str | None = None,
+        tenant: str | None = None,
+    ) -> ExportFilter:
+        """クエリ文字列相当の値から条件を組み立てる。
+
+        Args:
+            since: 開始日時（ISO 8601）
+            until: 終了日時（ISO 8601）
+            status: カンマ区切りの status 一覧
+            tenant: テナントID（未指定時は全テナント）
+
+        Returns:
+            ExportFilter: 絞り込み条件
+
+        Raises:
+            AuditExportError: 日時の形式が不正な場合
+        """
+        statuses = frozenset(s.strip() for s in (status or "").split(",") if s.strip())
+        return cls(
+            since=_normalize_timestamp(since),
+            until=_normalize_timestamp(until),
+            statuses=statuses or None,
+            tenant_id=tenant or None,
+        )
+
+    def matches(self, record: dict[str, Any]) -> bool:
+        """record が条件に一致するか判定する。
+
+        Args:
+            record: 監査ログ record
+
+        Returns:
+            bool: 一致する場合 True
+        """
+        if self.statuses is not None and record.get("status") not in self.statuses:
+            return False
+        if self.tenant_id is not None and record.get("tenant_id") != self.tenant_id:
+            return False
+        if self.since is None and self.until is None:
+            return True
+        # 監査ログの timestamp は UTC の isoformat() のため、文字列比較で時刻順に並ぶ。
+        timestamp = str(record.get("timestamp", ""))
+        if self.since is not None and timestamp < self.since:
+            return False
+        return self.until is None or timestamp < self.until
+
+
+@dataclass(frozen=True)
+class ExportPage:
+    """1回のエクスポートで走査する保存位置の範囲を表すデータ。"""
+
+    start: int
+    end: int
+    more: bool
+
+    @property
+    def next_cursor(self) -> str:
+        """続きを取得するための cursor を返す。"""
+        return encode_cursor(self.end)
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    """ファイルへのエクスポート結果を表すデータ。"""
+
+    records: int
+    bytes_written: int
+    next_cursor: str
+    more: bool
+
+
+def encode_cursor(offset: int) -> str:
+    """保存位置を cursor 文字列へ変換する。
+
+    Args:
+        offset: 次に走査する保存位置
+
+    Returns:
+        str: URL セーフな cursor
+    """
+    return base64.urlsafe_b64encode(f"{_CURSOR_PREFIX}{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int:
+    """cursor 文字列を保存位置へ戻す。
+
+    Args:
+        cursor: encode_cursor() の結果（None・空文字は先頭）
+
+    Returns:
+        int: 保存位置
+
+    Raises:
+        AuditExportError: cursor が不正な場合
+    """
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        if not raw.startswith(_CURSOR_PREFIX):
+            raise ValueError(raw)
+        offset = int(raw[len(_CURSOR_PREFIX) :])
+    except ValueError as exc:
+        raise AuditExportError(f"invalid cursor: {cursor}") from exc
+    if offset < 0:
+        raise AuditExportError(f"invalid cursor: {cursor}")
+    return offset
+
+
+def plan_page(
+    store: AuditStore,
+    cursor: str | None = None,
+    export_filter: ExportFilter | None = None,
+    limit: int | None = None,
+) -> ExportPage:
+    """エクスポートで走査する範囲を決定する。
+
+    Args:
+        store: 監査ログの保存先
+        cursor: 前回の next_cursor（未指定時は先頭）
+        export_filter: 絞り込み条件
+        limit: 1回で出力する最大件数（未指定時は現時点の末尾まで）
+
+    Returns:
+        ExportPage: 走査範囲
+
+    Raises:
+        AuditExportError: cursor が不正な場合
+        AuditCursorExpiredError: cursor の位置が保持している最古の位置より前の場合
+
+    Note:
+        - limit 指定時は条件一致件数を数えるために範囲を先行走査する（直列化は行わない）
+        - cursor 未指定時は保持している最古の位置から走査する
+    """
+    start = decode_cursor(cursor) if cursor else store.first_offset
+    _check_retained(store, start)
+    total = len(store)
+    if limit is None or start >= total:
+        return ExportPage(start=start, end=max(start, total), more=False)
+
+    flt = export_filter or ExportFilter()
+    matched = 0
+    for offset, record in enumerate(store.records(start, total, copy=False), start):
+        if flt.matches(record):
+            matched += 1
+            if matched == limit:
+                return ExportPage(start=start, end=offset + 1, more=offset + 1 < total)
+    return ExportPage(start=start, end=total, more=False)
+
+
+def iter_ndjson_gzip(
+    store: AuditStore,
+    page: ExportPage,
+    export_filter: ExportFilter | None = None,
+    chunk_records: int = 10_000,
+    compresslevel: int = 1,
+) -> Iterator[bytes]:
+    """走査範囲の監査ログを gzip NDJSON のチャンクとして返す。
+
+    Args:
+        store: 監査ログの保存先
+        page: plan_page() の結果
+        export_filter: 絞り込み条件
+        chunk_records: 1チャンク（gzip メンバー）あたりの件数
+        compresslevel: gzip 圧縮レベル（1〜9）
+
+    Returns:
+        Iterator[bytes]: 完結した gzip メンバーのイテレータ
+    """
+    for lines in _iter_lines(store, page, export_filter, chunk_records):
+        yield _gzip_member(lines, compresslevel)
+
+
+def export_ndjson(
+    store: AuditStore,
+    destination: BinaryIO,
+    cursor: str | None = None,
+    export_filter: ExportFilter | None = None,
+    limit: int | None = None,
+    chunk_records: int = 10_000,
+    compresslevel: int = 1,
+) -> ExportResult:
+    """監査ログを gzip NDJSON としてストリームへ書き出す。
+
+    Args:
+        store: 監査ログの保存先
+        destination: 書き込み先のバイナリストリーム
+        cursor: 前回の next_cursor（未指定時は先頭）
+        export_filter: 絞り込み条件
+        limit: 出力する最大件数
+        chunk_records: 1チャンク（gzip メンバー）あたりの件数
+        compresslevel: gzip 圧縮レベル（1〜9）
+
+    Returns:
+        ExportResult: 出力件数・バイト数と続きの cursor
+    """
+    page = plan_page(store, cursor, export_filter, limit)
+    records = 0
+    written = 0
+    for lines in _iter_lines(store, page, export_filter, chunk_records):
+        member = _gzip_member(lines, compresslevel)
+        destination.write(member)
+        records += len(lines)
+        written += len(member)
+    return ExportResult(records=records, bytes_written=written, next_cursor=page.next_cursor, more=page.more)
+
+
+def iter_ndjson_records(chunks: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    """gzip NDJSON のバイト列（複数メンバー可）を record へ復元する。
+
+    Args:
+        chunks: 任意の位置で分割された gzip バイト列
+
+    Returns:
+        Iterator[dict[str, Any]]: 監査ログ record のイテレータ
+    """
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    pending = b""
+    for chunk in chunks:
+        data = chunk
+        while data:
+            pending += decompressor.decompress(data)
+            if decompressor.eof:
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(_GZIP_WBITS)
+            else:
+                data = b""
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                if line:
+                    yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def write_parquet(records: Iterable[dict[str, Any]], path: str | Path, row_group_size: int = 100_000) -> int:
+    """監査ログを Parquet ファイルへ書き出す。
+
+    Args:
+        records: 監査ログ record の列
+        path: 出力先パス
+        row_group_size: 1行グループあたりの件数
+
+    Returns:
+        int: 書き出した件数
+
+    Raises:
+        AuditExportError: pyarrow がインストールされていない場合
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise AuditExportError("parquet export requires pyarrow") from exc
+
+    strings = pa.list_(pa.string())
+    types = {
+        "state": strings,
+        "output_state": strings,
+        "next_actions": strings,
+        "issues": strings,
+        "confidence": pa.float64(),
+        "latency_ms": pa.struct(
+            [
+                ("reader", pa.float64()),
+                ("payload", pa.float64()),
+                ("validator", pa.float64()),
+                ("generator", pa.float64()),
+            ]
+        ),
+    }
+    schema = pa.schema([(name, types.get(name, pa.string())) for name in RECORD_FIELDS])
+    count = 0
+    batch: list[dict[str, Any]] = []
+    with pq.ParquetWriter(str(path), schema) as writer:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def _normalize_timestamp(value: str | None) -> str | None:
+    """ISO 8601 の日時を UTC の isoformat() 文字列へ揃える。"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise AuditExportError(f"invalid timestamp: {value}") from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _iter_lines(
+    store: AuditStore, page: ExportPage, export_filter: ExportFilter | None, chunk_records: int
+) -> Iterator[list[bytes]]:
+    """走査範囲の一致 record を NDJSON 行のリストとして chunk_records 件ずつ返す。"""
+    flt = export_filter or ExportFilter()
+    # plan_page() 後に compact() された場合も欠落したまま出力しない。
+    _check_retained(store, page.start)
+    lines: list[bytes] = []
+    for record in store.records(page.start, page.end, copy=False):
+        if not flt.matches(record):
+            continue
+        lines.append(_ENCODER.encode(record).encode("utf-8"))
+        if len(lines) >= chunk_records:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def _check_retained(store: AuditStore, start: int) -> None:
+    """走査開始位置の record が破棄されていないことを確認する。"""
+    oldest = store.first_offset
+    if start < oldest:
+        raise AuditCursorExpiredError(
+            f"cursor points to compacted records ({oldest - start} lost); "
+            f"restart from the oldest retained cursor {encode_cursor(oldest)}"
+        )
+
+
+def _gzip_member(lines: list[bytes], compresslevel: int) -> bytes:
+    """NDJSON 行を1つの gzip メンバーへ圧縮する。"""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, _GZIP_WBITS)
+    return compressor.compress(b"\n".join(lines) + b"\n") + compressor.flush()
+
+
+def _fetch_pages(args: argparse.Namespace, cursor: str | None) -> Iterator[tuple[Iterator[bytes], str, bool]]:
+    """エクスポート API をページ単位で呼び出す。"""
+    while True:
+        params = {
+            key: value
+            for key, value in (
+                ("since", args.since),
+                ("until", args.until),
+                ("status", args.status),
+                ("cursor", cursor),
+                ("limit", args.page_size),
+            )
+            if value
+        }
+        headers = {"X-Audit-Token": args.token} if args.token else {}
+        request = Request(f"{args.url.rstrip('/')}/audit/export?{urlencode(params)}", headers=headers)
+        try:
+            response = urlopen(request, timeout=args.timeout)  # noqa: S310 - 指定された API のみへ接続する
+        except HTTPError as exc:
+            detail = exc.read().decode("utf-8", "replace")
+            raise AuditExportError(f"export failed with HTTP {exc.code}: {detail}") from exc
+        with response:
+            cursor = response.headers["X-Next-Cursor"]
+            more = response.headers.get("X-Has-More") == "1"
+            yield iter(lambda: response.read(1 << 20), b""), cursor, more
+        if not more:
+            return
+
+
+def _export_ndjson_file(args: argparse.Namespace) -> int:
+    """API から gzip NDJSON ファイルへ追記し、ページごとに再開位置を保存する。"""
+    output = Path(args.output)
+    state_path = output.with_name(output.name + ".cursor")
+    state = json.loads(state_path.read_text()) if state_path.exists() else {"cursor": None, "size": 0}
+
+    with open(output, "ab") as stream:
+        # 中断時に書きかけたページを捨ててから再開する。
+        stream.truncate(state["size"])
+        stream.seek(state["size"])
+        for body, cursor, _ in _fetch_pages(args, state["cursor"]):
+            for chunk in body:
+                stream.write(chunk)
+            stream.flush()
+            os.fsync(stream.fileno())
+            state = {"cursor": cursor, "size": stream.tell()}
+            _write_state(state_path, state)
+    return state["size"]
+
+
+def _export_parquet_dir(args: argparse.Namespace) -> int:
+    """API から Parquet のパートファイル群へ書き出し、ページごとに再開位置を保存する。"""
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    state_path = output / "_cursor.json"
+    state = json.loads(state_path.read_text()) if state_path.exists() else {"cursor": None, "part": 0}
+
+    for body, cursor, _ in _fetch_pages(args, state["cursor"]):
+        part = output / f"part-{state['part']:05d}.parquet"
+        tmp = part.with_name(part.name + ".tmp")
+        write_parquet(iter_ndjson_records(body), tmp)
+        tmp.replace(part)
+        state = {"cursor": cursor, "part": state["part"] + 1}
+        _write_state(state_path, state)
+    return state["part"]
+
+
+def _write_state(path: Path, state: dict[str, Any]) -> None:
+    """再開位置をアトミックに保存する。"""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state))
+    tmp.replace(path)
+
+
+def main() -> int:
+    """エクスポート API から監査ログをファイルへ書き出す。
+
+    Returns:
+        int: 終了コード
+    """
+    parser = argparse.ArgumentParser(description="export audit records as gzip NDJSON or Parquet")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--output", required=True, help="output file (ndjson) or directory (parquet)")
+    parser.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+    parser.add_argument("--since", default=None)
+    parser.add_argument("--until", default=None)
+    parser.add_argument("--status", default=None, help="comma separated statuses")
+    parser.add_argument("--page-size", type=int, default=1_000_000)
+    parser.add_argument("--token", default=os.environ.get("SAA_AUDIT_EXPORT_TOKEN"))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    try:
+        if args.format == "parquet":
+            print(f"wrote {_export_parquet_dir(args)} parts to {args.output}")
+        else:
+            print(f"wrote {_export_ndjson_file(args)} bytes to {args.output}")
+    except AuditExportError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+"""監査ログを分・時間単位で差分集計する AuditRollup を提供する。
+
+入出力: 保存された record(dict) -> 分/時間バケットの集計 / 集計条件 -> RollupStats・系列(dict)。
+制約:
+    - 集計は AuditStore への保存時に1件ずつ加算し、問い合わせ時に監査ログを走査しない
+    - バケットは (開始時刻, tenant_id, intent) 単位で、件数・成功/失敗数・Validator 指摘・state 分布を持つ
+    - state 分布は最終出力の state（output_state）のうち登録済みラベルのみを数え、
+      それ以外（語彙外の入力断片）は OTHER_STATE へまとめる（入力本文を集計に残さない）
+    - RetentionPolicy の保持期間を過ぎた監査ログ・分バケット・時間バケットを破棄する
+
+Note:
+    - 期間指定なしの問い合わせは起動以降の累計から返す（バケット数にも依存しない）
+    - 期間指定ありの問い合わせは期間内のバケット数に比例し、監査ログ件数には依存しない
+    - 監査ログの圧縮は保存時に interval_seconds 間隔で行い、破棄分は集計に反映済みである
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import math
+import threading
+from typing import Any, Iterable
+
+from services.inference.audit_store import AuditStore
+
+GRANULARITIES = {"minute": 60, "hour": 3600}
+OTHER_STATE = "(other)"
+
+
+class RollupError(Exception):
+    """集計条件が不正な場合に送出する例外。"""
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """監査ログと集計バケットの保持期間を表すデータ。
+
+    Note:
+        - 各期間は秒で指定し、None の場合は破棄しない
+    """
+
+    raw_seconds: float | None = 24 * 3600
+    minute_seconds: float | None = 48 * 3600
+    hour_seconds: float | None = 90 * 24 * 3600
+    interval_seconds: float = 60.0
+
+
+@dataclass
+class _Bucket:
+    """1バケット分の集計値。"""
+
+    total: int = 0
+    success: int = 0
+    failed: int = 0
+    issues: Counter = field(default_factory=Counter)
+    states: Counter = field(default_factory=Counter)
+
+    def add(self, status: str, issues: Iterable[str], states: Iterable[str]) -> None:
+        """record 1件分を加算する。"""
+        self.total += 1
+        if status == "success":
+            self.success += 1
+        else:
+            self.failed += 1
+        self.issues.update(issues)
+        self.states.update(states)
+
+    def merge(self, other: _Bucket) -> None:
+        """他のバケットの集計値を加算する。"""
+        self.total += other.total
+        self.success += other.success
+        self.failed += other.failed
+        self.issues.update(other.issues)
+        self.states.update(other.states)
+
+
+@dataclass(frozen=True)
+class RollupStats:
+    """集計問い合わせの結果を表すデータ。"""
+
+    total: int
+    success: int
+    failed: int
+    top_issues: tuple[tuple[str, int], ...]
+    states: tuple[tuple[str, int], ...]
+
+    @property
+    def success_rate(self) -> float:
+        """成功率を返す（0件の場合は 0.0）。"""
+        return self.success / self.total if self.total else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        """失敗率を返す（0件の場合は 0.0）。"""
+        return self.failed / self.total if self.total else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON 化可能な辞書を返す。"""
+        return {
+            "total": self.total,
+            "success": self.success,
+            "failed": self.failed,
+            "success_rate": self.success_rate,
+            "failure_rate": self.failure_rate,
+            "top_issues": [{"issue": issue, "count": count} for issue, count in self.top_issues],
+            "states": [{"state": state, "count": count} for state, count in self.states],
+        }
+
+
+class AuditRollup:
+    """監査ログの保存に合わせて分・時間バケットを更新するクラス。"""
+
+    def __init__(
+        self, policy: RetentionPolicy | None = None, state_labels: Iterable[str] = ()
+    ) -> None:
+        """AuditRollup を初期化する。
+
+        Args:
+            policy: 保持期間（未指定時は RetentionPolicy の既定値）
+            state_labels: state 分布にそのまま数えるラベル（語彙ラベル・補助 state）
+        """
+        self.policy = policy or RetentionPolicy()
+        self._state_labels = frozenset(state_labels)
+        self._buckets: dict[str, dict[int, dict[tuple[str, str], _Bucket]]] = {
+            name: {} for name in GRANULARITIES
+        }
+        self._totals: dict[tuple[str, str], _Bucket] = {}
+        self._stores: list[AuditStore] = []
+        self._last_compaction: float | None = None
+        self._compacted = 0
+        self._lock = threading.Lock()
+
+    def add_state_labels(self, labels: Iterable[str]) -> None:
+        """state 分布にそのまま数えるラベルを追加する。
+
+        Args:
+            labels: 語彙ラベル・補助 state（以降に保存される record から反映する）
+        """
+        with self._lock:
+            self._state_labels = self._state_labels | frozenset(labels)
+
+    def attach(self, store: AuditStore) -> None:
+        """AuditStore の既存 record を集計し、以降の保存を差分で反映する。
+
+        Args:
+            store: 集計対象の AuditStore（保持期間を過ぎた record の破棄対象にもなる）
+        """
+        for record in store.records(copy=False):
+            self._add(record)
+        self._stores.append(store)
+        store.add_listener(self.observe)
+
+    def observe(self, record: dict[str, Any]) -> None:
+        """保存された record を集計へ反映し、必要に応じて圧縮する。
+
+        Args:
+            record: 保存済みの監査ログ辞書
+        """
+        epoch = self._add(record)
+        with self._lock:
+            due = (
+                self._last_compaction is None
+                or epoch - self._last_compaction >= self.policy.interval_seconds
+            )
+            if due:
+                self._last_compaction = epoch
+        if due:
+            self.compact(epoch)
+
+    def compact(self, now: float | None = None) -> int:
+        """保持期間を過ぎた監査ログ・バケットを破棄する。
+
+        Args:
+            now: 基準時刻の UNIX 秒（未指定時は現在時刻）
+
+        Returns:
+            int: 破棄した監査ログの件数
+        """
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        with self._lock:
+            for name, seconds in (
+                ("minute", self.policy.minute_seconds),
+                ("hour", self.policy.hour_seconds),
+            ):
+                if seconds is None:
+                    continue
+                buckets = self._buckets[name]
+                for start in [s for s in buckets if s + GRANULARITIES[name] <= now - seconds]:
+                    del buckets[start]
+
+        if self.policy.raw_seconds is None:
+            return 0
+        before = datetime.fromtimestamp(now - self.policy.raw_seconds, timezone.utc).isoformat()
+        dropped = sum(store.compact(before) for store in self._stores)
+        with self._lock:
+            self._compacted += dropped
+        return dropped
+
+    def stats(
+        self,
+        granularity: str = "hour",
+        since: float | None = None,
+        until: float | None = None,
+        intent: str | None = None,
+        tenant_id: str | None = None,
+        top: int = 10,
+    ) -> RollupStats:
+        """条件に一致するバケットを合算した集計を返す。
+
+        Args:
+            granularity: "minute" または "hour"
+            since: 開始時刻の UNIX 秒（含む。バケット境界へ切り下げる）
+            until: 終了時刻の UNIX 秒（含まない）
+            intent: 絞り込む intent（未指定時は全件）
+            tenant_id: 絞り込むテナントID（未指定時は全件、"" でテナント指定なしの record）
+            top: 返す Validator 指摘・state の最大件数
+
+        Returns:
+            RollupStats: 合算結果
+
+        Raises:
+            RollupError: granularity が不正な場合
+        """
+        merged = _Bucket()
+        with self._lock:
+            if since is None and until is None:
+                groups = [self._totals]
+            else:
+                groups = [group for _, group in self._window(granularity, since, until)]
+            for group in groups:
+                for (tenant, name), bucket in group.items():
+                    if (intent is None or name == intent) and (tenant_id is None or tenant == tenant_id):
+                        merged.merge(bucket)
+        return RollupStats(
+            total=merged.total,
+            success=merged.success,
+            failed=merged.failed,
+            top_issues=tuple(merged.issues.most_common(top)),
+            states=tuple(merged.states.most_common(top)),
+        )
+
+    def series(
+        self,
+        granularity: str = "hour",
+        since: float | None = None,
+        until: float | None = None,
+        intent: str | None = None,
+        tenant_id: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """バケットごと・intent ごとの件数を時刻順に返す。
+
+        Args:
+            granularity: "minute" または "hour"
+            since: 開始時刻の UNIX 秒（含む。未指定時は保持中の最古バケットから）
+            until: 終了時刻の UNIX 秒（含まない）
+            intent: 絞り込む intent（未指定時は全件）
+            tenant_id: 絞り込むテナントID（未指定時は全件）
+
+        Returns:
+            list[dict[str, Any]]: {start, intent, total, success, failed} の一覧
+
+        Raises:
+            RollupError: granularity が不正な場合
+        """
+        points: dict[tuple[int, str], _Bucket] = {}
+        with self._lock:
+            for start, group in self._window(granularity, since, until):
+                for (tenant, name), bucket in group.items():
+                    if (intent is None or name == intent) and (tenant_id is None or tenant == tenant_id):
+                        points.setdefault((start, name), _Bucket()).merge(bucket)
+        return [
+            {
+                "start": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+                "intent": name,
+                "total": bucket.total,
+                "success": bucket.success,
+                "failed": bucket.failed,
+            }
+            for (start, name), bucket in sorted(points.items())
+        ]
+
+    @property
+    def compacted(self) -> int:
+        """圧縮で破棄した監査ログの累計件数を返す。"""
+        return self._compacted
+
+    def _add(self, record: dict[str, Any]) -> float:
+        """record を累計と各粒度のバケットへ加算し、その時刻（UNIX 秒）を返す。"""
+        epoch = _epoch(record.get("timestamp"))
+        key = (str(record.get("tenant_id") or ""), str(record.get("intent") or ""))
+        status = str(record.get("status", ""))
+        issues = record.get("issues")
+        if issues is None:
+            issues = [record["error"]] if record.get("error") else []
+        with self._lock:
+            states = [
+                state if state in self._state_labels else OTHER_STATE
+                for state in record.get("output_state") or []
+            ]
+            self._totals.setdefault(key, _Bucket()).add(status, issues, states)
+            for name, step in GRANULARITIES.items():
+                start = int(epoch // step) * step
+                group = self._buckets[name].setdefault(start, {})
+                group.setdefault(key, _Bucket()).add(status, issues, states)
+        return epoch
+
+    def _window(
+        self, granularity: str, since: float | None, until: float | None
+    ) -> list[tuple[int, dict[tuple[str, str], _Bucket]]]:
+        """期間内のバケットを (開始時刻, 集計) の組で返す（呼び出し側でロックを保持すること）。"""
+        if granularity not in GRANULARITIES:
+            raise RollupError(f"granularity must be one of {sorted(GRANULARITIES)}")
+        step = GRANULARITIES[granularity]
+        buckets = self._buckets[granularity]
+        lower = -math.inf if since is None else int(since // step) * step
+        upper = math.inf if until is None else until
+        # 期間がバケット数より短い場合は期間を刻み、長い場合は保持中のバケットを辿る。
+        if since is not None and until is not None and (until - lower) / step < len(buckets):
+            starts: Iterable[int] = range(int(lower), math.ceil(upper), step)
+        else:
+            starts = sorted(start for start in buckets if lower <= start < upper)
+        return [(start, buckets[start]) for start in starts if start in buckets]
+
+
+def parse_time(value: str | None) -> float | None:
+    """ISO 8601 時刻を UNIX 秒へ変換する（タイムゾーンなしは UTC とみなす）。
+
+    Args:
+        value: ISO 8601 時刻（None・空文字は None を返す）
+
+    Returns:
+        float | None: UNIX 秒
+
+    Raises:
+        RollupError: 時刻として解釈できない場合
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise RollupError(f"invalid timestamp: {value}") from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def retention_from_env(environ: dict[str, str]) -> RetentionPolicy:
+    """環境変数から保持期間を組み立てる（0 以下は無期限）。
+
+    Args:
+        environ: SAA_AUDIT_RAW_RETENTION / SAA_AUDIT_MINUTE_RETENTION / SAA_AUDIT_HOUR_RETENTION（秒）を含む辞書
+
+    Returns:
+        RetentionPolicy: 保持期間
+    """
+    defaults = RetentionPolicy()
+
+    def seconds(name: str, default: float | None) -> float | None:
+        raw = environ.get(name)
+        if not raw:
+            return default
+        value = float(raw)
+        return value if value > 0 else None
+
+    return RetentionPolicy(
+        raw_seconds=seconds("SAA_AUDIT_RAW_RETENTION", defaults.raw_seconds),
+        minute_seconds=seconds("SAA_AUDIT_MINUTE_RETENTION", defaults.minute_seconds),
+        hour_seconds=seconds("SAA_AUDIT_HOUR_RETENTION", defaults.hour_seconds),
+    )
+
+
+def _epoch(timestamp: Any) -> float:
+    """record の timestamp を UNIX 秒へ変換する（不正・欠落時は現在時刻）。"""
+    try:
+        return parse_time(str(timestamp)) if timestamp else datetime.now(timezone.utc).timestamp()
+    except RollupError:
+        return datetime.now(timezone.utc).timestamp()
+
@@ -1,19 +1,22 @@
 """Orchestrator の監査ログを保持する AuditStore を提供する。
 
-入出力: record(dict) の保存 / 最新record(dict|None) の取得。
+入出力: record(dict) の保存 / 最新record(dict|None) の取得 / 保存順の record 走査。
 制約:
     - Phase 0 ではインメモリ保存のみを扱う
     - save/last のインターフェースを固定し、後続フェーズで差し替え可能にする
+    - 位置（offset）は保存順の通し番号とし、compact() で先頭を破棄しても変わらない
 
 Note:
     - 保存時は deep copy を行い外部からの破壊的変更を防ぐ
     - last() は未保存時に None を返す
+    - add_listener() で登録した関数へ保存直後の record を渡す（集計の差分更新用）
 """
 
 from __future__ import annotations
 
 from copy import deepcopy
-from typing import Any
+import threading
+from typing import Any, Callable, Iterator
 
 
 class AuditStore:
@@ -22,6 +25,9 @@ class AuditStore:
     def __init__(self) -> None:
         """空のログ配列で初期化する。"""
         self._records: list[dict[str, Any]] = []
+        self._compacted = 0
+        self._listeners: list[Callable[[dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
 
     def save(self, record: dict[str, Any]) -> None:
         """監査ログを1件保存する。
@@ -29,7 +35,19 @@ class AuditStore:
         Args:
             record: 監査ログ辞書
         """
-        self._records.append(deepcopy(record))
+        stored = deepcopy(record)
+        with self._lock:
+            self._records.append(stored)
+        for listener in self._listeners:
+            listener(stored)
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        """保存直後の record を受け取る関数を登録する。
+
+        Args:
+            listener: 保存済み record を受け取る関数（record は読み取り専用で扱うこと）
+        """
+        self._listeners.append(listener)
 
     def last(self) -> dict[str, Any] | None:
         """最新の監査ログを返す。
@@ -40,3 +58,64 @@ class AuditStore:
         if not self._records:
             return None
         return deepcopy(self._records[-1])
+
+    def records(
+        self, start: int = 0, stop: int | None = None, copy: bool = True
+    ) -> Iterator[dict[str, Any]]:
+        """保存順に監査ログを返す。
+
+        Args:
+            start: 走査を開始する位置（保存順の0始まり）
+            stop: 走査を終了する位置（未指定時は走査開始時点の件数）
+            copy: False の場合は deep copy せずに返す（読み取り専用で扱うこと）
+
+        Returns:
+            Iterator[dict[str, Any]]: 監査ログ辞書のイテレータ
+
+        Note:
+            - compact() で破棄済みの位置は読み飛ばす
+        """
+        # 走査中の追記・圧縮を許容するため、開始時点の配列と破棄件数を組で固定する。
+        with self._lock:
+            records, base = self._records, self._compacted
+            end = base + len(records)
+        if stop is not None:
+            end = min(stop, end)
+        for index in range(max(start, base), end):
+            record = records[index - base]
+            yield deepcopy(record) if copy else record
+
+    def compact(self, before: str) -> int:
+        """timestamp が before より古い先頭の監査ログを破棄する。
+
+        Args:
+            before: UTC の isoformat 時刻（これより前の record を破棄する）
+
+        Returns:
+            int: 破棄した件数
+
+        Note:
+            - 保存順に先頭から判定し、before 以降の record に達した時点で止める
+            - 破棄前に集計へ反映しておくこと（AuditRollup が listener で差分更新する）
+        """
+        with self._lock:
+            count = 0
+            for record in self._records:
+                # timestamp は UTC の isoformat() のため、文字列比較で時刻順に並ぶ。
+                if str(record.get("timestamp", "")) >= before:
+                    break
+                count += 1
+            if count:
+                # 走査中のイテレータが旧配列を参照し続けられるよう、配列は置き換える。
+                self._records = self._records[count:]
+                self._compacted += count
+        return count
+
+    @property
+    def first_offset(self) -> int:
+        """保持している最古の監査ログの位置を返す。"""
+        return self._compacted
+
+    def __len__(self) -> int:
+        """保存済みの監査ログ件数（compact() で破棄した件数を含む）を返す。"""
+        return self._compacted + len(self._records)
@@ -0,0 +1,401 @@
+"""抽出結果の確からしさを推定する ConfidenceScorer を提供する。
+
+入出力: (Reader 抽出 state, 最終 state) の列 -> confidence(np.ndarray) / ラベル付き JSONL -> 信頼度曲線(CLI)。
+制約:
+    - 特徴量は抽出カバレッジ・語彙一致強度・嗜好ストア一致率・フィードバック実績の4次元とする
+    - 確率はロジスティックモデルで算出し、バッチ全体を1回の行列演算で評価する
+    - 嗜好ストア・フィードバック実績がない場合、その特徴量は中立値 0.5 とする
+
+Note:
+    - DEFAULT_MODEL の重みは未校正の事前値であり、ラベル付きデータで fit() した重みへ差し替える
+    - 校正手順: python -m services.inference.confidence labeled.jsonl --fit model.json
+    - 単件の score() もバッチと同じ predict() を通し、経路による値の差を作らない
+    - 正規化時の語彙照合結果（ScoringInput.matches）があれば再利用し、同じ表現を二度照合しない
+    - numpy は算出時に読み込み、Orchestrator の import 時に読み込まない（起動時間の短縮）
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from services.inference.state_canonicalizer import StateCanonicalizer, StateMatch
+
+FEATURES = ("coverage", "match_strength", "preference_agreement", "feedback_reliability")
+NEUTRAL = 0.5
+
+
+@dataclass(frozen=True)
+class ScoringInput:
+    """1件分の confidence 算出入力を表すデータ。
+
+    Note:
+        - preference_states は嗜好ストアに記録済みの state（None で未参照）
+        - matches は正規化時の語彙照合結果（前後空白を除いた抽出 state -> 照合結果、None で未照合）
+    """
+
+    extracted: Sequence[str]
+    states: Sequence[str]
+    preference_states: frozenset[str] | None = None
+    matches: Mapping[str, StateMatch | None] | None = None
+
+
+@dataclass(frozen=True)
+class ConfidenceModel:
+    """特徴量から confidence を返すロジスティックモデルを表すデータ。"""
+
+    weights: tuple[float, ...]
+    bias: float
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """特徴量行列から confidence を算出する。
+
+        Args:
+            features: (件数, len(FEATURES)) の特徴量行列
+
+        Returns:
+            np.ndarray: 0〜1 の confidence 配列
+        """
+        import numpy as np
+
+        logits = features @ np.asarray(self.weights, dtype=np.float64) + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    @classmethod
+    def fit(
+        cls,
+        features: np.ndarray,
+        outcomes: np.ndarray,
+        l2: float = 1e-2,
+        iterations: int = 50,
+    ) -> ConfidenceModel:
+        """ラベル付きデータで重みを推定する（L2 正則化付き IRLS）。
+
+        Args:
+            features: (件数, len(FEATURES)) の特徴量行列
+            outcomes: 抽出結果が正しかったかを表す 0/1 配列
+            l2: 重みの L2 正則化係数（バイアスは正則化しない）
+            iterations: ニュートン法の最大反復回数
+
+        Returns:
+            ConfidenceModel: 推定済みモデル
+
+        Raises:
+            ValueError: 件数が一致しない・空の場合
+        """
+        import numpy as np
+
+        x = np.asarray(features, dtype=np.float64)
+        y = np.asarray(outcomes, dtype=np.float64)
+        if x.ndim != 2 or len(x) != len(y) or len(x) == 0:
+            raise ValueError("features and outcomes must have the same non-zero length")
+
+        design = np.hstack([x, np.ones((len(x), 1))])
+        penalty = np.eye(design.shape[1]) * l2
+        penalty[-1, -1] = 0.0
+        theta = np.zeros(design.shape[1])
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-(design @ theta)))
+            gradient = design.T @ (p - y) + penalty @ theta
+            hessian = (design * (p * (1 - p))[:, None]).T @ design + penalty
+            step = np.linalg.solve(hessian + np.eye(len(theta)) * 1e-9, gradient)
+            theta -= step
+            if np.max(np.abs(step)) < 1e-8:
+                break
+        return cls(weights=tuple(float(w) for w in theta[:-1]), bias=float(theta[-1]))
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON 化可能な辞書を返す。"""
+        return {"features": list(FEATURES), "weights": list(self.weights), "bias": self.bias}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ConfidenceModel:
+        """to_dict() の結果から復元する。
+
+        Raises:
+            ValueError: 特徴量の並びが一致しない場合
+        """
+        if tuple(data.get("features") or FEATURES) != FEATURES:
+            raise ValueError(f"model features must be {FEATURES}")
+        return cls(weights=tuple(float(w) for w in data["weights"]), bias=float(data["bias"]))
+
+    @classmethod
+    def load(cls, path: str | Path) -> ConfidenceModel:
+        """JSON ファイルから読み込む。"""
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# 抽出根拠が揃った場合に 0.85 前後、補助 state のみの場合に 0.2 前後となる事前値。
+DEFAULT_MODEL = ConfidenceModel(weights=(3.0, 2.0, 1.0, 2.0), bias=-4.77)
+
+
+class ConfidenceScorer:
+    """抽出結果から特徴量を作り、ConfidenceModel で confidence を算出するクラス。"""
+
+    def __init__(
+        self,
+        model: ConfidenceModel = DEFAULT_MODEL,
+        canonicalizer: StateCanonicalizer | None = None,
+        label_reliability: Mapping[str, float] | None = None,
+    ) -> None:
+        """ConfidenceScorer を初期化する。
+
+        Args:
+            model: confidence を算出するモデル
+            canonicalizer: 語彙一致強度の算出に使う正規化器（None で一致強度は中立値）
+            label_reliability: state ごとのフィードバック上の正答率（None で中立値）
+        """
+        self.model = model
+        self.canonicalizer = canonicalizer
+        self.label_reliability = label_reliability
+
+    def features(self, item: ScoringInput) -> np.ndarray:
+        """1件分の特徴量を返す。
+
+        Args:
+            item: 算出入力
+
+        Returns:
+            np.ndarray: len(FEATURES) 次元の特徴量
+        """
+        import numpy as np
+
+        return np.array(self._feature_row(item))
+
+    def features_batch(self, items: Sequence[ScoringInput]) -> np.ndarray:
+        """複数件の特徴量行列を返す。
+
+        Args:
+            items: 算出入力の列
+
+        Returns:
+            np.ndarray: (件数, len(FEATURES)) の特徴量行列
+        """
+        import numpy as np
+
+        if not items:
+            return np.empty((0, len(FEATURES)))
+        # バッチ内で同じ表現の語彙照合を繰り返さないよう、照合結果を共有する。
+        matches: dict[str, StateMatch | None] = {}
+        return np.array([self._feature_row(item, matches) for item in items], dtype=np.float64)
+
+    def score(self, item: ScoringInput) -> float:
+        """1件分の confidence を返す。
+
+        Args:
+            item: 算出入力
+
+        Returns:
+            float: 小数第4位に丸めた confidence
+        """
+        return float(self.score_batch([item])[0])
+
+    def score_batch(self, items: Sequence[ScoringInput]) -> np.ndarray:
+        """複数件の confidence をまとめて算出する。
+
+        Args:
+            items: 算出入力の列
+
+        Returns:
+            np.ndarray: 小数第4位に丸めた confidence 配列
+        """
+        import numpy as np
+
+        if not items:
+            return np.empty(0)
+        return np.round(self.model.predict(self.features_batch(items)), 4)
+
+    def _feature_row(
+        self, item: ScoringInput, matches: dict[str, StateMatch | None] | None = None
+    ) -> tuple[float, float, float, float]:
+        """1件分の特徴量を FEATURES の順で返す（matches はバッチ内の語彙照合結果の共有先）。"""
+        states = list(item.states)
+        if not states:
+            return (0.0, 0.0, 0.0, 0.0)
+
+        if self.canonicalizer is None:
+            evidence = {text.strip() for text in item.extracted}
+            match_strength = NEUTRAL
+        else:
+            evidence = set()
+            total = 0.0
+            for text in item.extracted:
+                key = text.strip()
+                if item.matches is not None and key in item.matches:
+                    match = item.matches[key]
+                elif matches is not None and key in matches:
+                    match = matches[key]
+                else:
+                    match = self.canonicalizer.lookup(key)
+                    if matches is not None:
+                        matches[key] = match
+                if match is None:
+                    evidence.add(key)
+                else:
+                    evidence.add(match.label)
+                    total += match.similarity
+            match_strength = total / len(item.extracted) if item.extracted else 0.0
+
+        coverage = sum(state in evidence for state in states) / len(states)
+        if item.preference_states is None:
+            preference = NEUTRAL
+        else:
+            preference = sum(state in item.preference_states for state in states) / len(states)
+        if self.label_reliability is None:
+            reliability = NEUTRAL
+        else:
+            reliability = sum(self.label_reliability.get(s, NEUTRAL) for s in states) / len(states)
+        return (coverage, match_strength, preference, reliability)
+
+
+@dataclass(frozen=True)
+class ReliabilityBin:
+    """信頼度曲線の1区間を表すデータ。"""
+
+    lower: float
+    upper: float
+    count: int
+    mean_confidence: float
+    accuracy: float
+
+
+def reliability_curve(
+    confidences: np.ndarray, outcomes: np.ndarray, bins: int = 10
+) -> list[ReliabilityBin]:
+    """confidence を等幅区間に分け、区間ごとの平均 confidence と正答率を返す。
+
+    Args:
+        confidences: 0〜1 の confidence 配列
+        outcomes: 0/1 の正誤配列
+        bins: 区間数
+
+    Returns:
+        list[ReliabilityBin]: 件数 0 の区間を含む全区間
+    """
+    import numpy as np
+
+    conf = np.asarray(confidences, dtype=np.float64)
+    hits = np.asarray(outcomes, dtype=np.float64)
+    index = np.minimum((conf * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    conf_sum = np.bincount(index, weights=conf, minlength=bins)
+    hit_sum = np.bincount(index, weights=hits, minlength=bins)
+    safe = np.maximum(counts, 1)
+    return [
+        ReliabilityBin(
+            lower=b / bins,
+            upper=(b + 1) / bins,
+            count=int(counts[b]),
+            mean_confidence=float(conf_sum[b] / safe[b]),
+            accuracy=float(hit_sum[b] / safe[b]),
+        )
+        for b in range(bins)
+    ]
+
+
+def expected_calibration_error(curve: Iterable[ReliabilityBin]) -> float:
+    """信頼度曲線から ECE（件数加重の |正答率 - 平均 confidence|）を返す。
+
+    Args:
+        curve: reliability_curve() の結果
+
+    Returns:
+        float: ECE（0 が完全校正）
+    """
+    bins = list(curve)
+    total = sum(b.count for b in bins)
+    if total == 0:
+        return 0.0
+    return sum(b.count * abs(b.accuracy - b.mean_confidence) for b in bins) / total
+
+
+def read_labeled(path: str | Path) -> tuple[list[ScoringInput], np.ndarray]:
+    """ラベル付き JSONL（extracted, states, preference_states?, correct）を読み込む。
+
+    Args:
+        path: JSONL ファイルのパス
+
+    Returns:
+        tuple: (算出入力の一覧, 0/1 の正誤配列)
+    """
+    import numpy as np
+
+    items: list[ScoringInput] = []
+    outcomes: list[float] = []
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            preference = row.get("preference_states")
+            items.append(
+                ScoringInput(
+                    extracted=list(row.get("extracted") or []),
+                    states=list(row.get("states") or []),
+                    preference_states=frozenset(preference) if preference is not None else None,
+                )
+            )
+            outcomes.append(1.0 if row.get("correct") else 0.0)
+    return items, np.asarray(outcomes)
+
+
+def format_report(curve: list[ReliabilityBin]) -> str:
+    """信頼度曲線を表形式のテキストにする。
+
+    Args:
+        curve: reliability_curve() の結果
+
+    Returns:
+        str: 複数行のレポート
+    """
+    lines = ["bin          count  confidence  accuracy  gap"]
+    for b in curve:
+        if b.count == 0:
+            continue
+        lines.append(
+            f"[{b.lower:.1f}, {b.upper:.1f})  {b.count:6d}  {b.mean_confidence:10.3f}"
+            f"  {b.accuracy:8.3f}  {b.accuracy - b.mean_confidence:+.3f}"
+        )
+    lines.append(f"ECE {expected_calibration_error(curve):.4f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """ラベル付きデータで信頼度曲線を出力し、必要に応じてモデルを校正する。"""
+    parser = argparse.ArgumentParser(description="confidence calibration report")
+    parser.add_argument("path", help="labeled JSONL (extracted, states, preference_states, correct)")
+    parser.add_argument("--model", default=None, help="model JSON to evaluate (default: prior weights)")
+    parser.add_argument("--vocabulary", default=None, help="state vocabulary JSON for match strength")
+    parser.add_argument("--bins", type=int, default=10)
+    parser.add_argument("--fit", default=None, help="fit a model and write it to this path")
+    args = parser.parse_args()
+
+    from services.inference.state_canonicalizer import StateCanonicalizer
+
+    canonicalizer = None
+    if args.vocabulary:
+        vocabulary = json.loads(Path(args.vocabulary).read_text(encoding="utf-8"))
+        canonicalizer = StateCanonicalizer.from_vocabulary(vocabulary)
+    model = ConfidenceModel.load(args.model) if args.model else DEFAULT_MODEL
+    scorer = ConfidenceScorer(model=model, canonicalizer=canonicalizer)
+
+    items, outcomes = read_labeled(args.path)
+    features = scorer.features_batch(items)
+    print("current model")
+    print(format_report(reliability_curve(model.predict(features), outcomes, args.bins)))
+
+    if args.fit:
+        fitted = ConfidenceModel.fit(features, outcomes)
+        Path(args.fit).write_text(json.dumps(fitted.to_dict(), indent=2) + "\n", encoding="utf-8")
+        print(f"\nfitted model -> {args.fit}")
+        print(format_report(reliability_curve(fitted.predict(features), outcomes, args.bins)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""契約ファイルを事前コンパイルした起動用アーティファクトを提供する。
+
+入出力: state_intent.schema.json + state_vocabulary.json -> contracts.bin / contracts.bin -> CompiledContract。
+制約:
+    - スキーマは本リポジトリで使うキーワードのみをコンパイル対象とし、未対応キーワードはビルド時に拒否する
+    - アーティファクトは1回の読み込みで復元できる単一ファイルとする
+    - Python バージョンが異なるアーティファクトは使わず、JSON から再コンパイルする
+    - 契約 JSON のハッシュがアーティファクトと異なる場合も使わず、JSON から再コンパイルする
+
+Note:
+    - スキーマ検証は Python ソースへ変換した関数で行い、起動時に JSON Schema を解釈しない
+    - ビルド手順: python -m services.inference.contract_artifacts（Docker ビルド時に実行する）
+    - アーティファクトが無い環境でも load_contract() は JSON から同じ結果を組み立てる
+    - load_contract() はパスと各ファイルの mtime/サイズが同じ間は読み込み結果を使い回す
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import hashlib
+import json
+import marshal
+from pathlib import Path
+import pickle
+import re
+import sys
+import threading
+from typing import Any, Callable
+
+CONTRACTS_DIR = Path(__file__).resolve().parents[2] / "contracts"
+SCHEMA_PATH = CONTRACTS_DIR / "state_intent.schema.json"
+VOCABULARY_PATH = CONTRACTS_DIR / "state_vocabulary.json"
+ARTIFACT_PATH = CONTRACTS_DIR / "compiled" / "contracts.bin"
+
+ARTIFACT_FORMAT = 3
+
+_SUPPORTED_KEYWORDS = {
+    "$schema",
+    "type",
+    "required",
+    "properties",
+    "items",
+    "minItems",
+    "uniqueItems",
+    "minimum",
+    "maximum",
+    "pattern",
+    "const",
+}
+
+# load_contract() の読み込み結果（パスの組 -> (ファイルの更新情報, 契約)）。
+_loaded: dict[tuple[Path, Path, Path], tuple[tuple[Any, ...], CompiledContract]] = {}
+_loaded_lock = threading.Lock()
+
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+}
+
+
+class ContractError(Exception):
+    """契約ファイルのコンパイル・読み込み失敗を表す例外。"""
+
+
+@dataclass(frozen=True)
+class CompiledContract:
+    """コンパイル済みの契約を表すデータ。
+
+    Note:
+        - validate(payload) はスキーマ違反を issues(list[str]) として返す
+    """
+
+    validate: Callable[[Any], list[str]]
+    vocabulary: dict[str, Any]
+    schema_sha256: str
+    source: str
+    schema: dict[str, Any]
+    vocabulary_sha256: str
+
+
+def compile_schema(schema: dict[str, Any]) -> str:
+    """JSON Schema を検証関数の Python ソースへ変換する。
+
+    Args:
+        schema: state_intent スキーマ
+
+    Returns:
+        str: validate(data) -> list[str] を定義するソース
+
+    Raises:
+        ContractError: 未対応のキーワード・型を含む場合
+    """
+    writer = _SourceWriter()
+    writer.line("def validate(data):")
+    writer.indent += 1
+    writer.line("issues = []")
+    _emit(schema, "data", "$", writer)
+    writer.line("return issues")
+    header = ["import re", ""] + writer.constants + [""]
+    return "\n".join(header + writer.lines) + "\n"
+
+
+def build_contract(
+    schema_path: str | Path = SCHEMA_PATH,
+    vocabulary_path: str | Path = VOCABULARY_PATH,
+) -> CompiledContract:
+    """契約 JSON を読み込みコンパイルする。
+
+    Args:
+        schema_path: スキーマファイルのパス
+        vocabulary_path: state 語彙ファイルのパス
+
+    Returns:
+        CompiledContract: コンパイル済み契約
+    """
+    schema_bytes = Path(schema_path).read_bytes()
+    schema = json.loads(schema_bytes)
+    source = compile_schema(schema)
+    vocabulary_bytes = Path(vocabulary_path).read_bytes()
+    return CompiledContract(
+        validate=_load_function(compile(source, "<state_intent_contract>", "exec")),
+        vocabulary=json.loads(vocabulary_bytes),
+        schema_sha256=hashlib.sha256(schema_bytes).hexdigest(),
+        source=source,
+        schema=schema,
+        vocabulary_sha256=hashlib.sha256(vocabulary_bytes).hexdigest(),
+    )
+
+
+def write_artifact(contract: CompiledContract, path: str | Path = ARTIFACT_PATH) -> Path:
+    """コンパイル済み契約を単一ファイルへ書き出す。
+
+    Args:
+        contract: build_contract() の結果
+        path: 出力先パス
+
+    Returns:
+        Path: 書き出したファイルのパス
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    code = compile(contract.source, "<state_intent_contract>", "exec")
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "python": list(sys.version_info[:2]),
+        "schema_sha256": contract.schema_sha256,
+        "vocabulary_sha256": contract.vocabulary_sha256,
+        "source": contract.source,
+        "code": marshal.dumps(code),
+        "vocabulary": contract.vocabulary,
+        "schema": contract.schema,
+    }
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL))
+    tmp.replace(target)
+    return target
+
+
+def load_contract(
+    artifact_path: str | Path = ARTIFACT_PATH,
+    schema_path: str | Path = SCHEMA_PATH,
+    vocabulary_path: str | Path = VOCABULARY_PATH,
+) -> CompiledContract:
+    """起動用に契約を読み込む。
+
+    Args:
+        artifact_path: 事前コンパイル済みアーティファクトのパス
+        schema_path: スキーマパス（アーティファクトの鮮度確認と再コンパイルに使う）
+        vocabulary_path: 語彙パス（アーティファクトの鮮度確認と再コンパイルに使う）
+
+    Returns:
+        CompiledContract: コンパイル済み契約
+
+    Raises:
+        ContractError: アーティファクトが壊れている場合
+
+    Note:
+        - 起動時は契約 JSON のハッシュのみを求め、アーティファクトと一致すればコンパイルしない
+        - 契約 JSON が存在しない環境ではアーティファクトをそのまま使う
+        - 3ファイルの mtime/サイズが前回と同じなら前回の契約を返す（呼び出し側で変更しないこと）
+    """
+    paths = (Path(artifact_path), Path(schema_path), Path(vocabulary_path))
+    stamp = tuple(_file_stamp(path) for path in paths)
+    with _loaded_lock:
+        cached = _loaded.get(paths)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    contract = _load_contract(*paths)
+    with _loaded_lock:
+        _loaded[paths] = (stamp, contract)
+    return contract
+
+
+def _file_stamp(path: Path) -> tuple[int, int] | None:
+    """ファイルの更新検知用に (mtime_ns, サイズ) を返す（存在しなければ None）。"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_contract(artifact_path: Path, schema_path: Path, vocabulary_path: Path) -> CompiledContract:
+    """キャッシュを介さずに契約を読み込む。"""
+    artifact = _read_artifact(artifact_path)
+    if artifact is None or not _is_fresh(artifact, schema_path, vocabulary_path):
+        return build_contract(schema_path, vocabulary_path)
+
+    return CompiledContract(
+        validate=_load_function(marshal.loads(artifact["code"])),
+        vocabulary=artifact["vocabulary"],
+        schema_sha256=artifact["schema_sha256"],
+        source=artifact["source"],
+        schema=artifact["schema"],
+        vocabulary_sha256=artifact["vocabulary_sha256"],
+    )
+
+
+def _is_fresh(artifact: dict[str, Any], schema_path: Path, vocabulary_path: Path) -> bool:
+    """アーティファクトが現在の契約 JSON から作られたものか判定する。"""
+    for key, path in (("schema_sha256", schema_path), ("vocabulary_sha256", vocabulary_path)):
+        try:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        except FileNotFoundError:
+            continue
+        if artifact.get(key) != digest:
+            return False
+    return True
+
+
+def _read_artifact(path: Path) -> dict[str, Any] | None:
+    """アーティファクトを1回で読み込み、互換性がなければ None を返す。"""
+    try:
+        artifact = pickle.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, ValueError) as exc:
+        raise ContractError(f"broken contract artifact: {path}") from exc
+
+    if not isinstance(artifact, dict):
+        raise ContractError(f"broken contract artifact: {path}")
+    if artifact.get("format") != ARTIFACT_FORMAT:
+        return None
+    if tuple(artifact.get("python") or ()) != tuple(sys.version_info[:2]):
+        return None
+    return artifact
+
+
+def _load_function(code: Any) -> Callable[[Any], list[str]]:
+    """コンパイル済みコードを実行し validate 関数を取り出す。"""
+    namespace: dict[str, Any] = {"_unique": _unique}
+    exec(code, namespace)  # noqa: S102 - 自リポジトリの契約から生成したコードのみを実行する
+    return namespace["validate"]
+
+
+def _unique(items: list[Any]) -> bool:
+    """要素がすべて異なるか判定する（辞書・配列要素にも対応する）。"""
+    keys = [json.dumps(item, sort_keys=True, ensure_ascii=False) for item in items]
+    return len(set(keys)) == len(keys)
+
+
+class _SourceWriter:
+    """インデント付きでソース行を蓄積する補助クラス。"""
+
+    def __init__(self) -> None:
+        """空のソースで初期化する。"""
+        self.lines: list[str] = []
+        self.constants: list[str] = []
+        self.indent = 0
+        self._counter = 0
+
+    def line(self, text: str) -> None:
+        """現在のインデントで1行追加する。"""
+        self.lines.append("    " * self.indent + text)
+
+    def name(self, prefix: str) -> str:
+        """衝突しない変数名を払い出す。"""
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+
+def _emit(schema: dict[str, Any], var: str, path: str, writer: _SourceWriter) -> None:
+    """スキーマ1ノード分の検証コードを出力する。"""
+    unsupported = set(schema) - _SUPPORTED_KEYWORDS
+    if unsupported:
+        raise ContractError(f"unsupported schema keywords at {path}: {sorted(unsupported)}")
+
+    schema_type = schema.get("type")
+    if schema_type is not None:
+        if schema_type not in _TYPE_CHECKS:
+            raise ContractError(f"unsupported type at {path}: {schema_type}")
+        writer.line(f"if not {_TYPE_CHECKS[schema_type].format(v=var)}:")
+        writer.line(f"    issues.append({path + ' must be ' + schema_type!r})")
+        writer.line("else:")
+        writer.indent += 1
+        writer.line("pass")
+
+    if "const" in schema:
+        writer.line(f"if {var} != {schema['const']!r}:")
+        writer.line(f"    issues.append({path + ' must be ' + json.dumps(schema['const'])!r})")
+    if "minimum" in schema:
+        writer.line(f"if {var} < {schema['minimum']!r}:")
+        writer.line(f"    issues.append({path + ' must be >= ' + str(schema['minimum'])!r})")
+    if "maximum" in schema:
+        writer.line(f"if {var} > {schema['maximum']!r}:")
+        writer.line(f"    issues.append({path + ' must be <= ' + str(schema['maximum'])!r})")
+    if "pattern" in schema:
+        re.compile(schema["pattern"])
+        pattern_name = writer.name("_pattern")
+        writer.constants.append(f"{pattern_name} = re.compile({schema['pattern']!r})")
+        writer.line(f"if not {pattern_name}.search({var}):")
+        writer.line(f"    issues.append({path + ' does not match pattern'!r})")
+    if "minItems" in schema:
+        writer.line(f"if len({var}) < {int(schema['minItems'])}:")
+        writer.line(
+            f"    issues.append({path + ' must contain at least ' + str(schema['minItems']) + ' items'!r})"
+        )
+    if schema.get("uniqueItems"):
+        writer.line(f"if not _unique({var}):")
+        writer.line(f"    issues.append({path + ' must not contain duplicates'!r})")
+
+    for field in schema.get("required") or []:
+        writer.line(f"if {field!r} not in {var}:")
+        writer.line(f"    issues.append({path + '.' + field + ' is required'!r})")
+
+    for field, child in (schema.get("properties") or {}).items():
+        child_var = writer.name("v")
+        writer.line(f"if {field!r} in {var}:")
+        writer.indent += 1
+        writer.line(f"{child_var} = {var}[{field!r}]")
+        _emit(child, child_var, f"{path}.{field}", writer)
+        writer.indent -= 1
+
+    if "items" in schema:
+        item_var = writer.name("item")
+        writer.line(f"for {item_var} in {var}:")
+        writer.indent += 1
+        _emit(schema["items"], item_var, f"{path}[]", writer)
+        writer.indent -= 1
+
+    if schema_type is not None:
+        writer.indent -= 1
+
+
+def main() -> None:
+    """契約アーティファクトをビルドする。"""
+    parser = argparse.ArgumentParser(description="build precompiled contract artifacts")
+    parser.add_argument("--schema", default=str(SCHEMA_PATH))
+    parser.add_argument("--vocabulary", default=str(VOCABULARY_PATH))
+    parser.add_argument("--output", default=str(ARTIFACT_PATH))
+    args = parser.parse_args()
+
+    target = write_artifact(build_contract(args.schema, args.vocabulary), args.output)
+    print(f"wrote {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""契約で検証・語彙で state 正規化する Orchestrator の公開ファクトリを提供する。
+
+入出力: 語彙・類似度・confidence モデル（省略時は契約と環境変数）-> Orchestrator。
+制約:
+    - FastAPI や API 側の共有状態（監査集計など）に依存せず、CLI・バッチ・ワーカーから呼び出せる
+    - 引数なしで呼び出せる関数とし、replay の --factory やプロセス並列の初期化関数にそのまま渡せる
+
+Note:
+    - 検証には事前コンパイル済み契約（load_contract()）を使う
+    - SAA_STATE_SIMILARITY で語彙照合の類似度、SAA_CONFIDENCE_MODEL で校正済みモデルを指定できる
+    - 実行例: python -m services.inference.replay audit.jsonl.gz --factory services.inference.factory:build_orchestrator
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from services.inference.audit_store import AuditStore
+from services.inference.confidence import DEFAULT_MODEL, ConfidenceModel, ConfidenceScorer
+from services.inference.contract_artifacts import load_contract
+from services.inference.orchestrator import Orchestrator, PayloadTemplate
+from services.inference.state_canonicalizer import DEFAULT_THRESHOLD, StateCanonicalizer
+from services.inference.validator import Validator
+
+
+def build_orchestrator(
+    vocabulary: dict[str, Any] | None = None,
+    similarity: float | None = None,
+    model: ConfidenceModel | None = None,
+    template: PayloadTemplate | None = None,
+    tenant_id: str | None = None,
+    audit_store: AuditStore | None = None,
+) -> Orchestrator:
+    """契約で検証し、語彙へ state を正規化する Orchestrator を構築する。
+
+    Args:
+        vocabulary: state 語彙（未指定時は契約の語彙）
+        similarity: 語彙照合の類似度下限（未指定時は SAA_STATE_SIMILARITY、なければ既定値）
+        model: confidence モデル（未指定時は SAA_CONFIDENCE_MODEL、なければ事前重み）
+        template: payload の既定項目（未指定時は PayloadTemplate の既定値）
+        tenant_id: 監査ログへ記録するテナントID
+        audit_store: 監査ログ保存先（未指定時はインメモリ）
+
+    Returns:
+        Orchestrator: 構築済みの Orchestrator
+    """
+    contract = load_contract()
+    if similarity is None:
+        similarity = float(os.environ.get("SAA_STATE_SIMILARITY") or DEFAULT_THRESHOLD)
+    if model is None:
+        path = os.environ.get("SAA_CONFIDENCE_MODEL")
+        model = ConfidenceModel.load(path) if path else DEFAULT_MODEL
+
+    canonicalizer = StateCanonicalizer.from_vocabulary(
+        contract.vocabulary if vocabulary is None else vocabulary, threshold=similarity
+    )
+    return Orchestrator(
+        validator=Validator(schema_check=contract.validate),
+        audit_store=audit_store,
+        canonicalizer=canonicalizer,
+        template=template,
+        tenant_id=tenant_id,
+        scorer=ConfidenceScorer(model=model, canonicalizer=canonicalizer),
+    )
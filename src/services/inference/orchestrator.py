@@ -8,17 +8,28 @@
 Note:
     - 成功/失敗の両パスで監査ログを必ず保存する
     - Validator が失敗している間は Generator を呼び出さない
+    - 未指定の構成要素は初回参照時に生成し、起動時の構築コストを持たない
+    - 監査ログには段階別の所要時間（latency_ms: reader/payload/validator/generator、全試行の合計）を含める
+    - payload は state 正規化と confidence 算出（_build_payload）の所要時間とする
+    - 成功時の監査ログには Reader 抽出結果（state）と最終出力の state（output_state）を両方残す
+    - intent・next_actions・action_bindings・補助 state は PayloadTemplate で差し替える（テナント別設定用）
+    - confidence は ConfidenceScorer で算出し、run_batch() ではバッチ全体を1回で評価する
 """
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
+import threading
+import time
 import uuid
-from typing import Any
+from typing import Any, Callable, Sequence
 
 from services.inference.audit_store import AuditStore
+from services.inference.confidence import ConfidenceScorer, ScoringInput
 from services.inference.generator import Generator
 from services.inference.reader import Reader
+from services.inference.state_canonicalizer import StateCanonicalizer, StateMatch
 from services.inference.validator import ValidationResult, Validator
 
 
@@ -26,9 +37,72 @@ class MaxRetryError(Exception):
     """Validator NGが規定回数を超えた場合に送出する例外。"""
 
 
+@dataclass(frozen=True)
+class PayloadTemplate:
+    """Reader 抽出結果以外の payload 項目を表すデータ。
+
+    Note:
+        - fallback_states は Reader 抽出件数が minItems に満たない場合の補助 state
+    """
+
+    intent: str = "再来店動機付け"
+    next_actions: tuple[str, ...] = ("限定LINE配信案", "会員限定イベント", "期間限定特典")
+    rollback_plan: str = "配信停止→通常施策に戻す"
+    action_bindings: tuple[dict[str, Any], ...] = (
+        {"action": "LINE配信", "api": "line.broadcast", "dry_run": True},
+    )
+    fallback_states: tuple[str, ...] = ("来店頻度低下", "価格感度低", "限定感志向")
+
+
+class _LazyComponent:
+    """初回参照時に既定実装を生成する属性記述子。
+
+    Note:
+        - 生成時の排他は Orchestrator インスタンスごと・構成要素ごとのロックで行う
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        """既定実装の生成関数を保持する。
+
+        Args:
+            factory: 未指定時に呼び出す生成関数
+        """
+        self.factory = factory
+        self.attr = ""
+        self.lock_attr = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """保存先の属性名を決定する。"""
+        self.attr = f"_{name}"
+        self.lock_attr = f"_{name}_lock"
+
+    def __get__(self, obj: Any, objtype: type | None = None) -> Any:
+        """構成要素を返し、未生成なら生成する。"""
+        if obj is None:
+            return self
+        value = obj.__dict__.get(self.attr)
+        if value is None:
+            # 並行初回アクセスで AuditStore 等が二重生成されないよう排他する。
+            with obj.__dict__.setdefault(self.lock_attr, threading.Lock()):
+                value = obj.__dict__.get(self.attr)
+                if value is None:
+                    value = self.factory()
+                    obj.__dict__[self.attr] = value
+        return value
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        """構成要素を差し替える（None の場合は次回参照時に既定実装を生成する）。"""
+        obj.__dict__[self.attr] = value
+
+
 class Orchestrator:
     """Reader -> Validator -> Generator の順で処理を実行する。"""
 
+    reader = _LazyComponent(Reader)
+    validator = _LazyComponent(Validator)
+    generator = _LazyComponent(Generator)
+    audit_store = _LazyComponent(AuditStore)
+
     def __init__(
         self,
         reader: Reader | None = None,
@@ -36,6 +110,10 @@ class Orchestrator:
         generator: Generator | None = None,
         audit_store: AuditStore | None = None,
         max_retries: int = 2,
+        canonicalizer: StateCanonicalizer | None = None,
+        template: PayloadTemplate | None = None,
+        tenant_id: str | None = None,
+        scorer: ConfidenceScorer | None = None,
     ) -> None:
         """Orchestratorを初期化する。
 
@@ -45,15 +123,24 @@ class Orchestrator:
             generator: Generator実装（未指定時は既定Generator）
             audit_store: 監査ログ保存先（未指定時はインメモリ）
             max_retries: Validator NG時の再試行回数
+            canonicalizer: state 語彙への正規化器（未指定時は完全一致の重複排除のみ）
+            template: payload の既定項目（未指定時は PayloadTemplate の既定値）
+            tenant_id: 監査ログへ記録するテナントID（未指定時は記録しない）
+            scorer: confidence の算出器（未指定時は事前重みと canonicalizer を使う）
 
         Note:
             - max_retries=2 の場合、最大試行回数は3回（初回+再試行2回）
+            - 未指定の構成要素は初回参照時に既定実装を生成する
         """
-        self.reader = reader or Reader()
-        self.validator = validator or Validator()
-        self.generator = generator or Generator()
-        self.audit_store = audit_store or AuditStore()
+        self.reader = reader
+        self.validator = validator
+        self.generator = generator
+        self.audit_store = audit_store
         self.max_retries = max_retries
+        self.canonicalizer = canonicalizer
+        self.template = template or PayloadTemplate()
+        self.tenant_id = tenant_id
+        self.scorer = scorer or ConfidenceScorer(canonicalizer=canonicalizer)
 
     def run(self, input_text: str) -> dict[str, Any]:
         """入力テキストを処理し、成功時は最終JSONを返す。
@@ -71,13 +158,115 @@ class Orchestrator:
             - 失敗時でも必ず監査ログを保存する
             - Validator NGの間は Generator を呼び出さない
         """
-        last_state: list[str] = []
-        last_result = ValidationResult(ok=False, issues=["validation not executed"])
+        latency_ms = {"reader": 0.0, "payload": 0.0, "validator": 0.0, "generator": 0.0}
+        return self._attempt(input_text, self.max_retries + 1, latency_ms)
+
+    def run_batch(self, input_texts: Sequence[str]) -> list[dict[str, Any] | Exception]:
+        """複数の入力テキストを処理し、入力順に結果を返す。
+
+        Args:
+            input_texts: 変換対象の自然文の列
+
+        Returns:
+            list: 成功時は最終JSON、失敗時はその入力で発生した例外（入力と同じ順）
+
+        Note:
+            - confidence は全件分を1回の score_batch() で算出する
+            - 初回の Validator が NG の入力は残りの試行回数だけ再試行し、試行回数・所要時間を単件と揃える
+            - 1件の失敗は他の入力の処理を止めない
+        """
+        results: list[dict[str, Any] | Exception | None] = [None] * len(input_texts)
+        pending: list[tuple[int, list[str], list[str], dict[str, StateMatch | None], float, float]] = []
+        for index, input_text in enumerate(input_texts):
+            started = time.perf_counter()
+            try:
+                state = self.reader.extract(input_text)
+                extracted = time.perf_counter()
+                matches: dict[str, StateMatch | None] = {}
+                normalized = self._normalize_state(state, matches)
+            except Exception as exc:
+                results[index] = exc
+                continue
+            pending.append(
+                (
+                    index,
+                    state,
+                    normalized,
+                    matches,
+                    (extracted - started) * 1000,
+                    (time.perf_counter() - extracted) * 1000,
+                )
+            )
+
+        started = time.perf_counter()
+        confidences = self.scorer.score_batch(
+            [
+                self._scoring_input(state, normalized, matches)
+                for _, state, normalized, matches, _, _ in pending
+            ]
+        )
+        # バッチ評価の所要時間は件数で按分して各入力の payload 段階へ加える。
+        scoring_ms = (time.perf_counter() - started) * 1000 / max(len(pending), 1)
+        for (index, state, normalized, _, reader_ms, normalize_ms), confidence in zip(pending, confidences):
+            started = time.perf_counter()
+            payload = self._build_payload(state, normalized=normalized, confidence=float(confidence))
+            checked = time.perf_counter()
+            validation_result = self.validator.validate(payload)
+            latency_ms = {
+                "reader": reader_ms,
+                "payload": normalize_ms + scoring_ms + (checked - started) * 1000,
+                "validator": (time.perf_counter() - checked) * 1000,
+                "generator": 0.0,
+            }
+            try:
+                if validation_result.ok:
+                    results[index] = self._complete(
+                        input_texts[index], state, payload, validation_result, latency_ms
+                    )
+                else:
+                    results[index] = self._attempt(
+                        input_texts[index], self.max_retries, latency_ms, state, validation_result
+                    )
+            except Exception as exc:
+                results[index] = exc
+        return results
+
+    def _attempt(
+        self,
+        input_text: str,
+        attempts: int,
+        latency_ms: dict[str, float],
+        last_state: list[str] | None = None,
+        last_result: ValidationResult | None = None,
+    ) -> dict[str, Any]:
+        """Reader -> Validator を最大 attempts 回試行し、成功時は最終JSONを返す。
+
+        Args:
+            input_text: 変換対象の自然文
+            attempts: 残りの試行回数
+            latency_ms: 段階別の所要時間（各試行分を加算する）
+            last_state: 実施済みの試行で抽出した state 一覧
+            last_result: 実施済みの試行の Validator 結果
+
+        Returns:
+            dict[str, Any]: Generatorが生成した最終出力
+
+        Raises:
+            MaxRetryError: 残りの試行がすべて Validator NG の場合
+        """
+        last_state = last_state or []
+        last_result = last_result or ValidationResult(ok=False, issues=["validation not executed"])
 
-        for _ in range(self.max_retries + 1):
+        for _ in range(attempts):
+            started = time.perf_counter()
             state = self.reader.extract(input_text)
+            extracted = time.perf_counter()
             payload = self._build_payload(state)
+            checked = time.perf_counter()
+            latency_ms["reader"] += (extracted - started) * 1000
+            latency_ms["payload"] += (checked - extracted) * 1000
             validation_result = self.validator.validate(payload)
+            latency_ms["validator"] += (time.perf_counter() - checked) * 1000
 
             last_state = state
             last_result = validation_result
@@ -85,65 +274,130 @@ class Orchestrator:
             if not validation_result.ok:
                 continue
 
-            output = self.generator.generate(payload, validation_result)
-            self.audit_store.save(
-                {
-                    "trace_id": output.get("trace_id", str(uuid.uuid4())),
-                    "input_text": input_text,
-                    "state": state,
-                    "status": "success",
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                }
-            )
-            return output
+            return self._complete(input_text, state, payload, validation_result, latency_ms)
 
         error_message = (
             "validation failed after max retries: " + ", ".join(last_result.issues)
         )
-        self.audit_store.save(
+        self._save_audit(
             {
                 "trace_id": str(uuid.uuid4()),
                 "input_text": input_text,
                 "state": last_state,
+                "intent": self.template.intent,
                 "status": "failed",
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "error": error_message,
+                "issues": list(last_result.issues),
+                "latency_ms": latency_ms,
             }
         )
         raise MaxRetryError(error_message)
 
-    def _build_payload(self, state: list[str]) -> dict[str, Any]:
+    def _complete(
+        self,
+        input_text: str,
+        state: list[str],
+        payload: dict[str, Any],
+        validation_result: ValidationResult,
+        latency_ms: dict[str, float],
+    ) -> dict[str, Any]:
+        """Validator OK の payload から最終出力を生成し、成功の監査ログを保存する。
+
+        Args:
+            input_text: 変換対象の自然文
+            state: Readerが抽出したstate一覧
+            payload: 検証済みペイロード
+            validation_result: Validator の結果
+            latency_ms: 段階別の所要時間（generator を加算する）
+
+        Returns:
+            dict[str, Any]: Generatorが生成した最終出力
+        """
+        started = time.perf_counter()
+        output = self.generator.generate(payload, validation_result)
+        latency_ms["generator"] += (time.perf_counter() - started) * 1000
+        self._save_audit(
+            {
+                "trace_id": output.get("trace_id", str(uuid.uuid4())),
+                "input_text": input_text,
+                "state": state,
+                "output_state": output.get("state"),
+                "intent": output.get("intent"),
+                "next_actions": output.get("next_actions"),
+                "confidence": payload["confidence"],
+                "status": "success",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "latency_ms": latency_ms,
+            }
+        )
+        return output
+
+    def _save_audit(self, record: dict[str, Any]) -> None:
+        """監査ログを保存する（tenant_id 指定時は record に付与する）。
+
+        Args:
+            record: 監査ログ辞書
+        """
+        if self.tenant_id is not None:
+            record["tenant_id"] = self.tenant_id
+        self.audit_store.save(record)
+
+    def _build_payload(
+        self,
+        state: list[str],
+        normalized: list[str] | None = None,
+        confidence: float | None = None,
+    ) -> dict[str, Any]:
         """Reader出力からValidator入力ペイロードを組み立てる。
 
         Args:
             state: Readerが抽出したstate一覧
+            normalized: 正規化済みの state 一覧（未指定時はここで正規化する）
+            confidence: 算出済みの confidence（未指定時は scorer で1件分を算出する）
 
         Returns:
             dict[str, Any]: Validator/Geneator向けの中間ペイロード
         """
-        normalized_state = self._normalize_state(state)
+        matches: dict[str, StateMatch | None] | None = None
+        if normalized is None:
+            matches = {}
+            normalized_state = self._normalize_state(state, matches)
+        else:
+            normalized_state = normalized
+        if confidence is None:
+            confidence = self.scorer.score(self._scoring_input(state, normalized_state, matches))
+        template = self.template
 
         return {
             "state": normalized_state,
-            "intent": "再来店動機付け",
-            "next_actions": [
-                "限定LINE配信案",
-                "会員限定イベント",
-                "期間限定特典",
-            ],
-            "confidence": 0.8,
+            "intent": template.intent,
+            "next_actions": list(template.next_actions),
+            "confidence": confidence,
             "trace_id": str(uuid.uuid4()),
-            "rollback_plan": "配信停止→通常施策に戻す",
-            "action_bindings": [
-                {"action": "LINE配信", "api": "line.broadcast", "dry_run": True}
-            ],
+            "rollback_plan": template.rollback_plan,
+            "action_bindings": [dict(binding) for binding in template.action_bindings],
         }
 
-    def _normalize_state(self, state: list[str]) -> list[str]:
+    def _scoring_input(
+        self,
+        state: list[str],
+        normalized: list[str],
+        matches: dict[str, StateMatch | None] | None,
+    ) -> ScoringInput:
+        """confidence 算出の入力を組み立てる（正規化時の照合結果は同じ canonicalizer の場合だけ渡す）。"""
+        if matches is None or getattr(self.scorer, "canonicalizer", None) is not self.canonicalizer:
+            matches = None
+        return ScoringInput(extracted=state, states=normalized, matches=matches)
+
+    def _normalize_state(
+        self, state: list[str], matches: dict[str, StateMatch | None] | None = None
+    ) -> list[str]:
         """state一覧を schema 制約に合わせて正規化する。
 
         Args:
             state: Readerが抽出したstate一覧
+            matches: 語彙照合結果の記録先（confidence 算出で再利用する）
 
         Returns:
             list[str]: 最低3件・重複なしの state 一覧
@@ -151,9 +405,12 @@ class Orchestrator:
         Note:
             - Reader抽出件数が不足する場合は補助stateを追加する
             - Validatorの minItems/重複制約を満たすための補完処理
+            - canonicalizer 指定時は語彙ラベルへ寄せ、近似重複も統合する
         """
         # 型・空文字を除外してベース候補を生成する。
         normalized = [item.strip() for item in state if isinstance(item, str) and item.strip()]
+        if self.canonicalizer is not None:
+            normalized = self.canonicalizer.canonicalize(normalized, matches)
 
         # 順序を維持しつつ重複を排除する。
         deduplicated: list[str] = []
@@ -165,12 +422,7 @@ class Orchestrator:
             seen.add(item)
 
         # schemaのminItems=3を満たすまで補助stateを追加する。
-        fallback_states = [
-            "来店頻度低下",
-            "価格感度低",
-            "限定感志向",
-        ]
-        for fallback in fallback_states:
+        for fallback in self.template.fallback_states:
             if len(deduplicated) >= 3:
                 break
             if fallback in seen:
@@ -0,0 +1,451 @@
+"""監査ログの入力を候補パイプラインで再実行し、出力差分と遅延を比較するハーネスを提供する。
+
+入出力: 監査ログ record(dict) の列 -> ReplayReport / audit.jsonl(.gz) -> 差分・遅延レポート(CLI)。
+制約:
+    - 候補 Orchestrator はワーカーごとに生成し、ワーカー間で状態を共有しない
+    - 実行中に保持するのは遅延の数値列と差分例の上限件数分のみとし、入力全体を読み込まない
+    - intent / next_actions / latency_ms を持たない旧形式の record は該当項目の比較から除外する
+
+Note:
+    - state は最終出力の state（監査ログの output_state）同士を集合として比較する
+    - output_state を持たない record（失敗時・旧形式）は Reader 抽出結果（state）同士を比較する
+    - processes=True の場合はプロセス並列で実行する（factory は pickle 可能な関数とする）
+    - 既定の factory は services.inference.factory:build_orchestrator（API と同じ契約・語彙・confidence モデル）
+    - 実行例: python -m services.inference.replay audit.jsonl.gz --factory mypkg.candidates:build_candidate
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import gzip
+import importlib
+from itertools import islice
+import json
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+from services.inference.audit_store import AuditStore
+from services.inference.orchestrator import MaxRetryError, Orchestrator
+
+STAGES = ("reader", "payload", "validator", "generator")
+
+_worker = threading.local()
+
+
+@dataclass(frozen=True)
+class ReplayResult:
+    """監査ログ1件の再実行結果を表すデータ。
+
+    Note:
+        - intent_changed / next_actions_changed は比較不能な場合 None とする
+    """
+
+    trace_id: str
+    recorded_status: str
+    replayed_status: str
+    state_added: tuple[str, ...]
+    state_removed: tuple[str, ...]
+    intent_changed: bool | None
+    next_actions_changed: bool | None
+    recorded_latency_ms: dict[str, float]
+    replayed_latency_ms: dict[str, float]
+    error: str | None = None
+
+    @property
+    def drifted(self) -> bool:
+        """記録時と異なる出力になったか返す。"""
+        return bool(
+            self.recorded_status != self.replayed_status
+            or self.state_added
+            or self.state_removed
+            or self.intent_changed
+            or self.next_actions_changed
+        )
+
+
+@dataclass(frozen=True)
+class StageLatency:
+    """段階別の遅延比較を表すデータ（単位はミリ秒）。"""
+
+    stage: str
+    samples: int
+    baseline_p50: float
+    baseline_p95: float
+    candidate_p50: float
+    candidate_p95: float
+
+    @property
+    def p95_ratio(self) -> float | None:
+        """記録時に対する候補の p95 比を返す（記録がない場合は None）。"""
+        if self.samples == 0 or self.baseline_p95 <= 0:
+            return None
+        return self.candidate_p95 / self.baseline_p95
+
+
+@dataclass(frozen=True)
+class ReplayReport:
+    """再実行全体の差分・遅延レポートを表すデータ。"""
+
+    total: int
+    drifted: int
+    drift: dict[str, int]
+    compared: dict[str, int]
+    errors: int
+    latency: list[StageLatency]
+    wall_seconds: float
+    examples: list[ReplayResult] = field(default_factory=list)
+
+    @property
+    def drift_rate(self) -> float:
+        """出力が変化した record の割合を返す。"""
+        return self.drifted / self.total if self.total else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """1秒あたりの再実行件数を返す。"""
+        return self.total / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def regressions(self, tolerance: float = 0.1) -> list[StageLatency]:
+        """p95 が記録時より tolerance を超えて悪化した段階を返す。
+
+        Args:
+            tolerance: 許容する悪化率（0.1 で 10%）
+
+        Returns:
+            list[StageLatency]: 悪化した段階の一覧
+        """
+        return [
+            stage
+            for stage in self.latency
+            if stage.p95_ratio is not None and stage.p95_ratio > 1 + tolerance
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON 化可能な辞書を返す。
+
+        Returns:
+            dict[str, Any]: レポート全体
+        """
+        data = asdict(self)
+        data["drift_rate"] = self.drift_rate
+        data["throughput"] = self.throughput
+        for stage, item in zip(self.latency, data["latency"]):
+            item["p95_ratio"] = stage.p95_ratio
+        return data
+
+    def format(self) -> str:
+        """人が読むためのテキストレポートを返す。
+
+        Returns:
+            str: 複数行のレポート
+        """
+        lines = [
+            f"replayed {self.total} records in {self.wall_seconds:.2f}s ({self.throughput:.0f} rec/s)",
+            f"drifted {self.drifted} ({self.drift_rate:.2%}), errors {self.errors}",
+        ]
+        for name, count in self.drift.items():
+            lines.append(f"  {name:<13} changed {count} / {self.compared.get(name, 0)}")
+        lines.append("latency (ms)   base p50  base p95  cand p50  cand p95   p95 ratio")
+        for stage in self.latency:
+            ratio = "-" if stage.p95_ratio is None else f"{stage.p95_ratio:.2f}x"
+            lines.append(
+                f"  {stage.stage:<11} {stage.baseline_p50:9.3f} {stage.baseline_p95:9.3f}"
+                f" {stage.candidate_p50:9.3f} {stage.candidate_p95:9.3f} {ratio:>11}"
+            )
+        return "\n".join(lines)
+
+
+class _LastRecordStore(AuditStore):
+    """直近1件の監査ログだけを保持する AuditStore（再実行中のメモリ増加を防ぐ）。"""
+
+    def save(self, record: dict[str, Any]) -> None:
+        """直近の監査ログを差し替える。
+
+        Args:
+            record: 監査ログ辞書
+        """
+        self._records[:] = [record]
+
+
+class ReplayHarness:
+    """監査ログを候補 Orchestrator で並列に再実行するクラス。"""
+
+    def __init__(
+        self,
+        factory: Callable[[], Orchestrator] = Orchestrator,
+        max_workers: int | None = None,
+        chunk_size: int = 256,
+        processes: bool = False,
+        max_examples: int = 20,
+    ) -> None:
+        """ReplayHarness を初期化する。
+
+        Args:
+            factory: 候補 Orchestrator の生成関数（ワーカーごとに1回呼び出す）
+            max_workers: 並列数（未指定時は CPU 数）
+            chunk_size: 1タスクで再実行する record 数
+            processes: True の場合はプロセス並列で実行する
+            max_examples: レポートに残す差分例の上限件数
+
+        Raises:
+            ValueError: chunk_size が 1 未満の場合
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.factory = factory
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.max_examples = max_examples
+
+    def replay(self, records: Iterable[dict[str, Any]]) -> ReplayReport:
+        """監査ログを再実行しレポートを返す。
+
+        Args:
+            records: 監査ログ record の列（input_text を持たないものは読み飛ばす）
+
+        Returns:
+            ReplayReport: 差分・遅延レポート
+        """
+        aggregate = _Aggregate(self.max_examples)
+        started = time.perf_counter()
+        executor_class: type[Executor] = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        chunks = _chunked((r for r in records if r.get("input_text")), self.chunk_size)
+
+        with executor_class(
+            max_workers=self.max_workers, initializer=_init_worker, initargs=(self.factory,)
+        ) as executor:
+            # 投入済みタスクを並列数の2倍に抑え、入力を先読みしすぎないようにする。
+            pending: list[Future[list[ReplayResult]]] = []
+            for chunk in chunks:
+                pending.append(executor.submit(_replay_chunk, chunk))
+                if len(pending) >= self.max_workers * 2:
+                    aggregate.add(pending.pop(0).result())
+            for future in pending:
+                aggregate.add(future.result())
+
+        return aggregate.report(time.perf_counter() - started)
+
+
+def replay_record(orchestrator: Orchestrator, record: dict[str, Any]) -> ReplayResult:
+    """監査ログ1件を再実行し、記録時との差分を返す。
+
+    Args:
+        orchestrator: 候補 Orchestrator
+        record: 監査ログ record
+
+    Returns:
+        ReplayResult: 再実行結果
+    """
+    output: dict[str, Any] | None = None
+    error: str | None = None
+    try:
+        output = orchestrator.run(record["input_text"])
+        status = "success"
+    except MaxRetryError:
+        status = "failed"
+    except Exception as exc:  # noqa: BLE001 - 候補実装の例外は差分として報告する
+        status = "error"
+        error = f"{type(exc).__name__}: {exc}"
+
+    replayed = orchestrator.audit_store.last() if status != "error" else None
+    replayed = replayed or {}
+    state_key = "output_state" if record.get("output_state") is not None else "state"
+    recorded_state = set(record.get(state_key) or [])
+    replayed_state = set(replayed.get(state_key) or [])
+
+    return ReplayResult(
+        trace_id=str(record.get("trace_id", "")),
+        recorded_status=str(record.get("status", "")),
+        replayed_status=status,
+        state_added=tuple(sorted(replayed_state - recorded_state)) if status != "error" else (),
+        state_removed=tuple(sorted(recorded_state - replayed_state)) if status != "error" else (),
+        intent_changed=_changed(record, output, "intent"),
+        next_actions_changed=_changed(record, output, "next_actions"),
+        recorded_latency_ms=dict(record.get("latency_ms") or {}),
+        replayed_latency_ms=dict(replayed.get("latency_ms") or {}),
+        error=error,
+    )
+
+
+def read_audit_records(path: str | Path) -> Iterator[dict[str, Any]]:
+    """JSONL（.gz 可）の監査ログを1行ずつ読み込む。
+
+    Args:
+        path: 監査ログファイルのパス
+
+    Returns:
+        Iterator[dict[str, Any]]: 監査ログ record のイテレータ
+    """
+    target = Path(path)
+    opener = gzip.open if target.suffix == ".gz" else open
+    with opener(target, "rt", encoding="utf-8") as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_factory(spec: str) -> Callable[[], Orchestrator]:
+    """"module:attr" 形式の指定から Orchestrator 生成関数を読み込む。
+
+    Args:
+        spec: 生成関数の指定
+
+    Returns:
+        Callable[[], Orchestrator]: 生成関数
+
+    Raises:
+        ValueError: 指定形式が不正な場合
+    """
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"factory must be 'module:attr': {spec}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _init_worker(factory: Callable[[], Orchestrator]) -> None:
+    """ワーカー専用の Orchestrator を生成する。"""
+    orchestrator = factory()
+    orchestrator.audit_store = _LastRecordStore()
+    _worker.orchestrator = orchestrator
+
+
+def _replay_chunk(chunk: list[dict[str, Any]]) -> list[ReplayResult]:
+    """ワーカーの Orchestrator で record 群を再実行する。"""
+    return [replay_record(_worker.orchestrator, record) for record in chunk]
+
+
+def _chunked(items: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    """イテラブルを size 件ずつのリストに分割する。"""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _changed(record: dict[str, Any], output: dict[str, Any] | None, key: str) -> bool | None:
+    """記録時と再実行時の値が異なるか返す（比較不能な場合は None）。"""
+    if key not in record or record[key] is None:
+        return None
+    if output is None:
+        return record.get("status") == "success"
+    return record[key] != output.get(key)
+
+
+def _percentile(values: list[float], ratio: float) -> float:
+    """最近傍順位法で分位点を返す（空の場合は 0.0）。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(ratio * len(ordered)))]
+
+
+class _Aggregate:
+    """再実行結果を逐次集計する補助クラス。"""
+
+    def __init__(self, max_examples: int) -> None:
+        """空の集計で初期化する。"""
+        self.max_examples = max_examples
+        self.total = 0
+        self.drifted = 0
+        self.errors = 0
+        self.drift = {"status": 0, "state": 0, "intent": 0, "next_actions": 0}
+        self.compared = {"status": 0, "state": 0, "intent": 0, "next_actions": 0}
+        # 段階ごとに、記録時・再実行時の両方がある record の遅延のみを対で保持する。
+        self.baseline: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self.candidate: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self.examples: list[ReplayResult] = []
+
+    def add(self, results: list[ReplayResult]) -> None:
+        """再実行結果を集計へ加える。"""
+        for result in results:
+            self.total += 1
+            self.errors += result.replayed_status == "error"
+            self.compared["status"] += 1
+            self.drift["status"] += result.recorded_status != result.replayed_status
+            if result.replayed_status != "error":
+                self.compared["state"] += 1
+                self.drift["state"] += bool(result.state_added or result.state_removed)
+            for name, changed in (
+                ("intent", result.intent_changed),
+                ("next_actions", result.next_actions_changed),
+            ):
+                if changed is not None:
+                    self.compared[name] += 1
+                    self.drift[name] += changed
+            for stage in STAGES:
+                if stage in result.recorded_latency_ms and stage in result.replayed_latency_ms:
+                    self.baseline[stage].append(float(result.recorded_latency_ms[stage]))
+                    self.candidate[stage].append(float(result.replayed_latency_ms[stage]))
+            if result.drifted:
+                self.drifted += 1
+                if len(self.examples) < self.max_examples:
+                    self.examples.append(result)
+
+    def report(self, wall_seconds: float) -> ReplayReport:
+        """集計結果からレポートを組み立てる。"""
+        latency = [
+            StageLatency(
+                stage=stage,
+                samples=len(self.baseline[stage]),
+                baseline_p50=_percentile(self.baseline[stage], 0.5),
+                baseline_p95=_percentile(self.baseline[stage], 0.95),
+                candidate_p50=_percentile(self.candidate[stage], 0.5),
+                candidate_p95=_percentile(self.candidate[stage], 0.95),
+            )
+            for stage in STAGES
+        ]
+        return ReplayReport(
+            total=self.total,
+            drifted=self.drifted,
+            drift=dict(self.drift),
+            compared=dict(self.compared),
+            errors=self.errors,
+            latency=latency,
+            wall_seconds=wall_seconds,
+            examples=list(self.examples),
+        )
+
+
+def main() -> int:
+    """監査ログを再実行しレポートを出力する。
+
+    Returns:
+        int: 差分率・遅延悪化が閾値内なら 0、超過時は 1
+    """
+    parser = argparse.ArgumentParser(description="replay audit records through a candidate pipeline")
+    parser.add_argument("path", help="audit records (.jsonl or .jsonl.gz)")
+    parser.add_argument("--factory", default="services.inference.factory:build_orchestrator")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--processes", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-drift-rate", type=float, default=None)
+    parser.add_argument("--max-latency-regression", type=float, default=None)
+    args = parser.parse_args()
+
+    harness = ReplayHarness(
+        factory=load_factory(args.factory),
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        processes=args.processes,
+    )
+    report = harness.replay(read_audit_records(args.path))
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        print(report.format())
+
+    failed = args.max_drift_rate is not None and report.drift_rate > args.max_drift_rate
+    if args.max_latency_regression is not None and report.regressions(args.max_latency_regression):
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
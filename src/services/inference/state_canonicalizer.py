@@ -0,0 +1,290 @@
+"""抽出済み state を既知語彙へ寄せる StateCanonicalizer を提供する。
+
+入出力: state(str) -> StateMatch|None / state一覧(list[str]) -> 正規化済み state一覧(list[str])。
+制約:
+    - 類似度は文字 n-gram 集合の Jaccard 係数で判定し、threshold（既定 0.75）未満は一致としない
+    - 増減（増加/減少・上昇/低下）の向きや否定（ある/ない）が異なる表記は類似度によらず一致としない
+    - 候補探索は MinHash + LSH で行い、語彙サイズに比例した全件比較を行わない
+    - 語彙に一致しない state は原文のまま残す（情報を捨てない）
+
+Note:
+    - LSH と署名一致率は候補絞り込みのみに使い、最終判定は n-gram 集合の厳密な Jaccard で行う
+    - 正規化（NFKC・空白除去）後の完全一致は索引を引かずに即時返す
+    - 語彙に一致しない state 同士も threshold 以上なら先勝ちで1件に統合する
+    - numpy は索引の構築・照合時に読み込み、本モジュールの import 時に読み込まない
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterable
+import unicodedata
+import zlib
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_THRESHOLD = 0.75
+
+_PRIME = (1 << 31) - 1
+# 署名による Jaccard 推定の誤差を見込んで厳密計算へ回す幅。
+_ESTIMATE_MARGIN = 0.2
+# 文字 n-gram では区別できない、意味が反転する表現の手掛かり。
+_UP_MARKERS = ("増", "上が", "上昇", "高", "伸び", "多")
+_DOWN_MARKERS = ("減", "下が", "低", "落ち", "少")
+_NEGATION_MARKERS = ("ない", "無い", "なし", "無し", "ません")
+# 否定の手掛かりを含むが否定ではない語。
+_NOT_NEGATION = ("少ない",)
+
+
+@dataclass(frozen=True)
+class StateMatch:
+    """語彙照合結果を表すデータ。"""
+
+    label: str
+    similarity: float
+    matched: str
+
+
+class StateCanonicalizer:
+    """文字 n-gram の MinHash/LSH 索引で state を語彙へ正規化するクラス。"""
+
+    def __init__(
+        self,
+        vocabulary: Iterable[dict[str, Any] | str],
+        threshold: float = DEFAULT_THRESHOLD,
+        ngram: int = 2,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 0,
+    ) -> None:
+        """語彙から索引を構築する。
+
+        Args:
+            vocabulary: {"label", "aliases"} 辞書またはラベル文字列の一覧
+            threshold: 一致とみなす Jaccard 係数の下限
+            ngram: 文字 n-gram の長さ
+            num_perm: MinHash の署名長
+            bands: LSH のバンド数（num_perm を割り切る値）
+            seed: ハッシュ関数族の乱数シード
+
+        Raises:
+            ValueError: パラメータが不正な場合
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if ngram < 1 or num_perm < 1 or bands < 1 or num_perm % bands:
+            raise ValueError("num_perm must be a positive multiple of bands")
+
+        self.threshold = threshold
+        self.ngram = ngram
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+        self._labels: list[str] = []
+        self._surfaces: list[str] = []
+        self._grams: list[frozenset[str]] = []
+        self._polarities: list[tuple[int, bool]] = []
+        self._signatures: list[np.ndarray] = []
+        self._matrix: np.ndarray | None = None
+        self._exact: dict[str, int] = {}
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(bands)]
+
+        for entry in vocabulary:
+            if isinstance(entry, str):
+                label, aliases = entry, []
+            else:
+                label, aliases = str(entry["label"]), list(entry.get("aliases") or [])
+            for surface in [label, *aliases]:
+                self._add(label, surface)
+
+    @classmethod
+    def from_vocabulary(cls, vocabulary: dict[str, Any], **kwargs: Any) -> StateCanonicalizer:
+        """state_vocabulary.json 形式の辞書から構築する。
+
+        Args:
+            vocabulary: "states" を持つ語彙辞書
+            kwargs: コンストラクタへ渡す追加引数
+
+        Returns:
+            StateCanonicalizer: 構築済みインスタンス
+        """
+        return cls(vocabulary.get("states") or [], **kwargs)
+
+    @property
+    def labels(self) -> frozenset[str]:
+        """語彙ラベルの集合を返す。"""
+        return frozenset(self._labels)
+
+    def __len__(self) -> int:
+        """索引済みの表記数（ラベル+別名）を返す。"""
+        return len(self._surfaces)
+
+    def lookup(self, text: str) -> StateMatch | None:
+        """最も類似する語彙を返す。
+
+        Args:
+            text: 照合対象の state
+
+        Returns:
+            StateMatch | None: threshold 以上の一致がない場合は None
+        """
+        normalized = _normalize(text)
+        if not normalized:
+            return None
+
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            return StateMatch(self._labels[exact], 1.0, self._surfaces[exact])
+
+        grams = self._ngrams(normalized)
+        polarity = _polarity(normalized)
+        signature = self._signature(grams)
+        candidates: set[int] = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        if not candidates:
+            return None
+
+        import numpy as np
+
+        # 署名一致率（Jaccard 推定値）で候補を絞り、残りだけ厳密に計算する。
+        indices = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        estimates = (self._signature_matrix()[indices] == signature).mean(axis=1)
+        shortlisted = indices[estimates >= self.threshold - _ESTIMATE_MARGIN]
+
+        best: StateMatch | None = None
+        for index in shortlisted.tolist():
+            if self._polarities[index] != polarity:
+                continue
+            similarity = _jaccard(grams, self._grams[index])
+            if similarity < self.threshold:
+                continue
+            if best is None or similarity > best.similarity:
+                best = StateMatch(self._labels[index], similarity, self._surfaces[index])
+        return best
+
+    def canonicalize(
+        self, states: list[str], matches: dict[str, StateMatch | None] | None = None
+    ) -> list[str]:
+        """state 一覧を語彙ラベルへ寄せ、近似重複を統合する。
+
+        Args:
+            states: Reader が抽出した state 一覧
+            matches: 照合結果の記録先（state -> 照合結果、confidence 算出での再照合を省く）
+
+        Returns:
+            list[str]: 入力順を維持した重複なしの state 一覧
+        """
+        result: list[str] = []
+        seen: set[str] = set()
+        # 語彙外 state 同士の近似重複判定用に n-gram 集合と極性を保持する。
+        unmatched: list[tuple[frozenset[str], tuple[int, bool]]] = []
+
+        for state in states:
+            match = self.lookup(state)
+            if matches is not None:
+                matches[state] = match
+            if match is not None:
+                if match.label not in seen:
+                    result.append(match.label)
+                    seen.add(match.label)
+                continue
+
+            normalized = _normalize(state)
+            grams = self._ngrams(normalized)
+            polarity = _polarity(normalized)
+            if state in seen or any(
+                other_polarity == polarity and _jaccard(grams, other) >= self.threshold
+                for other, other_polarity in unmatched
+            ):
+                continue
+            result.append(state)
+            seen.add(state)
+            unmatched.append((grams, polarity))
+
+        return result
+
+    def _add(self, label: str, surface: str) -> None:
+        """表記1件を索引へ追加する。"""
+        normalized = _normalize(surface)
+        if not normalized or normalized in self._exact:
+            return
+
+        index = len(self._surfaces)
+        grams = self._ngrams(normalized)
+        self._labels.append(label)
+        self._surfaces.append(surface)
+        self._grams.append(grams)
+        self._polarities.append(_polarity(normalized))
+        self._exact[normalized] = index
+        signature = self._signature(grams)
+        self._signatures.append(signature)
+        self._matrix = None
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(index)
+
+    def _signature_matrix(self) -> np.ndarray:
+        """全表記の署名を行列として返す（追加後の初回参照時に再構築する）。"""
+        import numpy as np
+
+        if self._matrix is None:
+            self._matrix = np.vstack(self._signatures)
+        return self._matrix
+
+    def _ngrams(self, normalized: str) -> frozenset[str]:
+        """文字 n-gram 集合を返す（n より短い文字列は全体を1要素とする）。"""
+        if len(normalized) <= self.ngram:
+            return frozenset([normalized])
+        return frozenset(
+            normalized[i : i + self.ngram] for i in range(len(normalized) - self.ngram + 1)
+        )
+
+    def _signature(self, grams: frozenset[str]) -> np.ndarray:
+        """n-gram 集合の MinHash 署名を返す。"""
+        import numpy as np
+
+        hashes = np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for gram in grams),
+            dtype=np.uint64,
+            count=len(grams),
+        )
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        """署名をバンドごとのバケットキーへ分割する。"""
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+
+def _normalize(text: str) -> str:
+    """NFKC 正規化し空白を除去する。"""
+    if not isinstance(text, str):
+        return ""
+    return "".join(unicodedata.normalize("NFKC", text).split())
+
+
+def _polarity(normalized: str) -> tuple[int, bool]:
+    """増減の向き（増加 1・減少 -1・なし/両方 0）と否定の有無を返す。"""
+    up = any(marker in normalized for marker in _UP_MARKERS)
+    down = any(marker in normalized for marker in _DOWN_MARKERS)
+    for word in _NOT_NEGATION:
+        normalized = normalized.replace(word, "")
+    negated = any(marker in normalized for marker in _NEGATION_MARKERS)
+    return int(up) - int(down), negated
+
+
+def _jaccard(left: frozenset[str], right: frozenset[str]) -> float:
+    """2つの n-gram 集合の Jaccard 係数を返す。"""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
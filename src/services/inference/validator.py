@@ -8,12 +8,13 @@
 Note:
     - エラーは例外ではなく issues に蓄積して返却する
     - Orchestrator の retry 判定に使うため決定論的に評価する
+    - schema_check 指定時は契約スキーマ違反も issues に加える
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable
 
 
 @dataclass(frozen=True)
@@ -27,6 +28,17 @@ class ValidationResult:
 class Validator:
     """state_intentペイロードの最低限検証を行うクラス。"""
 
+    def __init__(self, schema_check: Callable[[Any], list[str]] | None = None) -> None:
+        """Validatorを初期化する。
+
+        Args:
+            schema_check: 契約スキーマ検証関数（未指定時は最低限検証のみ）
+
+        Note:
+            - 起動時コストを抑えるため、事前コンパイル済みの CompiledContract.validate を渡す
+        """
+        self.schema_check = schema_check
+
     def validate(self, payload: dict[str, Any]) -> ValidationResult:
         """入力ペイロードを検証し、結果を返す。
 
@@ -66,4 +78,7 @@ class Validator:
         if not isinstance(action_bindings, list) or len(action_bindings) < 1:
             issues.append("action_bindings must contain at least 1 item")
 
+        if self.schema_check is not None:
+            issues.extend(self.schema_check(payload))
+
         return ValidationResult(ok=not issues, issues=issues)
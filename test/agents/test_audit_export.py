@@ -0,0 +1,196 @@
+"""監査ログエクスポータの絞り込み・cursor 再開・gzip 出力を検証するテスト。"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import json
+
+import pytest
+
+from services.inference import audit_export
+from services.inference.audit_export import (
+    RECORD_FIELDS,
+    AuditCursorExpiredError,
+    AuditExportError,
+    ExportFilter,
+    decode_cursor,
+    encode_cursor,
+    export_ndjson,
+    iter_ndjson_gzip,
+    iter_ndjson_records,
+    plan_page,
+)
+from services.inference.audit_store import AuditStore
+from services.inference.orchestrator import Orchestrator
+from services.inference.validator import ValidationResult
+
+
+def _store(count: int = 10) -> AuditStore:
+    """時刻順・status 混在の監査ログを作る。"""
+    store = AuditStore()
+    for index in range(count):
+        store.save(
+            {
+                "trace_id": f"t{index}",
+                "input_text": f"入力{index}",
+                "state": ["来店頻度低下"],
+                "status": "failed" if index % 3 == 0 else "success",
+                "timestamp": f"2026-10-19T00:00:{index:02d}+00:00",
+            }
+        )
+    return store
+
+
+def test_export_is_a_valid_gzip_ndjson_file():
+    """複数チャンクの出力全体が1つの gzip NDJSON として読めることを確認する。"""
+    store = _store()
+    buffer = io.BytesIO()
+
+    result = export_ndjson(store, buffer, chunk_records=3)
+
+    lines = gzip.decompress(buffer.getvalue()).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == list(store.records())
+    assert result.records == 10
+    assert result.bytes_written == len(buffer.getvalue())
+    assert not result.more
+
+
+def test_filters_by_status_and_time_range():
+    """status と期間（since 以上・until 未満）で絞り込めることを確認する。"""
+    store = _store()
+    export_filter = ExportFilter.from_params(
+        since="2026-10-19T00:00:02Z", until="2026-10-19T09:00:08+09:00", status="success"
+    )
+    buffer = io.BytesIO()
+
+    export_ndjson(store, buffer, export_filter=export_filter)
+
+    ids = [record["trace_id"] for record in iter_ndjson_records([buffer.getvalue()])]
+    assert ids == ["t2", "t4", "t5", "t7"]
+
+
+def test_cursor_resumes_after_limit():
+    """limit で分割したページを cursor で続けて取得すると全件が揃うことを確認する。"""
+    store = _store()
+    export_filter = ExportFilter.from_params(status="success")
+    cursor = None
+    collected: list[str] = []
+    while True:
+        buffer = io.BytesIO()
+        result = export_ndjson(store, buffer, cursor=cursor, export_filter=export_filter, limit=2)
+        collected += [r["trace_id"] for r in iter_ndjson_records([buffer.getvalue()])]
+        cursor = result.next_cursor
+        if not result.more:
+            break
+
+    expected = [r["trace_id"] for r in store.records() if r["status"] == "success"]
+    assert collected == expected
+
+    # 末尾以降に追加された record は同じ cursor から取得できる。
+    store.save({"trace_id": "late", "status": "success", "timestamp": "2026-10-19T01:00:00+00:00"})
+    page = plan_page(store, cursor, export_filter)
+    chunks = iter_ndjson_gzip(store, page, export_filter)
+    assert [r["trace_id"] for r in iter_ndjson_records(chunks)] == ["late"]
+
+
+def test_records_split_at_arbitrary_byte_boundaries():
+    """任意位置で分割された複数メンバーの gzip を復元できることを確認する。"""
+    store = _store()
+    data = b"".join(iter_ndjson_gzip(store, plan_page(store), chunk_records=4))
+    pieces = [data[i : i + 7] for i in range(0, len(data), 7)]
+
+    assert list(iter_ndjson_records(pieces)) == list(store.records())
+
+
+def test_invalid_cursor_and_timestamp():
+    """不正な cursor・日時で AuditExportError を送出することを確認する。"""
+    assert decode_cursor(encode_cursor(42)) == 42
+    with pytest.raises(AuditExportError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(AuditExportError):
+        ExportFilter.from_params(since="yesterday")
+
+
+def test_cli_resumes_from_saved_cursor(tmp_path, monkeypatch):
+    """CLI が中断時の書きかけを捨て、保存済み cursor から追記再開することを確認する。"""
+    store = _store(6)
+    pages = [plan_page(store, None, limit=3), plan_page(store, encode_cursor(3), limit=3)]
+    requested: list[str | None] = []
+
+    def fake_fetch(args, cursor):
+        requested.append(cursor)
+        for page in pages[len(requested) - 1 :]:
+            yield iter_ndjson_gzip(store, page), page.next_cursor, page.more
+
+    output = tmp_path / "audit.ndjson.gz"
+    first = b"".join(iter_ndjson_gzip(store, pages[0]))
+    output.write_bytes(first + b"partial page garbage")
+    (tmp_path / "audit.ndjson.gz.cursor").write_text(
+        json.dumps({"cursor": pages[0].next_cursor, "size": len(first)})
+    )
+    pages.pop(0)
+    monkeypatch.setattr(audit_export, "_fetch_pages", fake_fetch)
+
+    audit_export._export_ndjson_file(argparse.Namespace(output=str(output)))
+
+    assert requested == [encode_cursor(3)]
+    with gzip.open(output, "rt", encoding="utf-8") as stream:
+        assert [json.loads(line)["trace_id"] for line in stream] == [f"t{i}" for i in range(6)]
+
+
+def test_parquet_export(tmp_path):
+    """pyarrow がある環境で Parquet へ書き出せることを確認する。"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    store = _store()
+
+    count = audit_export.write_parquet(store.records(), tmp_path / "audit.parquet", row_group_size=4)
+
+    table = pq.read_table(tmp_path / "audit.parquet")
+    assert count == table.num_rows == 10
+    assert table.column_names == list(RECORD_FIELDS)
+
+
+def test_record_fields_cover_orchestrator_records():
+    """Orchestrator が保存する成功・失敗 record の項目がすべて Parquet の列に含まれることを確認する。"""
+    orchestrator = Orchestrator(max_retries=0, tenant_id="brand-a")
+    orchestrator.run("最近来店が減っている。値引きには反応しない。")
+    orchestrator.validator.validate = lambda payload: ValidationResult(ok=False, issues=["state不足"])
+    with pytest.raises(Exception):
+        orchestrator.run("最近来店が減っている。")
+
+    success, failure = orchestrator.audit_store.records()
+    assert {"tenant_id", "confidence", "output_state"} <= success.keys() <= set(RECORD_FIELDS)
+    assert "issues" in failure
+    assert failure.keys() <= set(RECORD_FIELDS)
+
+
+def test_compacted_cursor_is_rejected():
+    """cursor の位置が compact() で破棄済みの場合、欠落を読み飛ばさずに拒否することを確認する。"""
+    store = _store()
+    page = plan_page(store, None, limit=3)
+    store.compact("2026-10-19T00:00:05+00:00")
+
+    with pytest.raises(AuditCursorExpiredError, match="2 lost"):
+        plan_page(store, page.next_cursor)
+    # 計画後に破棄された範囲もストリーミング時に検出する。
+    with pytest.raises(AuditCursorExpiredError):
+        list(iter_ndjson_gzip(store, page))
+
+    # cursor 未指定なら保持している最古の位置から出力する。
+    fresh = plan_page(store)
+    assert fresh.start == store.first_offset == 5
+    assert [r["trace_id"] for r in iter_ndjson_records(iter_ndjson_gzip(store, fresh))][0] == "t5"
+
+
+def test_filters_by_tenant():
+    """tenant_id 指定時はそのテナントの record のみを出力することを確認する。"""
+    store = AuditStore()
+    for tenant in ("brand-a", "brand-b", None, "brand-a"):
+        store.save({"trace_id": str(tenant), "status": "success", **({"tenant_id": tenant} if tenant else {})})
+    buffer = io.BytesIO()
+
+    export_ndjson(store, buffer, export_filter=ExportFilter.from_params(tenant="brand-a"))
+
+    assert [r["trace_id"] for r in iter_ndjson_records([buffer.getvalue()])] == ["brand-a", "brand-a"]
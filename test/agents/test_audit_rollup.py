@@ -0,0 +1,136 @@
+"""AuditRollup の差分集計と保持期間による圧縮を検証するテストを提供する。
+
+入出力: AuditStore.save(record) -> 分/時間バケットの集計 / compact() -> 破棄件数。
+制約:
+    - 集計は保存時に更新され、問い合わせで監査ログを走査しない
+    - 圧縮後も集計値と監査ログの位置（offset）は変わらない
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.inference.audit_export import plan_page
+from services.inference.audit_rollup import OTHER_STATE, AuditRollup, RetentionPolicy, RollupError
+from services.inference.audit_store import AuditStore
+
+BASE = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+LABELS = ("来店頻度低下", "価格感度低", "限定感志向")
+
+
+def _record(minutes: float, status: str = "success", intent: str = "再来店動機付け", **extra):
+    """BASE から minutes 分後の監査ログを返す。"""
+    record = {
+        "timestamp": (BASE + timedelta(minutes=minutes)).isoformat(),
+        "status": status,
+        "intent": intent,
+        "state": ["来店頻度低下", "価格感度低", "限定感志向"],
+    }
+    if status == "failed":
+        record["issues"] = ["state不足"]
+    else:
+        record["output_state"] = list(record["state"])
+    record.update(extra)
+    return record
+
+
+@pytest.fixture
+def rollup_store():
+    """圧縮を無効にした (AuditStore, AuditRollup) を返す。"""
+    audit_store = AuditStore()
+    rollup = AuditRollup(
+        RetentionPolicy(raw_seconds=None, minute_seconds=None, hour_seconds=None), state_labels=LABELS
+    )
+    rollup.attach(audit_store)
+    return audit_store, rollup
+
+
+def test_rollup_counts_by_hour_and_intent(rollup_store):
+    """時間・intent 別に成功/失敗数・指摘・state 分布を集計することを確認する。"""
+    store, rollup = rollup_store
+    for minutes, status, intent in [
+        (0, "success", "A"),
+        (10, "failed", "A"),
+        (59, "success", "B"),
+        (61, "failed", "B"),
+    ]:
+        store.save(_record(minutes, status, intent))
+
+    first_hour = rollup.stats(since=BASE.timestamp(), until=(BASE + timedelta(hours=1)).timestamp())
+    assert (first_hour.total, first_hour.success, first_hour.failed) == (3, 2, 1)
+    assert first_hour.top_issues == (("state不足", 1),)
+    assert dict(first_hour.states)["来店頻度低下"] == 2
+
+    everything = rollup.stats(intent="B")
+    assert (everything.total, everything.failure_rate) == (2, 0.5)
+    assert [(p["intent"], p["total"]) for p in rollup.series("hour")] == [("A", 2), ("B", 1), ("B", 1)]
+    assert len(rollup.series("minute", intent="A")) == 2
+
+
+def test_states_count_only_known_output_labels(rollup_store):
+    """state 分布は output_state の既知ラベルのみを数え、入力断片は残さないことを確認する。"""
+    store, rollup = rollup_store
+    pii = "田中様の電話番号090-1234-5678"
+    store.save(_record(0, state=[pii, "来店頻度低下"], output_state=[pii, "来店頻度低下"]))
+    store.save(_record(1, status="failed", state=[pii]))
+
+    states = dict(rollup.stats().states)
+    assert states == {"来店頻度低下": 1, OTHER_STATE: 1}
+    assert pii not in repr(rollup.stats().to_dict())
+
+
+def test_rollup_filters_by_tenant(rollup_store):
+    """tenant_id ごとに集計を分けることを確認する。"""
+    store, rollup = rollup_store
+    store.save(_record(0, tenant_id="t1"))
+    store.save(_record(1))
+
+    assert rollup.stats(tenant_id="t1").total == 1
+    assert rollup.stats(tenant_id="").total == 1
+    assert rollup.stats().total == 2
+
+
+def test_attach_backfills_existing_records():
+    """attach 前に保存済みの record も集計することを確認する。"""
+    audit_store = AuditStore()
+    audit_store.save(_record(0))
+    rollup = AuditRollup(RetentionPolicy(raw_seconds=None))
+    rollup.attach(audit_store)
+    audit_store.save(_record(1))
+
+    assert rollup.stats().total == 2
+
+
+def test_compaction_keeps_aggregates_and_offsets():
+    """保持期間を過ぎた監査ログを破棄しても集計と offset が保たれることを確認する。"""
+    audit_store = AuditStore()
+    rollup = AuditRollup(
+        RetentionPolicy(raw_seconds=3600, minute_seconds=2 * 3600, hour_seconds=None, interval_seconds=0)
+    )
+    rollup.attach(audit_store)
+    for minutes in (0, 30, 90, 150, 200):
+        audit_store.save(_record(minutes))
+
+    assert rollup.compacted == 3
+    assert audit_store.first_offset == 3
+    assert len(audit_store) == 5
+    assert [r["timestamp"] for r in audit_store.records()] == [
+        _record(150)["timestamp"],
+        _record(200)["timestamp"],
+    ]
+    assert plan_page(audit_store).start == audit_store.first_offset
+    assert len(list(audit_store.records(0, 4))) == 1
+    assert rollup.stats().total == 5
+    window = rollup.stats("hour", since=BASE.timestamp(), until=(BASE + timedelta(hours=4)).timestamp())
+    assert window.total == 5
+    # 分バケットは保持期間（2時間）を過ぎた 0/30 分のものが破棄される。
+    assert [p["start"][11:16] for p in rollup.series("minute")] == ["10:30", "11:30", "12:20"]
+
+
+def test_invalid_granularity_raises(rollup_store):
+    """未知の粒度に RollupError を送出することを確認する。"""
+    _, rollup = rollup_store
+    with pytest.raises(RollupError):
+        rollup.series("day")
@@ -0,0 +1,171 @@
+"""ConfidenceScorer と Orchestrator のバッチ経路を検証するテストを提供する。
+
+入出力: ScoringInput の列 -> confidence 配列 / Orchestrator.run_batch -> 結果一覧。
+制約:
+    - 単件・バッチのどちらの経路でも同じ confidence を返す
+    - 抽出根拠が弱いほど confidence を下げる
+
+Note:
+    - 校正はシードを固定した合成データで確認する
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from services.inference.confidence import (
+    DEFAULT_MODEL,
+    FEATURES,
+    NEUTRAL,
+    ConfidenceModel,
+    ConfidenceScorer,
+    ScoringInput,
+    expected_calibration_error,
+    reliability_curve,
+)
+from services.inference import orchestrator as orchestrator_module
+from services.inference.orchestrator import MaxRetryError, Orchestrator
+from services.inference.state_canonicalizer import StateCanonicalizer
+from services.inference.validator import ValidationResult
+
+VOCABULARY = [
+    {"label": "来店頻度低下", "aliases": ["最近来店が減っている"]},
+    {"label": "価格感度低", "aliases": ["値引きには反応しない"]},
+    {"label": "限定感志向", "aliases": ["限定感には反応する"]},
+]
+EXTRACTED = ["最近来店が減っている", "値引きには反応しない", "限定感には反応する"]
+STATES = ["来店頻度低下", "価格感度低", "限定感志向"]
+
+
+@pytest.fixture
+def scorer():
+    """語彙付きの ConfidenceScorer を返す。"""
+    return ConfidenceScorer(canonicalizer=StateCanonicalizer(VOCABULARY))
+
+
+def test_full_evidence_scores_higher_than_fallback(scorer):
+    """抽出根拠が揃った場合に補助 state のみより高い confidence を返すことを確認する。"""
+    strong = scorer.score(ScoringInput(extracted=EXTRACTED, states=STATES))
+    weak = scorer.score(ScoringInput(extracted=["天気の話"], states=["天気の話", *STATES[:2]]))
+
+    assert scorer.features(ScoringInput(extracted=EXTRACTED, states=STATES)).tolist() == [
+        1.0,
+        1.0,
+        NEUTRAL,
+        NEUTRAL,
+    ]
+    assert 0.8 < strong < 0.9
+    assert weak < 0.3
+
+
+def test_optional_signals_shift_confidence(scorer):
+    """嗜好ストア一致・フィードバック実績が confidence に反映されることを確認する。"""
+    base = ScoringInput(extracted=EXTRACTED, states=STATES)
+    agreed = ScoringInput(extracted=EXTRACTED, states=STATES, preference_states=frozenset(STATES))
+    unreliable = ConfidenceScorer(
+        canonicalizer=scorer.canonicalizer, label_reliability={state: 0.0 for state in STATES}
+    )
+
+    assert scorer.score(agreed) > scorer.score(base) > unreliable.score(base)
+
+
+def test_batch_matches_single(scorer):
+    """バッチ算出が単件算出と同じ値を返すことを確認する。"""
+    items = [
+        ScoringInput(extracted=EXTRACTED[:n], states=STATES) for n in range(len(EXTRACTED) + 1)
+    ]
+
+    batch = scorer.score_batch(items)
+
+    assert batch.tolist() == [scorer.score(item) for item in items]
+    assert scorer.score_batch([]).shape == (0,)
+    assert scorer.features_batch([]).shape == (0, len(FEATURES))
+
+
+def test_fit_reduces_calibration_error():
+    """合成データで fit() した重みが事前重みより ECE を下げることを確認する。"""
+    rng = np.random.default_rng(0)
+    features = rng.uniform(size=(4000, len(FEATURES)))
+    truth = ConfidenceModel(weights=(2.0, 1.0, 0.5, 1.5), bias=-2.0)
+    outcomes = (rng.uniform(size=len(features)) < truth.predict(features)).astype(float)
+
+    fitted = ConfidenceModel.fit(features, outcomes)
+
+    prior_ece = expected_calibration_error(
+        reliability_curve(DEFAULT_MODEL.predict(features), outcomes)
+    )
+    fitted_ece = expected_calibration_error(reliability_curve(fitted.predict(features), outcomes))
+    assert fitted_ece < prior_ece
+    assert fitted_ece < 0.03
+    assert ConfidenceModel.from_dict(fitted.to_dict()) == fitted
+
+
+def test_reliability_curve_bins():
+    """信頼度曲線が区間ごとの件数・平均・正答率を返すことを確認する。"""
+    curve = reliability_curve(np.array([0.05, 0.15, 0.95, 1.0]), np.array([0, 1, 1, 0]), bins=10)
+
+    assert [b.count for b in curve] == [1, 1, 0, 0, 0, 0, 0, 0, 0, 2]
+    assert curve[9].mean_confidence == pytest.approx(0.975)
+    assert curve[9].accuracy == 0.5
+
+
+def test_run_batch_scores_and_isolates_failures():
+    """run_batch が入力順に結果を返し、失敗を他の入力へ波及させないことを確認する。"""
+    orchestrator = Orchestrator(canonicalizer=StateCanonicalizer(VOCABULARY))
+    orchestrator.scorer.score_batch = MagicMock(wraps=orchestrator.scorer.score_batch)
+    orchestrator.reader.extract = MagicMock(side_effect=[EXTRACTED, ValueError("empty"), ["天気の話"]])
+
+    results = orchestrator.run_batch(["a", "", "b"])
+
+    assert orchestrator.scorer.score_batch.call_count == 1
+    assert results[0]["state"] == STATES
+    assert isinstance(results[1], ValueError)
+    assert results[2]["confidence"] < results[0]["confidence"]
+    assert [r["confidence"] for r in orchestrator.audit_store.records()] == [
+        results[0]["confidence"],
+        results[2]["confidence"],
+    ]
+
+
+def test_run_batch_retries_failed_validation_like_run(monkeypatch):
+    """初回検証 NG の入力を run() と同じ再試行規則で処理することを確認する。"""
+    orchestrator = Orchestrator(max_retries=1)
+    orchestrator.reader.extract = MagicMock(return_value=["A", "B", "C"])
+    orchestrator.validator.validate = MagicMock(
+        return_value=ValidationResult(ok=False, issues=["state不足"])
+    )
+
+    clock = iter(range(0, 1000, 10))
+    monkeypatch.setattr(orchestrator_module.time, "perf_counter", lambda: next(clock) / 1000)
+
+    (result,) = orchestrator.run_batch(["テスト入力"])
+
+    assert isinstance(result, MaxRetryError)
+    assert orchestrator.reader.extract.call_count == 2
+    assert orchestrator.validator.validate.call_count == 2
+    (record,) = orchestrator.audit_store.records()
+    # 初回試行（バッチ内）と再試行1回の両方の所要時間を合算する。
+    assert record["latency_ms"]["reader"] == pytest.approx(20)
+    assert record["latency_ms"]["validator"] == pytest.approx(20)
+
+
+def test_orchestrator_reuses_canonicalizer_matches():
+    """正規化時の照合結果を confidence 算出で再利用し、抽出 state ごとに1回だけ照合することを確認する。"""
+    canonicalizer = StateCanonicalizer(VOCABULARY)
+    orchestrator = Orchestrator(canonicalizer=canonicalizer)
+    orchestrator.reader.extract = MagicMock(return_value=[" 最近来店が減っている", *EXTRACTED[1:]])
+    canonicalizer.lookup = MagicMock(wraps=canonicalizer.lookup)
+
+    single = orchestrator.run("a")
+    assert canonicalizer.lookup.call_count == len(EXTRACTED)
+
+    canonicalizer.lookup.reset_mock()
+    (batch,) = orchestrator.run_batch(["a"])
+    assert canonicalizer.lookup.call_count == len(EXTRACTED)
+    assert single["confidence"] == batch["confidence"]
+    assert single["confidence"] == ConfidenceScorer(
+        canonicalizer=StateCanonicalizer(VOCABULARY)
+    ).score(ScoringInput(extracted=EXTRACTED, states=STATES))
@@ -1,5 +1,6 @@
 """OrchestratorのRetry制御と実行順序を検証するテスト。"""
 
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock
 
 import pytest
@@ -104,3 +105,28 @@ def test_execution_order_is_reader_validator_generator(orchestrator):
     orchestrator.run("テスト入力")
 
     assert call_order == ["reader", "validator", "generator"]
+
+
+def test_components_are_built_lazily():
+    """未指定の構成要素が初回参照時まで生成されないことを確認する。"""
+    orchestrator = Orchestrator()
+    assert "_reader" in vars(orchestrator)
+    assert vars(orchestrator)["_reader"] is None
+
+    reader = orchestrator.reader
+
+    assert vars(orchestrator)["_reader"] is reader
+    assert orchestrator.reader is reader
+
+
+def test_lazy_components_are_created_once_per_instance():
+    """並行初回アクセスでも構成要素がインスタンスごとに1回だけ生成されることを確認する。"""
+    first, second = Orchestrator(), Orchestrator()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        stores = list(pool.map(lambda o: o.audit_store, [first, second] * 8))
+
+    assert len({id(store) for store in stores[0::2]}) == 1
+    assert len({id(store) for store in stores[1::2]}) == 1
+    assert first.audit_store is not second.audit_store
+    assert first.__dict__["_audit_store_lock"] is not second.__dict__["_audit_store_lock"]
+    assert first.__dict__["_audit_store_lock"] is not first.__dict__.get("_reader_lock")
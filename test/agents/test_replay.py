@@ -0,0 +1,167 @@
+"""監査ログ再実行ハーネスの差分検出と遅延比較を検証するテスト。"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.inference.audit_store import AuditStore
+from services.inference.factory import build_orchestrator
+from services.inference.orchestrator import Orchestrator, PayloadTemplate
+from services.inference.replay import ReplayHarness, read_audit_records, replay_record
+
+INPUTS = [
+    "最近来店が減っている。値引きには反応しないが、限定感には反応する。",
+    "購入頻度が落ちている。新商品には関心がある。",
+    "問い合わせが増えている。",
+]
+
+
+def _record_production(count: int = 30) -> list[dict]:
+    """既定 Orchestrator で本番相当の監査ログを作る。"""
+    store = AuditStore()
+    orchestrator = Orchestrator(audit_store=store)
+    for index in range(count):
+        orchestrator.run(INPUTS[index % len(INPUTS)])
+    return list(store.records())
+
+
+def test_audit_record_contains_outputs_and_stage_latency():
+    """監査ログに intent・next_actions・段階別遅延が含まれることを確認する。"""
+    record = _record_production(1)[0]
+
+    assert record["intent"]
+    assert record["next_actions"]
+    assert record["output_state"] == record["state"]
+    assert set(record["latency_ms"]) == {"reader", "payload", "validator", "generator"}
+    assert all(value >= 0 for value in record["latency_ms"].values())
+
+
+def test_same_pipeline_has_no_drift():
+    """同一実装での再実行は差分なしとなることを確認する。"""
+    records = _record_production()
+
+    report = ReplayHarness(max_workers=4, chunk_size=4).replay(records)
+
+    assert report.total == len(records)
+    assert report.drifted == 0
+    assert report.errors == 0
+    assert report.compared["intent"] == len(records)
+    assert all(stage.samples == len(records) for stage in report.latency)
+
+
+def test_candidate_drift_is_reported():
+    """候補 Reader の state 変化と intent 変化を検出することを確認する。"""
+    records = _record_production(6)
+    records[0] = {**records[0], "intent": "旧intent"}
+
+    def candidate() -> Orchestrator:
+        orchestrator = Orchestrator()
+        orchestrator.reader.extract = MagicMock(return_value=["新しいstate"])
+        return orchestrator
+
+    report = ReplayHarness(factory=candidate, max_workers=2, chunk_size=2).replay(records)
+
+    assert report.drift["state"] == len(records)
+    assert report.drift["intent"] == 1
+    assert report.drifted == len(records)
+    assert "新しいstate" in report.examples[0].state_added
+
+
+def test_output_state_drift_is_reported():
+    """Reader 抽出結果が同じでも、最終出力の state の変化を検出することを確認する。"""
+    records = _record_production(3)
+
+    def candidate() -> Orchestrator:
+        return Orchestrator(template=PayloadTemplate(fallback_states=("補助A", "補助B", "補助C")))
+
+    report = ReplayHarness(factory=candidate, max_workers=1).replay(records)
+
+    assert report.drift["state"] == 2
+    assert report.examples[-1].state_added == ("補助A", "補助B")
+
+
+def test_legacy_records_skip_missing_fields():
+    """intent や latency_ms を持たない旧形式の record は比較対象から除外することを確認する。"""
+    legacy = {"trace_id": "t1", "input_text": INPUTS[0], "state": [], "status": "success"}
+
+    result = replay_record(Orchestrator(), legacy)
+
+    assert result.intent_changed is None
+    assert result.next_actions_changed is None
+    assert result.recorded_latency_ms == {}
+    assert set(result.replayed_latency_ms) == {"reader", "payload", "validator", "generator"}
+
+
+def test_candidate_exception_is_counted_as_error():
+    """候補実装の例外を error として集計し、処理を継続することを確認する。"""
+    records = _record_production(3)
+
+    def broken() -> Orchestrator:
+        orchestrator = Orchestrator()
+        orchestrator.reader.extract = MagicMock(side_effect=RuntimeError("boom"))
+        return orchestrator
+
+    report = ReplayHarness(factory=broken, max_workers=1).replay(records)
+
+    assert report.errors == 3
+    assert report.drift["status"] == 3
+    assert report.examples[0].error == "RuntimeError: boom"
+
+
+def test_latency_regression_detection():
+    """記録時より p95 が悪化した段階を regressions() で返すことを確認する。"""
+    records = [
+        {**record, "latency_ms": {"reader": 1e-6, "validator": 1e6, "generator": 1e6}}
+        for record in _record_production(10)
+    ]
+
+    report = ReplayHarness(max_workers=2).replay(records)
+
+    assert [stage.stage for stage in report.regressions(0.1)] == ["reader"]
+    assert "reader" in report.format()
+    json.dumps(report.to_dict(), ensure_ascii=False)
+
+
+def test_read_audit_records_supports_gzip(tmp_path):
+    """gzip 圧縮された JSONL を読み込めることを確認する。"""
+    records = _record_production(3)
+    path = tmp_path / "audit.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as stream:
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    assert list(read_audit_records(path)) == records
+
+
+def test_invalid_chunk_size():
+    """chunk_size が不正な場合に ValueError を送出することを確認する。"""
+    with pytest.raises(ValueError):
+        ReplayHarness(chunk_size=0)
+
+
+def test_public_factory_replays_without_api_dependencies():
+    """公開ファクトリが FastAPI を読み込まず、同じ構成での再実行を差分なしにすることを確認する。"""
+    store = AuditStore()
+    production = build_orchestrator(audit_store=store)
+    for text in INPUTS:
+        production.run(text)
+
+    report = ReplayHarness(factory=build_orchestrator, max_workers=1).replay(store.records())
+    assert report.total == len(INPUTS)
+    assert report.drifted == 0
+
+    src = Path(__file__).resolve().parents[2] / "src"
+    code = (
+        "import sys; import services.inference.factory as f; f.build_orchestrator();"
+        "sys.exit('fastapi' in sys.modules or 'services.api.main' in sys.modules)"
+    )
+    env = {**os.environ, "PYTHONPATH": str(src)}
+    assert subprocess.run([sys.executable, "-c", code], env=env).returncode == 0
@@ -0,0 +1,96 @@
+"""StateCanonicalizer の語彙照合と近似重複統合を検証するテスト。
+
+観点:
+    - 別名・近似表記が語彙ラベルへ寄せられる
+    - 閾値未満の state は原文のまま残る
+    - 増減の向き・否定が反転した表記は閾値によらず寄せない
+    - Orchestrator の state 正規化に組み込まれる
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from services.inference.orchestrator import Orchestrator
+from services.inference.state_canonicalizer import DEFAULT_THRESHOLD, StateCanonicalizer
+
+VOCABULARY_PATH = Path(__file__).parent.parent.parent / "src/contracts/state_vocabulary.json"
+
+VOCABULARY = [
+    {"label": "来店頻度低下", "aliases": ["来店が減っている"]},
+    {"label": "価格感度低", "aliases": ["値引きには反応しない"]},
+    "限定感志向",
+]
+
+
+@pytest.fixture
+def canonicalizer():
+    """テスト用語彙の StateCanonicalizer を返す。"""
+    return StateCanonicalizer(VOCABULARY, threshold=0.6)
+
+
+def test_lookup_exact_alias(canonicalizer):
+    """別名の完全一致がラベルへ寄せられることを確認する。"""
+    match = canonicalizer.lookup(" 来店が減っている ")
+    assert match.label == "来店頻度低下"
+    assert match.similarity == 1.0
+
+
+def test_lookup_near_duplicate(canonicalizer):
+    """近似表記が閾値以上の類似度でラベルへ寄せられることを確認する。"""
+    match = canonicalizer.lookup("最近来店が減っている")
+    assert match.label == "来店頻度低下"
+    assert 0.6 <= match.similarity < 1.0
+
+
+def test_lookup_below_threshold_returns_none(canonicalizer):
+    """類似度が閾値未満の場合は None を返すことを確認する。"""
+    assert canonicalizer.lookup("新商品に興味がある") is None
+
+
+def test_canonicalize_merges_near_duplicates(canonicalizer):
+    """近似重複が1件に統合され、語彙外 state は残ることを確認する。"""
+    states = ["来店が減っている", "最近来店が減っている", "値引きには反応しないが", "新商品に興味がある"]
+    assert canonicalizer.canonicalize(states) == ["来店頻度低下", "価格感度低", "新商品に興味がある"]
+
+
+@pytest.mark.parametrize(
+    ("text", "inverted_label"),
+    [
+        ("来店頻度が上がっている", "来店頻度低下"),
+        ("問い合わせ件数が減少", "問い合わせ増加"),
+        ("新製品に関心がない", "新商品関心"),
+    ],
+)
+@pytest.mark.parametrize("threshold", [0.6, DEFAULT_THRESHOLD])
+def test_inverted_meaning_is_not_merged(text, inverted_label, threshold):
+    """上昇/低下・増加/減少・ある/ない が反転した表記を寄せないことを確認する。"""
+    vocabulary = json.loads(VOCABULARY_PATH.read_text(encoding="utf-8"))
+    canonicalizer = StateCanonicalizer.from_vocabulary(vocabulary, threshold=threshold)
+
+    assert canonicalizer.lookup(text) is None
+    assert inverted_label not in canonicalizer.canonicalize([text])
+
+
+def test_inverted_unmatched_states_are_kept_apart():
+    """語彙外の state 同士でも向きが反転したものは統合しないことを確認する。"""
+    canonicalizer = StateCanonicalizer([], threshold=0.5)
+    states = ["会員数が増加している", "会員数が減少している"]
+    assert canonicalizer.canonicalize(states) == states
+
+
+def test_invalid_parameters_are_rejected():
+    """不正なパラメータを拒否することを確認する。"""
+    with pytest.raises(ValueError):
+        StateCanonicalizer(VOCABULARY, num_perm=10, bands=3)
+    with pytest.raises(ValueError):
+        StateCanonicalizer(VOCABULARY, threshold=0)
+
+
+def test_orchestrator_normalizes_states_with_canonicalizer(canonicalizer):
+    """Orchestrator が canonicalizer で state を正規化することを確認する。"""
+    orchestrator = Orchestrator(canonicalizer=canonicalizer)
+    result = orchestrator.run("最近来店が減っている。来店が減っている。値引きには反応しないが、限定感には反応する。")
+    assert result["state"][:2] == ["来店頻度低下", "価格感度低"]
+    assert len(result["state"]) == len(set(result["state"])) >= 3
@@ -0,0 +1,236 @@
+"""HttpSaaSAdapter とスタブサーバの連携を検証するテスト。
+
+観点:
+    - keep-alive 接続の再利用とバッチ送信
+    - 429 の再試行と 5xx 連続時の遮断
+    - 非冪等な POST を Idempotency-Key なしで再送しないこと
+    - 不正な応答本文の失敗扱いと監査情報の件数上限
+    - TokenBucket の流量制御
+"""
+
+import pytest
+
+from services.bridge.adapters import (
+    AdapterError,
+    CircuitBreaker,
+    CircuitOpenError,
+    HttpResponse,
+    HttpSaaSAdapter,
+    TokenBucket,
+)
+from services.bridge.stub_server import StubServer
+
+
+class LineStubAdapter(HttpSaaSAdapter):
+    """テスト用の LINE 配信 Adapter。"""
+
+    routes = {"send_line_message": "/line/messages"}
+    batch_routes = {"send_line_message": "/line/messages/batch"}
+
+
+class DedupLineStubAdapter(LineStubAdapter):
+    """Idempotency-Key で重複排除されるテスト用 Adapter。"""
+
+    supports_idempotency_key = True
+
+
+@pytest.fixture
+def stub():
+    """起動済みスタブサーバを返す。"""
+    with StubServer() as server:
+        yield server
+
+
+def _adapter(stub, **kwargs) -> LineStubAdapter:
+    """待機なしのテスト用 Adapter を返す。"""
+    options = {"rate_per_sec": 1000, "sleep": lambda _: None}
+    options.update(kwargs)
+    return LineStubAdapter(stub.url, **options)
+
+
+def test_execute_reuses_keep_alive_connection(stub):
+    """連続実行で接続が再利用されることを確認する。"""
+    adapter = _adapter(stub)
+    results = [adapter.execute("send_line_message", {"segment_id": i}) for i in range(5)]
+
+    assert all(result.ok for result in results)
+    assert adapter.pool.created_connections == 1
+    assert stub.stats["connections"] == 1
+    assert adapter.audit(results[0].execution_id).input == {"segment_id": 0}
+    adapter.close()
+
+
+def test_execute_batch_chunks_requests(stub):
+    """バッチ対応 Primitive が max_batch_size ごとにまとめて送信されることを確認する。"""
+    adapter = _adapter(stub, max_batch_size=4)
+    results = adapter.execute_batch("send_line_message", [{"customer_id": i} for i in range(10)])
+
+    assert [result.response["received"]["customer_id"] for result in results] == list(range(10))
+    assert stub.stats["requests"] == 3
+    adapter.close()
+
+
+def test_retries_after_429(stub):
+    """429 応答後に再試行して成功することを確認する。"""
+    stub.force_429 = 2
+    adapter = _adapter(stub)
+    result = adapter.execute("send_line_message", {"segment_id": 1})
+
+    assert result.ok
+    assert stub.stats["throttled"] == 2
+    adapter.close()
+
+
+def test_outage_opens_circuit(stub):
+    """5xx が続くと遮断され、以降は送信しないことを確認する。"""
+    stub.outage = True
+    adapter = _adapter(stub, max_retries=1, failure_threshold=2)
+
+    assert not adapter.execute("send_line_message", {"segment_id": 1}).ok
+    assert not adapter.execute("send_line_message", {"segment_id": 2}).ok
+    sent = stub.stats["requests"]
+    result = adapter.execute("send_line_message", {"segment_id": 3})
+
+    assert not result.ok
+    assert "circuit open" in result.error
+    assert stub.stats["requests"] == sent
+    adapter.close()
+
+
+def test_post_is_not_retried_on_5xx_without_dedup(stub):
+    """重複排除されない POST は 5xx で再送せず、1回だけ送信することを確認する。"""
+    stub.outage = True
+    adapter = _adapter(stub, max_retries=3)
+
+    result = adapter.execute("send_line_message", {"segment_id": 1})
+
+    assert not result.ok
+    assert "server error: 503" in result.error
+    assert stub.stats["requests"] == 1
+    adapter.close()
+
+
+def test_post_is_retried_with_same_idempotency_key(stub):
+    """重複排除される Adapter では同じ Idempotency-Key で再送することを確認する。"""
+    stub.outage = True
+    adapter = DedupLineStubAdapter(stub.url, rate_per_sec=1000, max_retries=2, sleep=lambda _: None)
+
+    result = adapter.execute("send_line_message", {"segment_id": 1})
+
+    assert not result.ok
+    assert stub.stats["requests"] == 3
+    assert list(stub.idempotency_keys) == [result.execution_id] * 3
+    adapter.close()
+
+
+def test_invalid_response_body_is_failed_and_audited(stub, monkeypatch):
+    """JSON でない・形式の異なる応答本文を失敗として監査情報に記録することを確認する。"""
+    adapter = _adapter(stub)
+    monkeypatch.setattr(adapter.pool, "request", lambda *args, **kwargs: HttpResponse(200, {}, b"<html>"))
+
+    result = adapter.execute("send_line_message", {"segment_id": 1})
+
+    assert not result.ok
+    assert result.error == "invalid response body"
+    assert not adapter.audit(result.execution_id).ok
+
+    monkeypatch.setattr(adapter.pool, "request", lambda *args, **kwargs: HttpResponse(200, {}, b"[1, 2]"))
+    results = adapter.execute_batch("send_line_message", [{"customer_id": 1}, {"customer_id": 2}])
+
+    assert [r.error for r in results] == ["invalid batch response body"] * 2
+    assert all(adapter.audit(r.execution_id) is not None for r in results)
+    adapter.close()
+
+
+def test_audit_keeps_latest_entries_up_to_capacity(stub):
+    """監査情報が上限件数を超えると古いものから破棄されることを確認する。"""
+    adapter = _adapter(stub, audit_capacity=2)
+    results = [adapter.execute("send_line_message", {"segment_id": i}) for i in range(3)]
+
+    assert adapter.audit(results[0].execution_id) is None
+    assert adapter.audit(results[2].execution_id).input == {"segment_id": 2}
+    adapter.close()
+
+
+def test_batch_sends_item_keys_and_rollback_uses_them(stub):
+    """一括実行で要素ごとの実行IDを送り、その実行IDで補償できることを確認する。"""
+    adapter = _adapter(stub, max_batch_size=2)
+    results = adapter.execute_batch("send_line_message", [{"customer_id": i} for i in range(3)])
+
+    sent = list(stub.idempotency_keys)
+    assert all(result.execution_id in sent for result in results)
+    assert adapter.rollback(results[1].execution_id).ok
+    assert list(stub.idempotency_keys)[-1] == f"rollback-{results[1].execution_id}"
+    adapter.close()
+
+
+def test_rollback_skips_failed_execution(stub):
+    """失敗した実行は補償要求を送らず skipped とすることを確認する。"""
+    stub.outage = True
+    adapter = _adapter(stub)
+    failed = adapter.execute("send_line_message", {"segment_id": 1})
+    sent = stub.stats["requests"]
+
+    outcome = adapter.rollback(failed.execution_id)
+
+    assert outcome.ok and outcome.skipped
+    assert stub.stats["requests"] == sent
+    adapter.close()
+
+
+def test_stub_bounds_recorded_keys():
+    """スタブが記録する Idempotency-Key の件数が上限で抑えられることを確認する。"""
+    with StubServer(key_history=2) as server:
+        adapter = _adapter(server)
+        for i in range(3):
+            adapter.execute("send_line_message", {"segment_id": i})
+        assert len(server.idempotency_keys) == 2
+        adapter.close()
+
+
+def test_rollback_and_validation(stub):
+    """補償実行と未対応 Primitive の拒否を確認する。"""
+    adapter = _adapter(stub)
+    executed = adapter.execute("send_line_message", {"segment_id": 1})
+
+    assert adapter.rollback(executed.execution_id).ok
+    assert adapter.audit(executed.execution_id).rolled_back
+    assert not adapter.rollback("unknown").ok
+    with pytest.raises(AdapterError):
+        adapter.execute("reserve_offer", {})
+    adapter.close()
+
+
+def test_token_bucket_waits_for_refill():
+    """トークン不足時に補充まで待機することを確認する。"""
+    now = [0.0]
+    slept: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+
+    assert sum(slept) == pytest.approx(1.0)
+
+
+def test_circuit_breaker_half_open_allows_single_trial():
+    """遮断後 reset_timeout 経過で1件のみ試行を許可することを確認する。"""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_circuit_open_error_is_adapter_error():
+    """CircuitOpenError が AdapterError として扱えることを確認する。"""
+    assert issubclass(CircuitOpenError, AdapterError)
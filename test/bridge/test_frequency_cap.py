@@ -0,0 +1,73 @@
+"""FrequencyCapStore のスライディングウィンドウ判定を検証するテスト。
+
+観点:
+    - 上限到達後の拒否と同一バッチ内重複の扱い
+    - ウィンドウ経過後のバケット失効
+    - 保存/復元後のカウンタ維持
+"""
+
+import numpy as np
+import pytest
+
+from services.bridge.frequency_cap import FrequencyCapError, FrequencyCapStore
+
+DAY = 24 * 3600
+
+
+def _store(**kwargs) -> FrequencyCapStore:
+    """時刻0起点のテスト用ストアを返す。"""
+    return FrequencyCapStore(capacity=5, window_seconds=7 * DAY, buckets=7, clock=lambda: 0.0, **kwargs)
+
+
+def test_check_and_increment_enforces_limit():
+    """上限回数に達した顧客が拒否されることを確認する。"""
+    store = _store()
+
+    assert store.check_and_increment([0, 1], limit=2, now=0).tolist() == [True, True]
+    assert store.check_and_increment([0], limit=2, now=DAY).tolist() == [True]
+    assert store.check_and_increment([0, 1], limit=2, now=2 * DAY).tolist() == [False, True]
+    assert store.counts([0, 1, 2], now=2 * DAY).tolist() == [2, 2, 0]
+
+
+def test_duplicate_ids_in_batch_count_in_order():
+    """同一バッチ内の重複IDが出現順に数えられることを確認する。"""
+    store = _store()
+    allowed = store.check_and_increment([3, 3, 3, 4], limit=2, now=0)
+    assert allowed.tolist() == [True, True, False, True]
+    assert store.counts([3], now=0).tolist() == [2]
+
+
+def test_out_of_range_ids_are_rejected():
+    """範囲外IDは常に拒否されることを確認する。"""
+    store = _store()
+    assert store.check_and_increment([-1, 5], limit=3, now=0).tolist() == [False, False]
+
+
+def test_old_buckets_expire_after_window():
+    """ウィンドウ外になったバケットの送信回数が失効することを確認する。"""
+    store = _store()
+    store.check_and_increment([0], limit=5, now=0)
+    store.check_and_increment([0], limit=5, now=3 * DAY)
+
+    assert store.counts([0], now=6 * DAY).tolist() == [2]
+    assert store.counts([0], now=7 * DAY).tolist() == [1]
+    assert store.counts([0], now=30 * DAY).tolist() == [0]
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    """保存後に復元したストアがカウンタを保持することを確認する。"""
+    store = _store()
+    store.check_and_increment(np.array([0, 1, 1]), limit=3, now=DAY)
+    path = tmp_path / "line_weekly.npz"
+    store.save(path)
+
+    restored = FrequencyCapStore.load(path, clock=lambda: 2 * DAY)
+
+    assert restored.counts([0, 1, 2], now=2 * DAY).tolist() == [1, 2, 0]
+    assert restored.bytes_per_customer == 7
+
+
+def test_limit_must_fit_dtype():
+    """dtype で表現できない limit を拒否することを確認する。"""
+    with pytest.raises(FrequencyCapError):
+        _store().check_and_increment([0], limit=256)
@@ -0,0 +1,96 @@
+"""PolicyEngine の同意・除外判定を検証するテスト。
+
+観点:
+    - 同意なし/除外リスト該当/範囲外IDの拒否
+    - ルール未定義 Primitive の全件拒否
+    - reload 後に新スナップショットで判定される
+"""
+
+import numpy as np
+import pytest
+
+from services.bridge.policy_engine import PolicyEngine, PolicyError, compile_policy
+
+DEFINITION = {
+    "version": "v1",
+    "capacity": 10,
+    "consent": {"line": [0, 1, 2, 3, 4]},
+    "suppression": {"optout": [1], "complaint": [3]},
+    "rules": {
+        "send_line_message": {"consent": "line", "exclude": ["optout", "complaint"]},
+        "segment_customers": {"consent": None},
+    },
+}
+
+
+@pytest.fixture
+def engine():
+    """テスト用 PolicyEngine を返す。"""
+    return PolicyEngine(compile_policy(DEFINITION))
+
+
+def test_evaluate_segment_applies_consent_and_suppression(engine):
+    """同意済みかつ除外リスト非該当の顧客のみ許可されることを確認する。"""
+    decision = engine.evaluate("send_line_message", [0, 1, 2, 3, 5, 42, -1])
+
+    assert decision.allowed_ids.tolist() == [0, 2]
+    assert decision.suppressed.tolist() == [False, True, False, True, False, False, False]
+    assert decision.no_consent.tolist() == [False, False, False, False, True, True, True]
+
+
+def test_check_matches_evaluate(engine):
+    """単件判定がセグメント判定と一致することを確認する。"""
+    ids = np.arange(-2, 12)
+    decision = engine.evaluate("send_line_message", ids)
+    assert [engine.check("send_line_message", int(i)) for i in ids] == decision.allowed.tolist()
+
+
+def test_unknown_primitive_is_denied(engine):
+    """ルール未定義の Primitive は全件拒否されることを確認する。"""
+    decision = engine.evaluate("reserve_offer", [0, 2])
+    assert decision.allowed_ids.size == 0
+    assert engine.check("reserve_offer", 0) is False
+
+
+def test_rule_without_consent_allows_all_in_range(engine):
+    """consent 未指定ルールは範囲内の全顧客を許可することを確認する。"""
+    decision = engine.evaluate("segment_customers", [0, 9, 10])
+    assert decision.allowed.tolist() == [True, True, False]
+
+
+def test_reload_swaps_snapshot(engine):
+    """reload 後は新しいスナップショットで判定されることを確認する。"""
+    updated = dict(DEFINITION, version="v2", suppression={"optout": [0, 1], "complaint": []})
+    engine.reload(compile_policy(updated))
+
+    assert engine.version == "v2"
+    assert engine.evaluate("send_line_message", [0, 2, 3]).allowed_ids.tolist() == [2, 3]
+
+
+@pytest.mark.parametrize(
+    "override",
+    [
+        {"rules": {"x": "line"}},
+        {"rules": {"x": ["line"]}},
+        {"rules": ["x"]},
+        {"rules": {"x": {"consent": ["line"]}}},
+        {"rules": {"x": {"exclude": "optout"}}},
+        {"consent": ["line"]},
+        {"suppression": {"optout": "1"}},
+        {"consent": {"line": [0, "1"]}},
+    ],
+)
+def test_compile_rejects_malformed_definitions(override):
+    """型の不正な定義を AttributeError 等ではなく PolicyError で拒否することを確認する。"""
+    with pytest.raises(PolicyError):
+        compile_policy({**DEFINITION, **override})
+
+
+def test_compile_rejects_unknown_references():
+    """未定義の同意種別・除外リスト参照を拒否することを確認する。"""
+    with pytest.raises(PolicyError):
+        compile_policy(dict(DEFINITION, rules={"x": {"consent": "mail"}}))
+    with pytest.raises(PolicyError):
+        compile_policy(dict(DEFINITION, rules={"x": {"exclude": ["vip"]}}))
+    with pytest.raises(PolicyError):
+        compile_policy(dict(DEFINITION, consent={"line": [10]}))
@@ -0,0 +1,198 @@
+"""RollbackJournal / RollbackExecutor の振る舞いを検証するテスト。
+
+観点:
+    - 補償が依存関係の逆順で実行される
+    - 補償失敗時に依存先が blocked となる
+    - 再起動後にジャーナルから Rollback を再開できる
+    - 未記録・自己・循環依存を補償済みとして扱わない
+"""
+
+import threading
+
+import pytest
+
+from services.bridge.rollback import (
+    AppliedStep,
+    RollbackError,
+    RollbackExecutor,
+    RollbackJournal,
+)
+
+
+def _recording_handlers(calls: list[str]) -> dict:
+    """補償呼び出し順を記録するハンドラ群を返す。"""
+    lock = threading.Lock()
+
+    def handler(step: AppliedStep) -> None:
+        with lock:
+            calls.append(step.step_id)
+
+    return {
+        "cancel_offer": handler,
+        "cancel_line_message": handler,
+        "release_segment": handler,
+    }
+
+
+def test_rollback_runs_in_reverse_dependency_order(tmp_path):
+    """依存元が依存先より先に補償されることを確認する。"""
+    calls: list[str] = []
+    journal = RollbackJournal(tmp_path / "rollback.wal")
+    executor = RollbackExecutor(journal, _recording_handlers(calls))
+
+    executor.record_applied("tx1", AppliedStep("seg", "segment_customers"))
+    executor.record_applied("tx1", AppliedStep("offer", "reserve_offer", depends_on=("seg",)))
+    executor.record_applied("tx1", AppliedStep("line", "send_line_message", depends_on=("seg",)))
+
+    result = executor.rollback("tx1")
+
+    assert result.ok
+    assert calls[-1] == "seg"
+    assert sorted(calls[:2]) == ["line", "offer"]
+    assert journal.status("tx1") == "rolled_back"
+
+
+def test_failed_compensation_blocks_dependencies(tmp_path):
+    """補償失敗時は依存先を補償せず blocked とすることを確認する。"""
+    calls: list[str] = []
+    handlers = _recording_handlers(calls)
+
+    def failing(step: AppliedStep) -> None:
+        raise RuntimeError("line api down")
+
+    handlers["cancel_line_message"] = failing
+    journal = RollbackJournal(tmp_path / "rollback.wal")
+    executor = RollbackExecutor(journal, handlers)
+
+    executor.record_applied("tx1", AppliedStep("seg", "segment_customers"))
+    executor.record_applied("tx1", AppliedStep("line", "send_line_message", depends_on=("seg",)))
+
+    result = executor.rollback("tx1")
+
+    assert not result.ok
+    assert result.failed == ["line"]
+    assert result.blocked == ["seg"]
+    assert calls == []
+    assert journal.status("tx1") == "rolling_back"
+
+
+def test_recover_resumes_rollback_after_restart(tmp_path):
+    """再起動後に補償済みステップを除いて Rollback を再開することを確認する。"""
+    path = tmp_path / "rollback.wal"
+    journal = RollbackJournal(path, sync_every=1000)
+    handlers = _recording_handlers([])
+
+    def crash(step: AppliedStep) -> None:
+        raise RuntimeError("process crashed")
+
+    handlers["cancel_offer"] = crash
+    executor = RollbackExecutor(journal, handlers)
+    executor.record_applied("tx1", AppliedStep("seg", "segment_customers"))
+    executor.record_applied("tx1", AppliedStep("offer", "reserve_offer", depends_on=("seg",)))
+    executor.record_applied("tx1", AppliedStep("line", "send_line_message", depends_on=("seg",)))
+    executor.rollback("tx1")
+    journal.close()
+
+    calls: list[str] = []
+    restarted = RollbackExecutor(RollbackJournal(path), _recording_handlers(calls))
+    results = restarted.recover()
+
+    assert [result.tx_id for result in results] == ["tx1"]
+    assert results[0].ok
+    assert calls == ["offer", "seg"]
+
+
+def test_recover_ignores_torn_tail_and_committed(tmp_path):
+    """書きかけ末尾行と commit 済みトランザクションを無視することを確認する。"""
+    path = tmp_path / "rollback.wal"
+    journal = RollbackJournal(path)
+    executor = RollbackExecutor(journal, _recording_handlers([]))
+    executor.record_applied("done", AppliedStep("a", "reserve_offer"))
+    executor.commit("done")
+    executor.record_applied("inflight", AppliedStep("b", "reserve_offer"))
+    journal.close()
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write('{"op":"apply","tx":"inflight","step":{"step_')
+
+    calls: list[str] = []
+    restarted = RollbackExecutor(RollbackJournal(path), _recording_handlers(calls))
+    results = restarted.recover()
+
+    assert [result.tx_id for result in results] == ["inflight"]
+    assert calls == ["b"]
+    with pytest.raises(RollbackError):
+        restarted.rollback("done")
+
+
+def test_entries_after_torn_tail_survive_second_restart(tmp_path):
+    """書きかけ末尾行の復旧後に追記したエントリが、2回目の再起動でも読めることを確認する。"""
+    path = tmp_path / "rollback.wal"
+    journal = RollbackJournal(path)
+    executor = RollbackExecutor(journal, _recording_handlers([]))
+    executor.record_applied("first", AppliedStep("a", "reserve_offer"))
+    journal.close()
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write('{"op":"apply","tx":"torn","step":{"step_')
+
+    recovered = RollbackJournal(path)
+    executor = RollbackExecutor(recovered, _recording_handlers([]))
+    executor.record_applied("second", AppliedStep("b", "reserve_offer"))
+    executor.commit("second")
+    recovered.close()
+
+    restarted = RollbackJournal(path)
+    assert restarted.status("first") == "applying"
+    assert restarted.status("second") == "committed"
+    assert restarted.status("torn") is None
+    assert path.read_text(encoding="utf-8").endswith("\n")
+
+
+def test_record_applied_rejects_primitive_without_compensation(tmp_path):
+    """補償アクションのない Primitive を記録できないことを確認する。"""
+    executor = RollbackExecutor(RollbackJournal(tmp_path / "rollback.wal"), {})
+    with pytest.raises(RollbackError):
+        executor.record_applied("tx1", AppliedStep("h", "get_visit_history"))
+
+
+def test_record_applied_rejects_unknown_and_self_dependencies(tmp_path):
+    """未記録のステップ・自身への依存と、ステップIDの重複を拒否することを確認する。"""
+    journal = RollbackJournal(tmp_path / "rollback.wal")
+    executor = RollbackExecutor(journal, _recording_handlers([]))
+    executor.record_applied("tx1", AppliedStep("a", "reserve_offer"))
+
+    with pytest.raises(RollbackError, match="unrecorded"):
+        executor.record_applied("tx1", AppliedStep("b", "reserve_offer", depends_on=("later",)))
+    with pytest.raises(RollbackError, match="unrecorded"):
+        executor.record_applied("tx1", AppliedStep("self", "reserve_offer", depends_on=("self",)))
+    with pytest.raises(RollbackError, match="already recorded"):
+        executor.record_applied("tx1", AppliedStep("a", "reserve_offer", depends_on=("a",)))
+    assert [step.step_id for step in journal.pending_steps("tx1")] == ["a"]
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [
+            AppliedStep("a", "reserve_offer", depends_on=("b",)),
+            AppliedStep("b", "reserve_offer", depends_on=("a",)),
+        ],
+        [AppliedStep("a", "reserve_offer", depends_on=("a",))],
+    ],
+    ids=["cycle", "self"],
+)
+def test_cyclic_journal_is_reported_blocked(tmp_path, steps):
+    """ジャーナル上の循環・自己依存は補償せず blocked とし、rolled_back にしないことを確認する。"""
+    journal = RollbackJournal(tmp_path / "rollback.wal")
+    for step in steps:
+        # 検証を経ない旧ジャーナル相当の記録を作る。
+        journal.record_applied("tx1", step)
+    calls: list[str] = []
+    executor = RollbackExecutor(journal, _recording_handlers(calls))
+
+    result = executor.rollback("tx1")
+
+    assert not result.ok
+    assert result.compensated == []
+    assert result.blocked == sorted(step.step_id for step in steps)
+    assert calls == []
+    assert journal.status("tx1") == "rolling_back"
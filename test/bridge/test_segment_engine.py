@@ -0,0 +1,103 @@
+"""SegmentEngine の条件評価とキャッシュを検証するテスト。
+
+観点:
+    - all/any/not と各演算子の評価結果
+    - memory map で開いた列でも同じ結果になる
+    - 不正な条件（列の型に合わない値を含む）はコンパイル時に拒否される
+"""
+
+import numpy as np
+import pytest
+
+from services.bridge.segment_engine import (
+    CustomerColumns,
+    SegmentEngine,
+    SegmentError,
+    compile_conditions,
+)
+
+
+@pytest.fixture
+def columns():
+    """テスト用の顧客列データを返す。"""
+    return CustomerColumns(
+        {
+            "days_since_last_visit": np.array([5, 40, 90, 10, 60], dtype=np.int16),
+            "visit_count": np.array([12, 2, 1, 8, 3], dtype=np.int32),
+            "coupon_used": np.array([1, 0, 0, 1, 1], dtype=np.int8),
+        },
+        version="v1",
+    )
+
+
+VISIT_DECLINE = {
+    "all": [
+        {"column": "days_since_last_visit", "op": ">=", "value": 30},
+        {"column": "visit_count", "op": "<=", "value": 3},
+    ]
+}
+
+
+def test_segment_customers_evaluates_all(columns):
+    """all 条件が積集合として評価されることを確認する。"""
+    segment = SegmentEngine(columns).segment_customers(VISIT_DECLINE)
+    assert segment.customer_ids.tolist() == [1, 2, 4]
+    assert segment.count == 3
+
+
+def test_any_not_in_between(columns):
+    """any/not/in/between が評価できることを確認する。"""
+    engine = SegmentEngine(columns)
+    conditions = {
+        "any": [
+            {"column": "visit_count", "op": "in", "value": [8, 12]},
+            {"not": {"column": "days_since_last_visit", "op": "between", "value": [1, 80]}},
+        ]
+    }
+    assert engine.segment_customers(conditions).customer_ids.tolist() == [0, 2, 3]
+
+
+def test_segments_can_be_combined(columns):
+    """Segment 同士を集合演算で結合できることを確認する。"""
+    engine = SegmentEngine(columns)
+    declined = engine.segment_customers(VISIT_DECLINE)
+    coupon = engine.segment_customers({"column": "coupon_used", "op": "==", "value": 1})
+    assert (declined & ~coupon).customer_ids.tolist() == [1, 2]
+    assert (declined | coupon).count == 5
+
+
+def test_equivalent_conditions_share_cache(columns):
+    """子の順序が異なる同値条件がキャッシュを共有することを確認する。"""
+    engine = SegmentEngine(columns)
+    first = engine.segment_customers(VISIT_DECLINE)
+    second = engine.segment_customers({"all": list(reversed(VISIT_DECLINE["all"]))})
+    assert first.mask is second.mask
+
+
+def test_memory_mapped_columns(columns, tmp_path):
+    """保存した列を memory map で開いて同じ結果になることを確認する。"""
+    columns.write(tmp_path / "customers")
+    opened = CustomerColumns.open(tmp_path / "customers")
+
+    assert isinstance(opened.columns["visit_count"], np.memmap)
+    assert SegmentEngine(opened).segment_customers(VISIT_DECLINE).customer_ids.tolist() == [1, 2, 4]
+
+
+@pytest.mark.parametrize(
+    "conditions",
+    [
+        {"column": "unknown", "op": "==", "value": 1},
+        {"column": "visit_count", "op": "~", "value": 1},
+        {"column": "visit_count", "op": "between", "value": [1]},
+        {"all": []},
+        {"column": "visit_count", "op": ">=", "value": "3"},
+        {"column": "visit_count", "op": "==", "value": None},
+        {"column": "coupon_used", "op": "==", "value": True},
+        {"column": "visit_count", "op": "in", "value": [1, "2"]},
+        {"column": "visit_count", "op": "between", "value": [1, [3]]},
+    ],
+)
+def test_invalid_conditions_are_rejected(columns, conditions):
+    """不正な条件がコンパイル時に拒否されることを確認する。"""
+    with pytest.raises(SegmentError):
+        compile_conditions(conditions, columns)
@@ -0,0 +1,154 @@
+"""/convert 応答コーデックの往復変換と形式選択を検証するテスト。
+
+観点:
+    - JSON / MessagePack / 語彙ID付き MessagePack の往復で state-intent 契約を満たす値が復元される
+    - MessagePack の符号化が仕様どおりのバイト列になる
+    - intern 表が契約から決定的に構築され、表外・表の不一致を検出できる
+    - Accept ヘッダの q 値・ワイルドカードに従って形式を選ぶ
+"""
+
+import json
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from services.api.codec import (
+    INTERNED_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    STR_CACHE_MAX_CHARS,
+    CodecError,
+    InternTable,
+    MessagePackCodec,
+    negotiate,
+)
+from services.inference.orchestrator import Orchestrator
+
+SCHEMA_PATH = Path(__file__).parent.parent.parent / "src/contracts/state_intent.schema.json"
+VOCABULARY_PATH = Path(__file__).parent.parent.parent / "src/contracts/state_vocabulary.json"
+SCHEMA = json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
+VOCABULARY = json.loads(VOCABULARY_PATH.read_text(encoding="utf-8"))
+TABLE = InternTable.from_contract(SCHEMA, VOCABULARY)
+
+INPUTS = [
+    "最近来店が減っている。値引きには反応しないが、限定感には反応する。",
+    "3か月来店がない。新商品体験には興味を示している。",
+    "問い合わせ件数が増え、解約検討の兆しがある。",
+]
+
+
+@pytest.mark.parametrize("text", INPUTS)
+@pytest.mark.parametrize("intern", [None, TABLE])
+def test_convert_output_round_trips(text, intern):
+    """Orchestrator 出力が MessagePack 往復後も同値かつ schema 準拠であることを確認する。"""
+    output = Orchestrator().run(text)
+    codec = MessagePackCodec(intern)
+
+    decoded = codec.unpackb(codec.packb(output))
+
+    assert decoded == output
+    jsonschema.validate(instance=decoded, schema=SCHEMA)
+
+
+def test_interned_encoding_is_smaller_than_json_and_plain_msgpack():
+    """語彙ID付き MessagePack が JSON・通常 MessagePack より小さいことを確認する。"""
+    output = Orchestrator().run(INPUTS[0])
+
+    interned = MessagePackCodec(TABLE).packb(output)
+    plain = MessagePackCodec().packb(output)
+
+    compact_json = json.dumps(output, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert len(interned) < len(plain) < len(compact_json)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, b"\xc0"),
+        (True, b"\xc3"),
+        (127, b"\x7f"),
+        (-1, b"\xff"),
+        (-33, b"\xd0\xdf"),
+        (256, b"\xcd\x01\x00"),
+        (2**40, b"\xcf\x00\x00\x01\x00\x00\x00\x00\x00"),
+        (0.5, b"\xcb\x3f\xe0\x00\x00\x00\x00\x00\x00"),
+        ("a", b"\xa1a"),
+        ("x" * 40, b"\xd9\x28" + b"x" * 40),
+        ([1, 2], b"\x92\x01\x02"),
+        ({"a": 1}, b"\x81\xa1a\x01"),
+        (list(range(16)), b"\xdc\x00\x10" + bytes(range(16))),
+        (b"\x00", b"\xc4\x01\x00"),
+    ],
+)
+def test_msgpack_wire_format(value, expected):
+    """MessagePack 仕様どおりに符号化・復元できることを確認する。"""
+    codec = MessagePackCodec()
+
+    assert codec.packb(value) == expected
+    assert codec.unpackb(expected) == value
+
+
+def test_intern_table_is_deterministic_and_covers_contract():
+    """intern 表が同じ契約から同じ version で構築され、キー・語彙を含むことを確認する。"""
+    again = InternTable.from_contract(SCHEMA, VOCABULARY)
+
+    assert again == TABLE
+    assert {"state", "intent", "action_bindings", "dry_run"} <= set(TABLE.strings)
+    assert {"来店頻度低下", "再来店動機付け", "限定LINE配信案", "line.broadcast"} <= set(TABLE.strings)
+
+
+def test_interned_string_encoding():
+    """表にある文字列は ext 型、表にない文字列は通常の str で送ることを確認する。"""
+    codec = MessagePackCodec(TABLE)
+    index = TABLE.strings.index("来店頻度低下")
+
+    assert codec.packb("来店頻度低下") == bytes((0xD4, 1, index))
+    assert codec.packb("語彙外") == MessagePackCodec().packb("語彙外")
+
+
+def test_string_cache_is_bounded():
+    """長い文字列はキャッシュせず、件数上限に達したキャッシュは作り直すことを確認する。"""
+    codec = MessagePackCodec(str_cache_size=2)
+    long_text = "長" * (STR_CACHE_MAX_CHARS + 1)
+
+    assert codec.unpackb(codec.packb([long_text, "a", "b", "c"])) == [long_text, "a", "b", "c"]
+    assert long_text not in codec._str_cache
+    assert len(codec._str_cache) <= 2
+    assert codec.packb("c") == MessagePackCodec(str_cache_size=0).packb("c")
+
+
+def test_decoding_errors():
+    """表のないデコード・範囲外ID・切り詰め・余剰バイトを CodecError にすることを確認する。"""
+    data = MessagePackCodec(TABLE).packb({"state": ["来店頻度低下"]})
+
+    with pytest.raises(CodecError):
+        MessagePackCodec().unpackb(data)
+    with pytest.raises(CodecError):
+        MessagePackCodec(InternTable.build(["state"])).unpackb(data)
+    with pytest.raises(CodecError):
+        MessagePackCodec(TABLE).unpackb(data[:-1])
+    with pytest.raises(CodecError):
+        MessagePackCodec(TABLE).unpackb(data + b"\xc0")
+    with pytest.raises(CodecError):
+        MessagePackCodec().packb({1, 2})
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/msgpack", MSGPACK_MEDIA_TYPE),
+        (f"{INTERNED_MEDIA_TYPE}, application/json;q=0.5", INTERNED_MEDIA_TYPE),
+        (f"application/json;q=0.4, {MSGPACK_MEDIA_TYPE};q=0.9", MSGPACK_MEDIA_TYPE),
+        ("application/msgpack;q=0, */*;q=0.1", JSON_MEDIA_TYPE),
+        ("application/json;q=0, */*", MSGPACK_MEDIA_TYPE),
+        ("application/*;q=0, */*", None),
+        ("application/*;q=0.2, application/json;q=0.1", MSGPACK_MEDIA_TYPE),
+        ("text/html", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    """Accept ヘッダの q 値とワイルドカードに従って形式を選ぶことを確認する。"""
+    assert negotiate(accept) == expected
@@ -0,0 +1,152 @@
+"""契約アーティファクトのコンパイル結果を検証するテスト。
+
+観点:
+    - コンパイル済み検証関数が jsonschema と同じ合否を返す
+    - アーティファクトの書き出し/読み込みで同じ契約が復元される
+    - 未対応キーワード・互換性のないアーティファクトの扱い
+"""
+
+import json
+import pickle
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from services.inference.contract_artifacts import (
+    ContractError,
+    build_contract,
+    compile_schema,
+    load_contract,
+    write_artifact,
+)
+
+SCHEMA_PATH = Path(__file__).parent.parent.parent / "src/contracts/state_intent.schema.json"
+VOCABULARY_PATH = Path(__file__).parent.parent.parent / "src/contracts/state_vocabulary.json"
+
+VALID_PAYLOAD = {
+    "state": ["来店頻度低下", "価格感度低", "限定感志向"],
+    "intent": "再来店動機付け",
+    "next_actions": ["限定LINE配信案", "会員限定イベント", "期間限定特典"],
+    "confidence": 0.82,
+    "trace_id": "00000000-0000-0000-0000-000000000001",
+    "rollback_plan": "配信停止→通常施策に戻す",
+    "action_bindings": [{"action": "LINE配信", "api": "line.broadcast", "dry_run": True}],
+}
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {},
+        {"state": ["A", "A", "B"]},
+        {"state": ["A"]},
+        {"confidence": 1.5},
+        {"confidence": True},
+        {"trace_id": "not-a-uuid"},
+        {"action_bindings": [{"action": "A", "api": "a.b", "dry_run": False}]},
+        {"action_bindings": [{"action": "A", "api": "a.b"}]},
+        {"next_actions": "A"},
+    ],
+)
+def test_compiled_validator_matches_jsonschema(changes):
+    """コンパイル済み検証関数の合否が jsonschema と一致することを確認する。"""
+    schema = json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
+    payload = {**VALID_PAYLOAD, **changes}
+    expected_ok = jsonschema.Draft7Validator(schema).is_valid(payload)
+
+    issues = build_contract().validate(payload)
+
+    assert (not issues) == expected_ok
+
+
+def test_compiled_validator_reports_missing_required():
+    """必須項目欠落が issues に含まれることを確認する。"""
+    payload = {key: value for key, value in VALID_PAYLOAD.items() if key != "intent"}
+    assert "$.intent is required" in build_contract().validate(payload)
+
+
+def test_artifact_roundtrip(tmp_path):
+    """書き出したアーティファクトから同じ契約が復元されることを確認する。"""
+    contract = build_contract()
+    path = write_artifact(contract, tmp_path / "contracts.bin")
+
+    loaded = load_contract(artifact_path=path)
+
+    assert loaded.schema_sha256 == contract.schema_sha256
+    assert loaded.vocabulary_sha256 == contract.vocabulary_sha256
+    assert loaded.vocabulary == contract.vocabulary
+    assert loaded.validate(VALID_PAYLOAD) == []
+
+
+def test_incompatible_artifact_falls_back_to_json(tmp_path):
+    """Python バージョン違いのアーティファクトは JSON から再コンパイルすることを確認する。"""
+    path = write_artifact(build_contract(), tmp_path / "contracts.bin")
+    artifact = pickle.loads(path.read_bytes())
+    artifact["python"] = [2, 7]
+    artifact["code"] = b""
+    path.write_bytes(pickle.dumps(artifact))
+
+    assert load_contract(artifact_path=path).validate(VALID_PAYLOAD) == []
+
+
+def test_stale_artifact_is_rebuilt_from_json(tmp_path):
+    """契約 JSON の変更後は古いアーティファクトを使わず再コンパイルすることを確認する。"""
+    schema_path = tmp_path / "schema.json"
+    vocabulary_path = tmp_path / "vocabulary.json"
+    schema_path.write_bytes(SCHEMA_PATH.read_bytes())
+    vocabulary_path.write_bytes(VOCABULARY_PATH.read_bytes())
+    path = write_artifact(build_contract(schema_path, vocabulary_path), tmp_path / "contracts.bin")
+
+    vocabulary_path.write_text(json.dumps({"states": []}), encoding="utf-8")
+    loaded = load_contract(path, schema_path, vocabulary_path)
+    assert loaded.vocabulary == {"states": []}
+
+    schema_path.write_text(json.dumps({"type": "object", "required": ["intent"]}), encoding="utf-8")
+    loaded = load_contract(path, schema_path, vocabulary_path)
+    assert loaded.validate({}) == ["$.intent is required"]
+
+
+def test_load_contract_is_cached_until_files_change(tmp_path):
+    """契約ファイルが変わらない間は読み込み結果を使い回し、変更後は読み直すことを確認する。"""
+    schema_path = tmp_path / "schema.json"
+    vocabulary_path = tmp_path / "vocabulary.json"
+    schema_path.write_bytes(SCHEMA_PATH.read_bytes())
+    vocabulary_path.write_bytes(VOCABULARY_PATH.read_bytes())
+    path = write_artifact(build_contract(schema_path, vocabulary_path), tmp_path / "contracts.bin")
+
+    first = load_contract(path, schema_path, vocabulary_path)
+    assert load_contract(path, schema_path, vocabulary_path) is first
+
+    vocabulary_path.write_text(json.dumps({"states": []}), encoding="utf-8")
+    reloaded = load_contract(path, schema_path, vocabulary_path)
+    assert reloaded is not first
+    assert reloaded.vocabulary == {"states": []}
+
+
+def test_non_dict_artifact_is_rejected(tmp_path):
+    """辞書でないアーティファクトを壊れたものとして拒否することを確認する。"""
+    path = tmp_path / "contracts.bin"
+    path.write_bytes(pickle.dumps(["not", "a", "dict"]))
+
+    with pytest.raises(ContractError):
+        load_contract(artifact_path=path)
+
+
+def test_missing_artifact_falls_back_to_json(tmp_path):
+    """アーティファクトが無い場合も契約を読み込めることを確認する。"""
+    assert load_contract(artifact_path=tmp_path / "missing.bin").validate(VALID_PAYLOAD) == []
+
+
+def test_unsupported_keyword_is_rejected():
+    """未対応キーワードを含むスキーマをビルド時に拒否することを確認する。"""
+    with pytest.raises(ContractError):
+        compile_schema({"type": "object", "oneOf": []})
+
+
+def test_vocabulary_labels_are_unique():
+    """state 語彙のラベルが重複しないことを確認する。"""
+    vocabulary = json.loads(VOCABULARY_PATH.read_text(encoding="utf-8"))
+    labels = [entry["label"] for entry in vocabulary["states"]]
+    assert len(labels) == len(set(labels))
+    assert {"来店頻度低下", "価格感度低", "限定感志向"} <= set(labels)
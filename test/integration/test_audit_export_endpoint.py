@@ -0,0 +1,86 @@
+"""GET /audit/export のストリーミング出力と公開制御を検証するテストを提供する。
+
+入出力: GET /audit/export(X-Audit-Token, 条件, cursor) -> gzip NDJSON + X-Next-Cursor。
+制約:
+    - SAA_AUDIT_EXPORT_TOKEN 未設定時は 404 を返す
+    - limit で分割した応答を X-Next-Cursor で続けて取得できる
+
+Note:
+    - 共有 Orchestrator と公開トークンはテストごとに monkeypatch で差し替える
+"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+import pytest
+
+from services.api import main
+from services.inference.audit_export import iter_ndjson_records
+from services.inference.audit_store import AuditStore
+from services.inference.orchestrator import Orchestrator
+
+TOKEN = "audit-token"
+HEADERS = {"X-Audit-Token": TOKEN}
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    """監査ログ5件を持つ Orchestrator とトークンを差し込んだクライアントを返す。"""
+    orchestrator = Orchestrator(audit_store=AuditStore())
+    for index in range(5):
+        orchestrator.run(f"最近来店が減っている。{index}")
+    monkeypatch.setattr(main, "_orchestrator", orchestrator)
+    monkeypatch.setattr(main, "audit_export_token", TOKEN)
+    return TestClient(main.app)
+
+
+def test_export_pages_with_cursor(client: TestClient):
+    """limit と X-Next-Cursor で全件を重複なく取得できることを確認する。"""
+    collected: list[dict] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/audit/export", params=params, headers=HEADERS)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/gzip"
+        collected += list(iter_ndjson_records([resp.content]))
+        cursor = resp.headers["X-Next-Cursor"]
+        if resp.headers["X-Has-More"] == "0":
+            break
+
+    assert [r["trace_id"] for r in collected] == [
+        r["trace_id"] for r in main._orchestrator.audit_store.records()
+    ]
+
+
+def test_export_status_filter(client: TestClient):
+    """status 条件に一致しない record を出力しないことを確認する。"""
+    resp = client.get("/audit/export", params={"status": "failed"}, headers=HEADERS)
+
+    assert resp.status_code == 200
+    assert list(iter_ndjson_records([resp.content])) == []
+
+
+def test_export_rejects_bad_requests(client: TestClient):
+    """トークン不一致・不正な cursor を拒否することを確認する。"""
+    assert client.get("/audit/export", headers={"X-Audit-Token": "wrong"}).status_code == 403
+    assert client.get("/audit/export", params={"cursor": "@@"}, headers=HEADERS).status_code == 400
+    assert client.get("/audit/export", params={"limit": 0}, headers=HEADERS).status_code == 400
+
+
+def test_export_compacted_cursor_returns_gone(client: TestClient):
+    """破棄済みの位置を指す cursor には 410 を返すことを確認する。"""
+    first = client.get("/audit/export", params={"limit": 2}, headers=HEADERS)
+    main._orchestrator.audit_store.compact("9999-01-01T00:00:00+00:00")
+
+    resp = client.get("/audit/export", params={"cursor": first.headers["X-Next-Cursor"]}, headers=HEADERS)
+
+    assert resp.status_code == 410
+    assert "compacted" in resp.json()["detail"]
+
+
+def test_export_hidden_without_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """公開トークン未設定時は 404 を返すことを確認する。"""
+    monkeypatch.setattr(main, "audit_export_token", None)
+
+    assert client.get("/audit/export", headers=HEADERS).status_code == 404
@@ -0,0 +1,95 @@
+"""GET /audit/stats の集計応答を検証するテストを提供する。
+
+入出力: GET /audit/stats(granularity, since, until, intent, X-Tenant-ID) -> summary + series。
+制約:
+    - 集計は /convert の監査ログ保存に合わせて更新される
+    - 条件不正時は 400 を返し、X-Audit-Token がない・一致しない場合は 403 を返す
+    - 入力本文の断片（語彙外の state）は応答に含めない
+
+Note:
+    - 共有 Orchestrator と集計はテストごとに monkeypatch で差し替える
+"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+import pytest
+
+from services.api import main
+from services.inference.audit_rollup import AuditRollup
+from services.inference.audit_store import AuditStore
+from services.inference.orchestrator import Orchestrator, PayloadTemplate
+
+TOKEN = "stats-secret"
+AUTH = {"X-Audit-Token": TOKEN}
+PII_INPUT = "田中様の電話番号090-1234-5678。最近来店が減っている。"
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    """集計を差し込んだ共有 Orchestrator で3件変換済みのクライアントを返す。"""
+    orchestrator = Orchestrator(audit_store=AuditStore())
+    rollup = AuditRollup(state_labels=PayloadTemplate().fallback_states)
+    rollup.attach(orchestrator.audit_store)
+    monkeypatch.setattr(main, "_orchestrator", orchestrator)
+    monkeypatch.setattr(main, "audit_rollup", rollup)
+    monkeypatch.setattr(main, "audit_export_token", TOKEN)
+
+    client = TestClient(main.app, headers=AUTH)
+    for index in range(2):
+        assert client.post("/convert", json={"text": f"最近来店が減っている。{index}"}).status_code == 200
+    assert client.post("/convert", json={"text": PII_INPUT}).status_code == 200
+    tenant = Orchestrator(
+        audit_store=orchestrator.audit_store, template=PayloadTemplate(intent="離反防止"), tenant_id="t1"
+    )
+    tenant.run("値引きには反応しない。")
+    return client
+
+
+def test_stats_summarizes_saved_records(client: TestClient):
+    """保存済みの監査ログが summary と intent 別 series に反映されることを確認する。"""
+    body = client.get("/audit/stats").json()
+
+    assert body["summary"]["total"] == 4
+    assert body["summary"]["success_rate"] == 1.0
+    assert body["summary"]["states"][0]["count"] >= 3
+    assert {point["intent"]: point["total"] for point in body["series"]} == {
+        "再来店動機付け": 3,
+        "離反防止": 1,
+    }
+
+
+def test_stats_filters_by_intent_and_tenant(client: TestClient):
+    """intent と X-Tenant-ID で絞り込めることを確認する。"""
+    by_intent = client.get("/audit/stats", params={"intent": "離反防止", "granularity": "minute"}).json()
+    by_tenant = client.get("/audit/stats", headers={**AUTH, "X-Tenant-ID": "t1"}).json()
+    window = client.get("/audit/stats", params={"since": "2000-01-01T00:00:00", "until": "2000-01-02"}).json()
+
+    assert by_intent["summary"]["total"] == 1
+    assert [point["intent"] for point in by_intent["series"]] == ["離反防止"]
+    assert by_tenant["summary"]["total"] == 1
+    assert window["summary"]["total"] == 0
+
+
+def test_stats_rejects_invalid_params(client: TestClient):
+    """不正な粒度・時刻・件数に 400 を返すことを確認する。"""
+    assert client.get("/audit/stats", params={"granularity": "day"}).status_code == 400
+    assert client.get("/audit/stats", params={"since": "yesterday"}).status_code == 400
+    assert client.get("/audit/stats", params={"top": 0}).status_code == 400
+
+
+def test_stats_never_contain_input_text(client: TestClient):
+    """入力本文の断片（電話番号等）が集計応答に含まれないことを確認する。"""
+    resp = client.get("/audit/stats", params={"top": 100})
+
+    assert resp.status_code == 200
+    assert "090-1234-5678" not in resp.text
+    assert "田中様" not in resp.text
+    assert "(other)" in {item["state"] for item in resp.json()["summary"]["states"]}
+
+
+def test_stats_require_audit_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """トークン不一致は 403、トークン未設定時は 404 を返すことを確認する。"""
+    assert client.get("/audit/stats", headers={"X-Audit-Token": "wrong"}).status_code == 403
+    monkeypatch.setattr(main, "audit_export_token", None)
+    assert client.get("/audit/stats").status_code == 404
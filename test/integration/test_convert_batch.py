@@ -0,0 +1,40 @@
+"""POST /convert/batch を検証するテストを提供する。
+
+入出力: POST /convert/batch({"texts": [...]}) -> {"results": [...]}。
+制約:
+    - 結果は入力順に返す
+    - 空入力・件数超過には 4xx を返す
+"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from services.api import main
+from services.api.main import app
+
+PRESET_INPUT = "最近来店が減っている。値引きには反応しないが、限定感には反応する。"
+
+
+def test_batch_matches_single_convert():
+    """バッチ応答の confidence が /convert と一致することを確認する。"""
+    client = TestClient(app)
+    single = client.post("/convert", json={"text": PRESET_INPUT}).json()
+    resp = client.post("/convert/batch", json={"texts": [PRESET_INPUT, "天気の話をした"]})
+
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert len(results) == 2
+    assert results[0]["state"] == single["state"]
+    assert results[0]["confidence"] == single["confidence"] != 0.8
+    assert results[1]["confidence"] < results[0]["confidence"]
+
+
+def test_batch_rejects_empty_and_oversized(monkeypatch):
+    """空入力に 400、上限超過に 413 を返すことを確認する。"""
+    client = TestClient(app)
+    monkeypatch.setattr(main, "batch_max_items", 2)
+
+    assert client.post("/convert/batch", json={"texts": []}).status_code == 400
+    assert client.post("/convert/batch", json={"texts": ["a", " "]}).status_code == 400
+    assert client.post("/convert/batch", json={"texts": ["a", "b", "c"]}).status_code == 413
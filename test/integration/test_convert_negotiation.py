@@ -0,0 +1,60 @@
+"""POST /convert の応答形式ネゴシエーションを検証するテストを提供する。
+
+入出力: POST /convert(Accept) -> JSON / MessagePack / 語彙ID付き MessagePack。
+制約:
+    - Accept 未指定時は従来どおり JSON を返す
+    - 対応形式がない Accept には 406 を返す
+
+Note:
+    - 語彙ID付き応答は GET /contracts/intern-table の表で復元する
+"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from services.api.codec import (
+    INTERNED_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    InternTable,
+    MessagePackCodec,
+)
+from services.api.main import app
+
+PRESET_INPUT = "最近来店が減っている。値引きには反応しないが、限定感には反応する。"
+
+
+def test_msgpack_response_matches_json():
+    """MessagePack 応答が JSON 応答と同じ構造であることを確認する。"""
+    client = TestClient(app)
+    as_json = client.post("/convert", json={"text": PRESET_INPUT}).json()
+    resp = client.post("/convert", json={"text": PRESET_INPUT}, headers={"Accept": MSGPACK_MEDIA_TYPE})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    decoded = MessagePackCodec().unpackb(resp.content)
+    assert {k: v for k, v in decoded.items() if k not in ("trace_id", "generated_at")} == {
+        k: v for k, v in as_json.items() if k not in ("trace_id", "generated_at")
+    }
+
+
+def test_interned_response_decodes_with_published_table():
+    """語彙ID付き応答を公開された intern 表で復元できることを確認する。"""
+    client = TestClient(app)
+    table_json = client.get("/contracts/intern-table").json()
+    table = InternTable.build(table_json["strings"])
+    resp = client.post(
+        "/convert", json={"text": PRESET_INPUT}, headers={"Accept": INTERNED_MEDIA_TYPE}
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["X-Intern-Version"] == table_json["version"] == table.version
+    decoded = MessagePackCodec(table).unpackb(resp.content)
+    assert decoded["state"][0] == "来店頻度低下"
+
+
+def test_unsupported_accept_returns_406():
+    """対応形式がない Accept に 406 を返すことを確認する。"""
+    resp = TestClient(app).post("/convert", json={"text": PRESET_INPUT}, headers={"Accept": "text/html"})
+
+    assert resp.status_code == 406
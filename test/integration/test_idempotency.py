@@ -0,0 +1,186 @@
+"""Idempotency-Key 付き /convert と IdempotencyStore を検証するテストを提供する。
+
+入出力: POST /convert(Idempotency-Key) -> 初回の変換結果 / 409 / 400。
+制約:
+    - 同じキー・同じ本文の再送はパイプラインを再実行せず、同じ trace_id を返す
+    - 同じキーで本文が異なる場合・先行リクエストが処理中の場合は 409 を返す
+
+Note:
+    - 保存先はテストごとの一時 SQLite ファイルへ monkeypatch で差し替える
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+from fastapi.testclient import TestClient
+import pytest
+
+from services.api import main
+from services.api.idempotency import (
+    IdempotencyConflict,
+    IdempotencyError,
+    IdempotencyStore,
+    fingerprint,
+)
+from services.inference.audit_store import AuditStore
+from services.inference.orchestrator import MaxRetryError, Orchestrator
+
+PRESET_INPUT = "最近来店が減っている。値引きには反応しないが、限定感には反応する。"
+
+
+class _Clock:
+    """テストから進められる時刻。"""
+
+    def __init__(self) -> None:
+        """固定の開始時刻で初期化する。"""
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        """現在の時刻を返す。"""
+        return self.now
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch, tmp_path) -> TestClient:
+    """一時 SQLite ストアと専用 Orchestrator を差し込んだクライアントを返す。"""
+    store = IdempotencyStore(tmp_path / "idempotency.sqlite3")
+    monkeypatch.setattr(main, "get_idempotency_store", lambda: store)
+    monkeypatch.setattr(main, "_orchestrator", Orchestrator(audit_store=AuditStore()))
+    return TestClient(main.app)
+
+
+def test_retry_returns_stored_response_without_rerun(client: TestClient):
+    """再送に保存済み結果を返し、監査ログを増やさないことを確認する。"""
+    headers = {"Idempotency-Key": "order-1"}
+    first = client.post("/convert", json={"text": PRESET_INPUT}, headers=headers)
+    second = client.post("/convert", json={"text": PRESET_INPUT}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(main._orchestrator.audit_store) == 1
+
+
+def test_different_body_conflicts(client: TestClient):
+    """同じキーで本文が異なる場合に 409 を返すことを確認する。"""
+    headers = {"Idempotency-Key": "order-2"}
+    client.post("/convert", json={"text": PRESET_INPUT}, headers=headers)
+
+    resp = client.post("/convert", json={"text": "別の入力"}, headers=headers)
+
+    assert resp.status_code == 409
+
+
+def test_invalid_key_returns_400(client: TestClient):
+    """長すぎるキーに 400 を返すことを確認する。"""
+    resp = client.post("/convert", json={"text": PRESET_INPUT}, headers={"Idempotency-Key": "x" * 300})
+
+    assert resp.status_code == 400
+
+
+def test_failed_run_releases_key(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """変換失敗時に予約を取り消し、同じキーで再実行できることを確認する。"""
+    orchestrator = main._orchestrator
+    original = orchestrator.run
+
+    def failing_run(text: str) -> dict:
+        raise MaxRetryError("validation failed after max retries")
+
+    headers = {"Idempotency-Key": "order-3"}
+    monkeypatch.setattr(orchestrator, "run", failing_run)
+    assert client.post("/convert", json={"text": PRESET_INPUT}, headers=headers).status_code == 500
+
+    monkeypatch.setattr(orchestrator, "run", original)
+    assert client.post("/convert", json={"text": PRESET_INPUT}, headers=headers).status_code == 200
+
+
+def test_store_is_shared_between_connections(tmp_path):
+    """同じファイルを開いた別インスタンス（別ワーカー）間で予約と応答を共有することを確認する。"""
+    path = tmp_path / "shared.sqlite3"
+    worker_a, worker_b = IdempotencyStore(path), IdempotencyStore(path)
+    body = fingerprint({"text": PRESET_INPUT})
+
+    assert worker_a.begin(":k", body, "a") is None
+    with pytest.raises(IdempotencyConflict, match="in progress"):
+        worker_b.begin(":k", body, "b")
+    assert worker_a.complete(":k", {"trace_id": "t-1"}, "a")
+
+    assert worker_b.begin(":k", body, "b") == {"trace_id": "t-1"}
+    with pytest.raises(IdempotencyConflict, match="different request body"):
+        worker_b.begin(":k", fingerprint({"text": "別の入力"}), "b")
+    with pytest.raises(IdempotencyError):
+        worker_b.begin("", body, "b")
+
+
+def test_store_expires_responses_and_leases(tmp_path):
+    """TTL 経過後の応答と lease 経過後の予約を新規扱いにすることを確認する。"""
+    clock = _Clock()
+    store = IdempotencyStore(tmp_path / "ttl.sqlite3", ttl_seconds=60, lease_seconds=5, clock=clock)
+    body = fingerprint({"text": PRESET_INPUT})
+
+    assert store.begin("done", body, "first") is None
+    store.complete("done", {"trace_id": "t-1"}, "first")
+    assert store.begin("stuck", body, "first") is None
+
+    clock.now += 10
+    assert store.begin("stuck", body, "retry") is None
+    assert store.begin("done", body, "retry") == {"trace_id": "t-1"}
+
+    clock.now += 60
+    assert store.purge() == 2
+    assert store.begin("done", body, "retry") is None
+    assert len(store) == 1
+
+
+def test_expired_lease_is_not_released_or_completed_by_previous_owner(tmp_path):
+    """lease 失効後に再送が取り直した予約を、先行リクエストの release()/complete() が壊さないことを確認する。"""
+    clock = _Clock()
+    store = IdempotencyStore(tmp_path / "lease.sqlite3", lease_seconds=5, clock=clock)
+    body = fingerprint({"text": PRESET_INPUT})
+
+    assert store.begin(":k", body, "slow") is None
+    clock.now += 10
+    assert store.begin(":k", body, "retry") is None
+
+    # 先行リクエストの失敗は再送の予約を取り消さない。
+    store.release(":k", "slow")
+    with pytest.raises(IdempotencyConflict, match="in progress"):
+        store.begin(":k", body, "third")
+
+    # 先行リクエストの完了も再送の予約を上書きしない。
+    assert not store.complete(":k", {"trace_id": "slow"}, "slow")
+    assert store.complete(":k", {"trace_id": "retry"}, "retry")
+    assert store.begin(":k", body, "third") == {"trace_id": "retry"}
+
+
+def test_store_upgrades_table_without_owner_column(tmp_path):
+    """owner 列のない既存ファイルを開いても予約できることを確認する。"""
+    path = tmp_path / "old.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE idempotency (key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL,"
+        " response TEXT, expires_at REAL NOT NULL) WITHOUT ROWID"
+    )
+    conn.close()
+
+    store = IdempotencyStore(path)
+    assert store.begin(":k", "fp", "a") is None
+    assert store.complete(":k", {"trace_id": "t"}, "a")
+
+
+def test_default_store_path_logs_warning(monkeypatch: pytest.MonkeyPatch, tmp_path, caplog):
+    """SAA_IDEMPOTENCY_DB 未設定時は一時ディレクトリを使い、警告ログを出すことを確認する。"""
+    monkeypatch.delenv("SAA_IDEMPOTENCY_DB", raising=False)
+    monkeypatch.setattr(main.tempfile, "gettempdir", lambda: str(tmp_path))
+    main.get_idempotency_store.cache_clear()
+    try:
+        with caplog.at_level("WARNING", logger=main.logger.name):
+            store = main.get_idempotency_store()
+        store.close()
+    finally:
+        main.get_idempotency_store.cache_clear()
+
+    assert store.path == str(tmp_path / "saa-idempotency.sqlite3")
+    assert "SAA_IDEMPOTENCY_DB is not set" in caplog.text
@@ -0,0 +1,112 @@
+"""/convert のオンデマンドプロファイル取得を検証するテストを提供する。
+
+入出力: POST /convert(X-Profile) -> X-Profile-Id / GET /debug/profiles/{id} -> collapsed stacks。
+制約:
+    - 既定設定ではトレーサを設定せず、X-Profile-Id も返さない
+    - 特権ヘッダのトークン未設定時はプロファイル参照エンドポイントを公開しない
+
+Note:
+    - 共有 profiler の設定はテストごとに monkeypatch で差し替える
+"""
+
+from __future__ import annotations
+
+import sys
+
+from fastapi.testclient import TestClient
+import pytest
+
+from services.api import main
+from services.api.profiling import ProfiledError, RequestProfiler
+
+TOKEN = "secret-token"
+PRESET_INPUT = "最近来店が減っている。値引きには反応しないが、限定感には反応する。"
+
+
+@pytest.fixture()
+def profiler(monkeypatch: pytest.MonkeyPatch) -> RequestProfiler:
+    """テスト専用の profiler を main へ差し込む。"""
+    instance = RequestProfiler(token=TOKEN, capacity=2)
+    monkeypatch.setattr(main, "profiler", instance)
+    return instance
+
+
+def test_profiling_is_off_by_default(monkeypatch: pytest.MonkeyPatch):
+    """既定設定ではトレーサを設定せず、プロファイルも保持しないことを確認する。"""
+    monkeypatch.setattr(main, "profiler", RequestProfiler())
+    observed = []
+    monkeypatch.setattr(main.profiler, "profile", lambda func: observed.append(func))
+
+    resp = TestClient(main.app).post(
+        "/convert", json={"text": PRESET_INPUT}, headers={"X-Profile": TOKEN}
+    )
+
+    assert resp.status_code == 200
+    assert "X-Profile-Id" not in resp.headers
+    assert observed == []
+    assert sys.getprofile() is None
+
+
+def test_privileged_header_captures_profile(profiler: RequestProfiler):
+    """特権ヘッダ付きリクエストの trace_id でプロファイルを取得できることを確認する。"""
+    client = TestClient(main.app)
+    resp = client.post("/convert", json={"text": PRESET_INPUT}, headers={"X-Profile": TOKEN})
+
+    assert resp.status_code == 200
+    profile_id = resp.headers["X-Profile-Id"]
+    assert profile_id == resp.json()["trace_id"]
+
+    download = client.get(f"/debug/profiles/{profile_id}", headers={"X-Profile": TOKEN})
+    assert download.status_code == 200
+    lines = download.text.splitlines()
+    assert lines
+    assert any("services.inference.orchestrator:Orchestrator.run" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_wrong_header_does_not_profile(profiler: RequestProfiler):
+    """不一致のトークンでは計測せず、参照も 403 になることを確認する。"""
+    client = TestClient(main.app)
+    resp = client.post("/convert", json={"text": PRESET_INPUT}, headers={"X-Profile": "wrong"})
+
+    assert resp.status_code == 200
+    assert "X-Profile-Id" not in resp.headers
+    assert client.get("/debug/profiles", headers={"X-Profile": "wrong"}).status_code == 403
+
+
+def test_debug_endpoints_hidden_without_token(monkeypatch: pytest.MonkeyPatch):
+    """トークン未設定時はプロファイル参照エンドポイントが 404 を返すことを確認する。"""
+    monkeypatch.setattr(main, "profiler", RequestProfiler(sample_rate=1.0))
+    client = TestClient(main.app)
+
+    resp = client.post("/convert", json={"text": PRESET_INPUT})
+    assert resp.status_code == 200
+    assert client.get("/debug/profiles").status_code == 404
+    assert client.get(f"/debug/profiles/{resp.headers['X-Profile-Id']}").status_code == 404
+
+
+def test_ring_keeps_latest_profiles(profiler: RequestProfiler):
+    """容量を超えたプロファイルが古いものから破棄されることを確認する。"""
+    client = TestClient(main.app)
+    ids = [
+        client.post(
+            "/convert", json={"text": PRESET_INPUT}, headers={"X-Profile": TOKEN}
+        ).headers["X-Profile-Id"]
+        for _ in range(3)
+    ]
+
+    listed = client.get("/debug/profiles", headers={"X-Profile": TOKEN}).json()
+    assert [item["trace_id"] for item in listed] == ids[:0:-1]
+    assert profiler.get(ids[0]) is None
+
+
+def test_profile_restores_previous_tracer_on_error():
+    """計測中の例外で集計結果を保持し、元のトレーサへ戻すことを確認する。"""
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    with pytest.raises(ProfiledError) as info:
+        RequestProfiler(sample_rate=1.0).profile(fail)
+
+    assert isinstance(info.value.original, RuntimeError)
+    assert sys.getprofile() is None
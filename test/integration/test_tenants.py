@@ -0,0 +1,236 @@
+"""テナント別 Orchestrator プールと X-Tenant-ID ルーティングを検証するテストを提供する。
+
+入出力: POST /convert(X-Tenant-ID) -> テナント設定に従う JSON / TenantPool.get -> Orchestrator。
+制約:
+    - 未知・不正なテナントIDは 404 を返す
+    - 保持数を超えたテナントは最も長く参照されていないものから破棄する
+
+Note:
+    - テナント設定は tmp_path に JSON として書き出し、main のプールを差し替えて使う
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+import pytest
+
+from services.api import main
+from services.api.tenants import DirectoryTenantSource, TenantConfig, TenantError, TenantPool
+from services.inference.audit_store import AuditStore
+from services.inference.orchestrator import Orchestrator
+
+BRAND_A = {
+    "intent": "休眠復帰",
+    "next_actions": ["新商品体験招待", "個別フォロー連絡", "期間限定特典"],
+    "fallback_states": ["休眠傾向", "新商品関心", "個別フォロー必要"],
+    "action_bindings": [{"action": "メール配信", "api": "mail.send"}],
+}
+BRAND_B = {
+    "intent": "解約防止",
+    "next_actions": ["個別フォロー連絡", "会員限定イベント", "期間限定特典"],
+    "vocabulary": {"states": [{"label": "解約検討兆候", "aliases": ["解約を検討している"]}]},
+}
+
+
+@pytest.fixture()
+def tenants_dir(tmp_path):
+    """ブランド2件分のテナント設定ディレクトリを作る。"""
+    (tmp_path / "brand-a.json").write_text(json.dumps(BRAND_A, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "brand-b.json").write_text(json.dumps(BRAND_B, ensure_ascii=False), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture()
+def client(tenants_dir, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    """テナント設定ディレクトリを参照するプールへ差し替えたクライアントを返す。"""
+    pool = TenantPool(
+        source=DirectoryTenantSource(tenants_dir, base_vocabulary={"states": []}),
+        factory=main._build_tenant_orchestrator,
+        capacity=4,
+    )
+    monkeypatch.setattr(main, "get_tenant_pool", lambda: pool)
+    monkeypatch.setattr(main, "_orchestrator", Orchestrator(audit_store=AuditStore()))
+    return TestClient(main.app)
+
+
+def test_tenant_config_is_applied(client: TestClient):
+    """テナントごとの intent・next_actions・補助 state・action_bindings が反映されることを確認する。"""
+    resp = client.post("/convert", json={"text": "問い合わせが多い"}, headers={"X-Tenant-ID": "brand-a"})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["intent"] == "休眠復帰"
+    assert body["next_actions"] == BRAND_A["next_actions"]
+    assert set(BRAND_A["fallback_states"]) & set(body["state"])
+    assert body["action_bindings"] == [{"action": "メール配信", "api": "mail.send", "dry_run": True}]
+
+
+def test_tenants_are_isolated_and_share_audit_log(client: TestClient):
+    """テナント間で設定が混ざらず、監査ログに tenant_id が付くことを確認する。"""
+    a = client.post("/convert", json={"text": "解約を検討している"}, headers={"X-Tenant-ID": "brand-a"})
+    b = client.post("/convert", json={"text": "解約を検討している"}, headers={"X-Tenant-ID": "brand-b"})
+    default = client.post("/convert", json={"text": "解約を検討している"})
+
+    assert a.json()["intent"] == "休眠復帰"
+    assert b.json()["intent"] == "解約防止"
+    assert b.json()["state"][0] == "解約検討兆候"
+    assert default.json()["intent"] == "再来店動機付け"
+    tenants = [r.get("tenant_id") for r in main._orchestrator.audit_store.records()]
+    assert tenants == ["brand-a", "brand-b", None]
+
+
+def test_unknown_or_invalid_tenant_returns_404(client: TestClient):
+    """未知・パス走査を含むテナントIDに 404 を返すことを確認する。"""
+    for tenant in ("brand-z", "../brand-a", "a" * 65, "brand-a\n"):
+        resp = client.post("/convert", json={"text": "来店が減っている"}, headers={"X-Tenant-ID": tenant})
+        assert resp.status_code == 404
+
+
+@pytest.mark.parametrize("similarity", [0, -0.5, 1.5, "0.8", True, None])
+def test_invalid_similarity_is_rejected(similarity):
+    """範囲外・数値でない similarity を TenantError で拒否することを確認する。"""
+    with pytest.raises(TenantError, match="similarity"):
+        TenantConfig.from_dict("brand-a", {**BRAND_A, "similarity": similarity}, {"states": []})
+
+
+def test_vocabulary_path_must_stay_inside_tenants_dir(tenants_dir):
+    """設定ディレクトリ外を指す vocabulary_path を拒否し、内側は読み込むことを確認する。"""
+    outside = tenants_dir.parent / "outside_vocabulary.json"
+    outside.write_text(json.dumps({"states": []}), encoding="utf-8")
+    (tenants_dir / "vocab").mkdir()
+    (tenants_dir / "vocab" / "c.json").write_text(json.dumps({"states": []}), encoding="utf-8")
+    configs = {
+        "escape": {"vocabulary_path": "../outside_vocabulary.json"},
+        "absolute": {"vocabulary_path": str(outside)},
+        "inside": {"vocabulary_path": "vocab/c.json"},
+    }
+    for tenant_id, config in configs.items():
+        (tenants_dir / f"{tenant_id}.json").write_text(json.dumps(config), encoding="utf-8")
+    source = DirectoryTenantSource(tenants_dir, base_vocabulary={"states": [{"label": "x"}]})
+
+    for tenant_id in ("escape", "absolute"):
+        with pytest.raises(TenantError, match="vocabulary_path"):
+            source(tenant_id)
+    assert source("inside").vocabulary == {"states": []}
+
+
+def test_pool_evicts_least_recently_used_and_reports_metrics():
+    """LRU 破棄とヒット・構築の統計を確認する。"""
+    pool = TenantPool(
+        source=lambda tenant: TenantConfig.from_dict(tenant, {}, {"states": []}),
+        factory=lambda config: Orchestrator(tenant_id=config.tenant_id),
+        capacity=2,
+    )
+    first = pool.get("t1")
+    pool.get("t2")
+    assert pool.get("t1") is first
+    pool.get("t3")
+
+    assert "t2" not in pool and "t1" in pool and "t3" in pool
+    metrics = pool.metrics()
+    assert (metrics.hits, metrics.misses, metrics.builds, metrics.evictions) == (1, 3, 3, 1)
+    assert metrics.to_dict()["hit_rate"] == pytest.approx(0.25)
+
+
+def test_concurrent_first_access_builds_once():
+    """同一テナントへの同時初回アクセスで構築が1回だけ行われることを確認する。"""
+    calls: list[str] = []
+
+    def slow_factory(config: TenantConfig) -> Orchestrator:
+        calls.append(config.tenant_id)
+        time.sleep(0.05)
+        return Orchestrator(tenant_id=config.tenant_id)
+
+    pool = TenantPool(
+        source=lambda tenant: TenantConfig.from_dict(tenant, {}, {"states": []}),
+        factory=slow_factory,
+    )
+    results: list[Orchestrator] = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("t1"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["t1"]
+    assert len({id(result) for result in results}) == 1
+
+
+def test_build_failure_is_counted_and_retried():
+    """設定不正による構築失敗を統計に残し、次回参照で再試行することを確認する。"""
+    pool = TenantPool(
+        source=lambda tenant: TenantConfig.from_dict(tenant, {"next_actions": ["1"]}, {}),
+        factory=lambda config: Orchestrator(),
+    )
+
+    for _ in range(2):
+        with pytest.raises(TenantError):
+            pool.get("broken")
+    assert pool.metrics().build_failures == 2
+
+
+def test_metrics_endpoint(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """GET /tenants/metrics が監査トークン付きの場合のみプールの統計を返すことを確認する。"""
+    client.post("/convert", json={"text": "来店が減っている"}, headers={"X-Tenant-ID": "brand-a"})
+    client.post("/convert", json={"text": "来店が減っている"}, headers={"X-Tenant-ID": "brand-a"})
+
+    monkeypatch.setattr(main, "audit_export_token", None)
+    assert client.get("/tenants/metrics").status_code == 404
+    monkeypatch.setattr(main, "audit_export_token", "audit-token")
+    assert client.get("/tenants/metrics", headers={"X-Audit-Token": "wrong"}).status_code == 403
+
+    body = client.get("/tenants/metrics", headers={"X-Audit-Token": "audit-token"}).json()
+    assert body["size"] == 1
+    assert body["hits"] == 1
+    assert body["builds"] == 1
+
+
+def test_trailing_newline_tenant_id_is_rejected():
+    """末尾に改行を含むテナントIDを設定の読み込み前に拒否することを確認する。"""
+    source = MagicMock()
+    pool = TenantPool(source=source, factory=MagicMock())
+
+    with pytest.raises(TenantError, match="invalid tenant id"):
+        pool.get("brand-a\n")
+    source.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "states",
+    [[{"aliases": ["別名"]}], [{"label": 1}], [{"label": "x", "aliases": "別名"}], [None], {"label": "x"}],
+)
+def test_malformed_vocabulary_states_are_rejected(states):
+    """語彙 states の不正な要素を KeyError ではなく TenantError で拒否することを確認する。"""
+    with pytest.raises(TenantError, match="vocabulary states"):
+        TenantConfig.from_dict("brand-a", {**BRAND_A, "vocabulary": {"states": states}}, {"states": []})
+
+
+def test_unknown_tenant_is_cached_for_ttl(tenants_dir):
+    """未知テナントを記憶期間内はディスクを読まずに拒否し、期間後は再確認することを確認する。"""
+    now = [0.0]
+    source = DirectoryTenantSource(
+        tenants_dir,
+        base_vocabulary={"states": []},
+        unknown_ttl_seconds=30,
+        unknown_capacity=2,
+        clock=lambda: now[0],
+    )
+    with pytest.raises(TenantError, match="unknown tenant"):
+        source("brand-c")
+
+    (tenants_dir / "brand-c.json").write_text(json.dumps(BRAND_A, ensure_ascii=False), encoding="utf-8")
+    with pytest.raises(TenantError, match="unknown tenant"):
+        source("brand-c")
+
+    now[0] += 31
+    assert source("brand-c").template.intent == BRAND_A["intent"]
+
+    for tenant_id in ("x1", "x2", "x3"):
+        with pytest.raises(TenantError):
+            source(tenant_id)
+    assert list(source._unknown) == ["x2", "x3"]